@@ -0,0 +1,198 @@
+#! /usr/bin/env python
+"""Bitmaps for the GUI, packed into atlases and decoded once
+
+The images in assets/ are the sources.  Those shown when the window opens
+are packed into a few atlas PNGs, indexed by assets/atlas.ini, so startup
+decodes a handful of files rather than a hundred.  Images seen rarely, such
+as the OCP banners and the network configuration labels, are left out of
+the atlases and read from their own files the first time they are shown.
+
+Run this module after changing an image in assets/ to rebuild the atlases:
+
+    ./PS3010EC_Assets.py
+"""
+
+import configparser
+import os
+import time
+import tkinter as tk
+
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         'assets')
+ATLAS_INDEX = 'atlas.ini'
+
+# Atlas and the images packed into it.  Images not listed are loaded from
+# their own files on first use.
+ATLASES = {
+    'atlas-digits':
+    [f'digit-{i}-{ordinal}-{size}' for size in ('l', 'm', 's')
+     for ordinal in ('nd', 'd') for i in range(0, 10)],
+    'atlas-ui': [
+        'label-voltage', 'label-current', 'label-output', 'label-setvoltage',
+        'label-setcurrent', 'label-set', 'label-set_mode',
+        'label-set_mode-blank', 'label-configuration', 'label-memory',
+        'status-voltagelimited', 'status-currentlimited', 'status-hidelimited',
+        'status-outputoff', 'status-outputon', 'label-comm', 'label-v',
+        'label-i', 'label-ps', 'label-m1', 'label-m2', 'label-m3', 'label-m4',
+        'button-arrow-up', 'button-arrow-down', 'button-store',
+        'button-recall', 'button-recall-setfromapp', 'button-conn',
+        'button-disconn', 'button-save', 'button-quit', 'button-apply',
+        'button-run', 'button-stop', 'radiobutton-serial',
+        'radiobutton-network',
+        'checkbutton-outputoffbeforechange', 'checkbutton-outputonafterchange'
+    ]
+}
+ATLAS_WIDTH = 560
+
+
+class AssetCache():
+    """PhotoImages by name, each decoded once
+
+    An image indexed in atlas.ini is copied out of its atlas, which Tk
+    decodes the first time any of its images is asked for.  Any other name
+    is read from name.png.  PIL is not needed, only Tk's own PNG support.
+    Must be used from the Tk thread after the root window exists.
+
+    stats holds the atlases and files decoded, images made and seconds
+    spent on them.
+
+    e.g.
+        assets = AssetCache()
+        label = ttk.Label(frame, image=assets.image('label-voltage'))
+    """
+
+    def __init__(self, master=None, directory=ASSET_DIR):
+        """
+        Args:
+            * master (widget): Tk instance the images belong to
+            * directory (str): Folder holding the images and atlas.ini
+        """
+        self.master = master
+        self.directory = directory
+        self._atlases = {}
+        self._images = {}
+        self.stats = {'atlases': 0, 'files': 0, 'images': 0, 'seconds': 0.0}
+
+        # Image name: (atlas, (x, y, width, height))
+        self.index = {}
+        index = configparser.ConfigParser(interpolation=None)
+        index.read(os.path.join(directory, ATLAS_INDEX))
+        for atlas_name in index.sections():
+            for name, box in index[atlas_name].items():
+                self.index[name] = (atlas_name, tuple(map(int, box.split())))
+
+    def _atlas(self, name):
+        atlas = self._atlases.get(name)
+        if atlas is None:
+            atlas = self._atlases[name] = tk.PhotoImage(
+                master=self.master,
+                file=os.path.join(self.directory, f'{name}.png'))
+            self.stats['atlases'] += 1
+        return atlas
+
+    def image(self, name):
+        """The PhotoImage of assets/name.png"""
+        image = self._images.get(name)
+        if image is not None:
+            return image
+
+        started = time.perf_counter()
+        if name in self.index:
+            atlas_name, (x, y, width, height) = self.index[name]
+            atlas = self._atlas(atlas_name)
+            image = tk.PhotoImage(master=self.master,
+                                  width=width,
+                                  height=height)
+            image.tk.call(image, 'copy', atlas, '-from', x, y, x + width,
+                          y + height)
+        else:
+            image = tk.PhotoImage(master=self.master,
+                                  file=os.path.join(self.directory,
+                                                    f'{name}.png'))
+            self.stats['files'] += 1
+
+        self._images[name] = image
+        self.stats['images'] += 1
+        self.stats['seconds'] += time.perf_counter() - started
+        return image
+
+    def digits(self, size, ordinal):
+        """The images of 0 through 9 for a SevenSegmentModule
+
+        Args:
+            * size (str): 'l', 'm' or 's'
+            * ordinal (str): 'd' with the decimal point, 'nd' without
+        """
+        return [self.image(f'digit-{i}-{ordinal}-{size}') for i in range(0, 10)]
+
+
+class ImageSet(dict):
+    """Images by key, taken from an AssetCache on first use
+
+    e.g.
+        buttons = ImageSet(assets, {'quit': 'button-quit'})
+        buttons['quit']  # decoded here
+    """
+
+    def __init__(self, cache, names):
+        """
+        Args:
+            * cache (AssetCache): Where the images come from
+            * names (dict): Image name of each key
+        """
+        super().__init__()
+        self.cache = cache
+        self.names = names
+
+    def __missing__(self, key):
+        image = self[key] = self.cache.image(self.names[key])
+        return image
+
+
+def build_atlases(directory=ASSET_DIR, width=ATLAS_WIDTH):
+    """Pack the images of ATLASES into atlas PNGs and write atlas.ini
+
+    Images are placed left to right in rows, tallest first, starting a new
+    row when the next image would pass width.
+    """
+    from PIL import Image
+
+    index = configparser.ConfigParser(interpolation=None)
+    for atlas_name, names in ATLASES.items():
+        sources = {}
+        for name in names:
+            with Image.open(os.path.join(directory, f'{name}.png')) as source:
+                sources[name] = source.convert('RGBA')
+
+        # Shelf packing: sorted by height, stable so digits stay in order
+        placed = {}
+        x = y = row_height = 0
+        for name in sorted(names, key=lambda n: -sources[n].height):
+            source = sources[name]
+            if x + source.width > width:
+                x = 0
+                y += row_height
+                row_height = 0
+            placed[name] = (x, y)
+            x += source.width
+            row_height = max(row_height, source.height)
+
+        # Index section per atlas of name = x y width height
+        atlas = Image.new('RGBA', (width, y + row_height), (0, 0, 0, 0))
+        index[atlas_name] = {}
+        for name in names:
+            x, y = placed[name]
+            atlas.paste(sources[name], (x, y))
+            index[atlas_name][name] = (f'{x} {y} {sources[name].width} '
+                                       f'{sources[name].height}')
+        atlas.save(os.path.join(directory, f'{atlas_name}.png'),
+                   optimize=True)
+        print(f'{atlas_name}.png: {len(names)} images, '
+              f'{atlas.width}x{atlas.height}')
+
+    with open(os.path.join(directory, ATLAS_INDEX), 'w') as indexfile:
+        index.write(indexfile)
+
+
+if __name__ == '__main__':
+    build_atlases()
@@ -0,0 +1,279 @@
+#! /usr/bin/env python
+"""Benchmarks for polling, command latency and GUI update cost
+
+Runs against a simulated supply (PS3010EC_Simulator) on a pseudo-terminal,
+so no hardware is needed, and writes the results as JSON so runs of
+different versions can be compared.
+
+    ./PS3010EC_Benchmark.py --output bench.json
+    xvfb-run ./PS3010EC_Benchmark.py --output bench.json   (headless Tk)
+
+Measured:
+    * all_raw: frames per second and p50/p99 latency of PSU.all_raw and
+      AsyncPSU.all_raw
+    * apply: time from App.send_applySet_to_queue to the Set-U write
+      arriving at the simulated supply, through the application's own
+      queue and dispatcher tasks
+    * gui: time to build and draw the window, images decoded for it, and
+      cost of App.show_polled_values and SevenSegmentModule._update_display
+      per poll
+
+The GUI benchmarks are skipped, and say so in the results, when there is no
+display to open a Tk window on.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from PS3010EC_Modbus import PSU, AsyncPSU
+from PS3010EC_Simulator import Simulator, SimulatedPSU
+
+
+def summarize(samples):
+    """Statistics of a list of durations in seconds, reported in ms"""
+    ordered = sorted(samples)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    return {
+        'count': len(ordered),
+        'mean_ms': sum(ordered) / len(ordered) * 1000,
+        'p50_ms': percentile(50) * 1000,
+        'p99_ms': percentile(99) * 1000,
+        'min_ms': ordered[0] * 1000,
+        'max_ms': ordered[-1] * 1000
+    }
+
+
+def start_simulator(latency=True):
+    """Serve a simulated supply from its own thread and event loop, so its
+    timing does not depend on the load of the code being measured.
+
+    Returns (simulator, pty device name)
+    """
+    simulator = Simulator([SimulatedPSU(1)], latency=latency)
+    started = threading.Event()
+    device = []
+
+    async def serve():
+        device.append(await simulator.serve_pty())
+        started.set()
+        await asyncio.Event().wait()
+
+    threading.Thread(target=asyncio.run, args=(serve(), ),
+                     daemon=True).start()
+    started.wait()
+    return simulator, device[0]
+
+
+def bench_all_raw(device, count):
+    """Time PSU.all_raw"""
+    ps = PSU(device)
+    samples = []
+    start = time.perf_counter()
+    for _ in range(count):
+        poll_start = time.perf_counter()
+        ps.all_raw
+        samples.append(time.perf_counter() - poll_start)
+    elapsed = time.perf_counter() - start
+    ps.pymc.close()
+
+    result = summarize(samples)
+    result['frames_per_second'] = count / elapsed
+    result['failures'] = ps.stats['failures']
+    return result
+
+
+async def bench_async_all_raw(device, count):
+    """Time AsyncPSU.all_raw"""
+    ps = AsyncPSU(device)
+    await ps.connect()
+    samples = []
+    start = time.perf_counter()
+    for _ in range(count):
+        poll_start = time.perf_counter()
+        await ps.all_raw()
+        samples.append(time.perf_counter() - poll_start)
+    elapsed = time.perf_counter() - start
+    ps.close()
+
+    result = summarize(samples)
+    result['frames_per_second'] = count / elapsed
+    result['failures'] = ps.stats['failures']
+    return result
+
+
+def create_gui():
+    """Returns the App, or None with the reason if Tk cannot open a window"""
+    import tkinter as tk
+    from PS3010EC_GUI import App
+    try:
+        # Default settings and totals in memory, so the benchmark's samples
+        # never reach the user's config.ini or energy.ini
+        gui = App("Benchmark", "800x790", config_path=None, energy_path=None)
+        gui.update()  # Drawn, as when the mainloop first runs
+        return gui, None
+    except tk.TclError as e:
+        return None, str(e)
+
+
+def bench_apply(gui, simulator, device, count):
+    """Time Apply clicks until the Set-U write lands at the supply
+
+    Tk's mainloop runs here and asyncio in its own thread, as in the
+    application.
+    """
+    import ps3010ec
+
+    landed = {}
+    simulator.on_write.append(
+        lambda unit, address, values, now: landed.setdefault(
+            values[0], time.monotonic())
+        if address == PSU.Registers.U_WRITE.value else None)
+
+    samples = []
+
+    def click(n):
+        if gui.frames['Config']['connection_status'] != 'connected':
+            gui.after(10, click, n)  # Commands are dropped until connected
+            return
+        if n == count:
+            gui.send_appQuit_to_queue()  # Ends the asyncio thread and mainloop
+            return
+        set_u = 100 + n  # A new value each time so every write is told apart
+        gui.frames['SetU']['display'].value = set_u
+        clicked = time.monotonic()
+        gui.send_applySet_to_queue()
+
+        def landed_yet():
+            if set_u not in landed:
+                gui.after(1, landed_yet)
+                return
+            samples.append(landed[set_u] - clicked)
+            # Clicks are spread out like a user's so the poller interleaves
+            gui.after(random.randint(50, 300), click, n + 1)
+
+        landed_yet()
+
+    status = []
+    worker = threading.Thread(target=ps3010ec.run_asyncio,
+                              args=(gui,
+                                    ps3010ec.serve_gui(
+                                        gui, ('Serial', device, '', 0, 'tcp')),
+                                    status),
+                              daemon=True)
+    gui.after_idle(worker.start)
+    gui.after(500, click, 0)
+    gui.mainloop()
+    worker.join()
+    result = summarize(samples)
+    result['queue'] = gui.command_queue.metrics()
+    return result
+
+
+def bench_gui(gui, count):
+    """Time the GUI work done for each poll"""
+    update_samples = []
+    display_samples = []
+    display = gui.frames['U']['display']
+
+    for n in range(count):
+        values = [
+            random.randint(0, PSU.RawLimits.VOLTAGE),
+            random.randint(0, PSU.RawLimits.CURRENT),
+            random.randint(0, PSU.RawLimits.VOLTAGE),
+            random.randint(0, PSU.RawLimits.CURRENT), n % 2,
+            random.choice((0, 1, 2))
+        ]
+        start = time.perf_counter()
+        gui.show_polled_values(values, time.monotonic())
+        update_samples.append(time.perf_counter() - start)
+
+        display._value = values[2]
+        start = time.perf_counter()
+        display._update_display()
+        display_samples.append(time.perf_counter() - start)
+
+    gui.update()
+    return {
+        'show_polled_values': summarize(update_samples),
+        'seven_segment_update_display': summarize(display_samples)
+    }
+
+
+def version():
+    try:
+        return subprocess.run(
+            ['git', 'describe', '--always', '--dirty'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the PS3010EC application against a simulator')
+    parser.add_argument('--output',
+                        help='JSON results file (default: standard output)')
+    parser.add_argument('--polls',
+                        type=int,
+                        default=200,
+                        help='all_raw calls to time (default 200)')
+    parser.add_argument('--clicks',
+                        type=int,
+                        default=20,
+                        help='Apply clicks to time (default 20)')
+    parser.add_argument('--updates',
+                        type=int,
+                        default=500,
+                        help='GUI updates to time (default 500)')
+    parser.add_argument('--no-latency',
+                        action='store_true',
+                        help='simulator answers at once, timing software only')
+    args = parser.parse_args()
+
+    simulator, device = start_simulator(latency=not args.no_latency)
+
+    results = {
+        'version': version(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'simulator_latency': not args.no_latency,
+        'all_raw': bench_all_raw(device, args.polls),
+        'async_all_raw': asyncio.run(bench_async_all_raw(device, args.polls))
+    }
+
+    started = time.perf_counter()
+    gui, reason = create_gui()
+    startup = time.perf_counter() - started
+    if gui is None:
+        results['apply'] = results['gui'] = {'skipped': reason}
+    else:
+        # Before the benchmarks decode any images the window left for later
+        assets = dict(gui.assets.stats)
+        results['apply'] = bench_apply(gui, simulator, device, args.clicks)
+        results['gui'] = bench_gui(gui, args.updates)
+        results['gui']['startup'] = {'seconds': startup, 'assets': assets}
+        gui.destroy()
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as outfile:
+            outfile.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""Clocks for code that can run on simulated time
+
+RealClock is the default everywhere.  A VirtualClock shared by the
+simulator (PS3010EC_Simulator) and a driver such as SequenceRunner or
+Sweep makes holds, settle waits and frame delays advance simulated time
+instead of waiting, so an hour long scenario runs in seconds.
+"""
+
+import asyncio
+import time
+
+
+class RealClock():
+    """Wall clock time, sleeps really wait"""
+
+    def now(self):
+        return time.monotonic()
+
+    async def sleep(self, seconds):
+        await asyncio.sleep(seconds)
+
+
+class VirtualClock():
+    """Simulated time that only moves when something sleeps on it"""
+
+    def __init__(self, start=0.0):
+        self.time = start
+
+    def now(self):
+        return self.time
+
+    async def sleep(self, seconds):
+        self.time += max(seconds, 0)
+        await asyncio.sleep(0)  # Let other tasks run
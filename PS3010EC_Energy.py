@@ -0,0 +1,131 @@
+"""Charge and energy delivered, integrated from the polled samples
+
+Each sample costs the same whatever the run length: the trapezoid between
+it and the previous sample is added to running totals.  The totals are
+saved to $HOME/.config/ps3010ec/energy.ini so they carry over restarts.
+"""
+
+import atexit
+import configparser
+import os
+import time
+from PS3010EC_Modbus import CONFIG_DIR
+
+ENERGY_PATH = os.path.join(CONFIG_DIR, 'energy.ini')
+
+
+class EnergyMeter():
+    """Ah, Wh and seconds of output on, from raw polled values
+
+    Nothing is added across a gap longer than max_gap, such as a lost
+    connection, or while the output is off at either end of an interval.
+    Timestamps are time.monotonic(), so the first sample after a restart
+    starts a new interval rather than spanning the time the app was closed.
+
+    e.g.
+        meter = EnergyMeter()
+        meter.add(time.monotonic(), polled_values)
+        print(meter.ah, meter.wh, meter.seconds)
+    """
+
+    def __init__(self, path=ENERGY_PATH, max_gap=5.0, save_interval=60.0):
+        """
+        Args:
+            * path (str): State file, None to keep the totals in memory only
+            * max_gap (float): Longest interval in seconds integrated over
+            * save_interval (float): Seconds between saves of the state
+        """
+        self.path = path
+        self.max_gap = max_gap
+        self.save_interval = save_interval
+        self.ah = 0.0
+        self.wh = 0.0
+        self.seconds = 0.0
+        self.gaps = 0
+        self.since = time.strftime('%Y-%m-%d %H:%M:%S')
+        self._last = None  # (timestamp, volts, amps, output on)
+        self._saved = time.monotonic()
+        self.load()
+        if self.path is not None:
+            atexit.register(self.save)
+
+    def add(self, timestamp, polled_values):
+        """Integrate up to a new sample
+
+        Args:
+            * timestamp (float): time.monotonic() of the sample
+            * polled_values (sequence): Raw registers 0x1000-0x1005
+        """
+        volts = polled_values[2] / 100
+        amps = polled_values[3] / 100
+        on = polled_values[4] != 0
+        last = self._last
+        self._last = (timestamp, volts, amps, on)
+        if last is None:
+            return
+
+        last_timestamp, last_volts, last_amps, last_on = last
+        interval = timestamp - last_timestamp
+        if interval <= 0:
+            return
+        if interval > self.max_gap:
+            self.gaps += 1
+        elif on and last_on:
+            hours = interval / 3600
+            self.ah += (last_amps + amps) / 2 * hours
+            self.wh += (last_volts * last_amps + volts * amps) / 2 * hours
+            self.seconds += interval
+
+        if (self.path is not None
+                and timestamp - self._saved >= self.save_interval):
+            self._saved = timestamp
+            self.save()
+
+    def reset(self):
+        """Start the totals again from zero"""
+        self.ah = 0.0
+        self.wh = 0.0
+        self.seconds = 0.0
+        self.gaps = 0
+        self.since = time.strftime('%Y-%m-%d %H:%M:%S')
+        self.save()
+
+    def elapsed(self):
+        """Seconds of output on as H:MM:SS"""
+        minutes, seconds = divmod(int(self.seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours}:{minutes:02}:{seconds:02}"
+
+    def load(self):
+        if self.path is None:
+            return
+        state = configparser.ConfigParser()
+        try:
+            state.read(self.path)
+            self.ah = state.getfloat('energy', 'ah', fallback=0.0)
+            self.wh = state.getfloat('energy', 'wh', fallback=0.0)
+            self.seconds = state.getfloat('energy', 'seconds', fallback=0.0)
+            self.gaps = state.getint('energy', 'gaps', fallback=0)
+            self.since = state.get('energy', 'since', fallback=self.since)
+        except (configparser.Error, ValueError) as e:
+            print(f'Energy totals not loaded: {e}')
+
+    def save(self):
+        """Write the totals, replacing the file in one step"""
+        if self.path is None:
+            return
+        state = configparser.ConfigParser()
+        state['energy'] = {
+            'ah': repr(self.ah),
+            'wh': repr(self.wh),
+            'seconds': repr(self.seconds),
+            'gaps': str(self.gaps),
+            'since': self.since
+        }
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path + '.tmp', 'w') as statefile:
+                state.write(statefile)
+            os.replace(self.path + '.tmp', self.path)
+        except OSError as e:
+            print(f'Energy totals not saved: {e}')
@@ -0,0 +1,1568 @@
+"""Tk window for the PS3010EC Power Supply Control Interface
+
+Kept apart from ps3010ec.py so the headless poller never imports tkinter
+or ttkwidgets.  ttkwidgets, slow to import, is only loaded for the tooltips
+once the window has been drawn.
+"""
+
+import sys
+import queue
+import time
+import tkinter as tk
+from tkinter import ttk
+import configparser
+from PS3010EC_Modbus import PSU, CONFIG_PATH
+from PS3010EC_History import SampleHistory
+from PS3010EC_Energy import EnergyMeter, ENERGY_PATH
+from PS3010EC_Assets import AssetCache, ImageSet
+from SevenSegmentModule import SevenSegmentModule
+from TrendChartModule import TrendChartModule
+
+
+class App(tk.Tk):
+    """The root window for the application"""
+
+    # Application variables
+
+    # self.config
+    # self.root_frame
+    # self.polled_values
+    # self.history
+    # self.energy
+    # self.set_by_app
+    # self.assets
+    # self.number_images = dict()
+    # self.label_frame_images = dict()
+    # self.label_status_images = dict()
+    # self.label_images = dict()
+    # self.button_images = dict()
+    # self.radiobutton_images = dict()
+    # self.checkbutton_images = dict()
+    # self.deferred_images = dict()      # Frame: [(widget, images, key)] until first shown
+    # self.tooltips = []
+    # self.startup_times = dict()
+
+    # self.frames={}  #Keys here are the sections of the interface e.g. 'U', 'I', etc.
+
+    # # The following dictionary pattern is used for the 'U' and 'I' sections
+    # self.frames['U' or 'I']['frame']
+    # self.frames['U' or 'I']['display']
+    # self.frames['U' or 'I']['reg_mode_banner']
+    # self.frames['U' or 'I']['reg_mode_banner_text']
+
+    # self.frames['RS']['frame']
+    # self.frames['RS']['run_stop_button']
+
+    # self.frames['SetU' or 'SetI']['frame']
+    # self.frames['SetU' or 'SetI']['display']
+    # self.frames['SetU' or 'SetI']['digits_up_buttons'][0-2]
+    # self.frames['SetU' or 'SetI']['digits_down_buttons'][0-2]
+
+    # self.frames['SetMode']['frame']
+    # self.frames['SetMode']['mode_label']
+
+    # self.frames['SetCmd']['frame']
+    # self.frames['SetCmd']['off_before_change']
+    # self.frames['SetCmd']['off_before_change_checkbutton']
+    # self.frames['SetCmd']['on_after_change']
+    # self.frames['SetCmd']['on_after_change_checkbutton']
+    # self.frames['SetCmd']['apply_button']
+
+    # self.frames['Config']['frame']
+    # self.frames['Config']['subframes']= dict()   # Either 'serial' or 'network'
+    # self.frames['Config']['comm_method_buttons]
+    # self.frames['Config']['comm_method_text]
+    # self.frames['Config']['comm_text_box']
+    # self.frames['Config']['ipaddr_text_box']
+    # self.frames['Config']['port_text_box']
+    # self.frames['Config']['connect_button']
+    # self.frames['Config']['connection_text']
+    # self.frames['Config']['quit_button']
+    # self.frames['Config']['find_button']
+    # self.frames['Config']['save_config_button']
+    # self.frames['Config']['connection_status']
+
+    # self.frames['Mem']['frame']
+    # self.frames['Mem']['registers'][0-4]['U']              # Register 0 is the PS value
+    # self.frames['Mem']['registers'][0-4]['U']['display']   # Registers 1-4 are local app registers
+    # self.frames['Mem']['registers'][0-4]['I']
+    # self.frames['Mem']['registers'][0-4]['I']['display']
+    # self.frames['Mem']['registers'][0-4]['sto_button']
+    # self.frames['Mem']['registers'][0-4]['rcl_button']
+
+    # self.frames['Trend']['frame']
+    # self.frames['Trend']['chart']
+    # self.frames['Trend']['energy_text']
+    # self.frames['Trend']['energy_reset_button']
+
+    def __init__(self,
+                 title,
+                 geometry,
+                 config_path=CONFIG_PATH,
+                 energy_path=ENERGY_PATH):
+        """ The application is for a Programmable Power Supply(PS) Control Interface
+        for the Longwei LW-3010EC and similar
+
+        The PS will switch between Constant Voltage (CV) and Constant Current (CC)
+        regulation modes as well as Over Current Protection Mode
+
+        The Present Voltage or Present Current frames will modify their background
+        color and update a status display to indicate which mode the PS is in.
+
+        If the Over Current Protection (OCP) trips the ouput will be disabled by the
+        PS firwmare.  Since there is no Modbus registers for the OCP controls any
+        OCP errors or setting must be done from the device interface
+
+        The configuration file for communication and memory registers is at
+        ~/.config/ps3010ec/config.ini
+
+        Args:
+            * title (str): Window title
+            * geometry (str): Window size as WIDTHxHEIGHT
+            * config_path (str): Configuration file, None to use the
+              defaults and never save them
+            * energy_path (str): Energy totals file, None to keep the totals
+              in memory only
+        """
+
+        started = time.perf_counter()
+        super().__init__()
+        self.title(title)
+        self.resizable(False, False)
+        try:
+            self.root_width, self.root_height = geometry.split('x')
+            #print(f"self.rood_width: {self.root_width}, self.root_height: {self.root_height}")
+        except ValueError as e:
+            print(f"Geometry value could not be parsed.  geometry: {geometry}")
+            sys.exit(1)
+
+        try:
+            config_started = time.perf_counter()
+            self.config = configparser.ConfigParser()
+            self.config_path = config_path
+            if self.config_path is not None:
+                self.config.read(self.config_path)
+            config_seconds = time.perf_counter() - config_started
+
+        except configparser.Error as e:
+            print(repr(e))
+            print(e)
+            sys.exit(1)
+
+        # Attach the quit message to the Window Manager close icon
+        self.protocol('WM_DELETE_WINDOW', self.send_appQuit_to_queue)
+
+        # Colors used by the GUI and bitmaps
+        # 'black'            #000000
+        # 'chocolate1'       #ff7f24
+        # 'darkorange4'      #8b4500
+        # 'dim gray'         #696969
+        # 'gray'             #bebebe
+        # 'gray24'           #3d3d3d
+        # 'gray90'           #e5e5e5
+        # 'lemon chiffon'    #fffacd
+        # 'light steel blue' #b0c4de
+        # 'firebrick3'       #cd2626
+        # 'seagreen1'        #54ff9f
+        # 'steel blue'       #4682b4
+        # 'steelblue2'       #5cacee
+        # 'steelblue3'       #4f94cd
+        # 'steelblue4'       #36648b
+        # 'white'            #ffffff
+
+        # Colors, Fonts, and Styles for the GUI
+        self.dbg = 'chocolate1'  #Default background
+        self.dfg = 'gray24'  #Default foreground
+        self.sbg = 'darkorange4'  #Selected background
+        self.sfg = 'lemon chiffon'  #Selected foreground
+
+        self.ps_style = ttk.Style()
+
+        self.ps_style.configure('TFrame', background='gray')
+
+        self.ps_style.configure('Root.TFrame', background='dim gray')
+
+        self.ps_style.configure('ActiveRegMode.TFrame',
+                                background='steelblue3')
+        self.ps_style.configure('ErrorRegMode.TFrame', background='firebrick3')
+        self.ps_style.configure('SetByAppMode.TFrame',
+                                background='steelblue2',
+                                borderwidth=-1)
+        self.ps_style.configure('SetByPSMode.TFrame',
+                                background='dim gray',
+                                borderwidth=-1)
+
+        self.ps_style.configure('CommMethod.TFrame',
+                                background='gray',
+                                borderwidth=-1,
+                                anchor='center',
+                                stick='nsew')
+
+        self.ps_style.configure('TLabel',
+                                anchor='center',
+                                sticky='nsew',
+                                foreground=self.dfg,
+                                background=self.dbg,
+                                borderwidth=-1)
+        self.ps_style.configure('FrameLabel.TLabel',
+                                foreground='steel blue',
+                                background='light steel blue',
+                                borderwidth=-1)
+
+        self.ps_style.configure('TButton',
+                                anchor='nw',
+                                sticky='nsew',
+                                foreground=self.dfg,
+                                background=self.dbg,
+                                padding=0,
+                                borderwidth=-1)
+        self.ps_style.map('TButton', background=[('active', self.sbg)])
+        self.ps_style.map('TButton', foreground=[('active', self.sfg)])
+
+        self.ps_style.configure('TCheckbutton',
+                                justify='center',
+                                foreground=self.dfg,
+                                background=self.dbg)
+
+        self.ps_style.map('TCheckbutton', background=[('active', self.sbg)])
+        self.ps_style.map('TCheckbutton', foreground=[('active', self.sfg)])
+
+        self.ps_style.configure('CommMethod.TRadiobutton',
+                                anchor='nw',
+                                sticky='nsew',
+                                foreground=self.dfg,
+                                background=self.dbg,
+                                padding=0,
+                                margin=0,
+                                borderwidth=-1,
+                                highlightthickness=-1)
+        self.ps_style.map('CommMethod.TRadiobutton',
+                          background=[('active', self.sbg)])
+        self.ps_style.map('CommMethod.TRadiobutton',
+                          foreground=[('active', self.sfg)])
+
+        self.ps_style.configure('TEntry',
+                                foreground=self.dfg,
+                                fieldbackground=self.dbg,
+                                selectbackground=self.sbg,
+                                selectforeground=self.sfg)
+
+        # End Colors, Fonts, and Styles for the GUI
+
+        self.root_frame = ttk.Frame(self,
+                                    width=self.root_width,
+                                    height=self.root_height,
+                                    style='Root.TFrame')
+        self.root_frame.grid(sticky='nsew')
+
+        # Commands for the PSU go straight onto the asyncio queue once
+        # attach_queue() has been called, and are held here until then
+        self.pending_commands = []
+        self.command_loop = None
+        self.command_queue = None
+
+        # Calls from the asyncio thread, run on the Tk thread by post()
+        self.posted_calls = queue.SimpleQueue()
+        self.bind('<<PostedCalls>>', self.run_posted_calls)
+
+        self.set_by_app = False
+        # When False the SetU and SetI displays won't show the displayed value
+        # even if the PS controls change the settings.  This allows the SetU
+        # and SetI controls on the Application to be independant of the PS.
+        # To reset to True (and display # the set values from the PS restore
+        # from the "PS" register in the Memory frame
+
+        # Hold the values polled from the power supply
+        self.polled_values = {}
+        self.polled_values['U'] = {}
+        self.polled_values['U']['last_polled_value'] = 0
+        self.polled_values['I'] = {}
+        self.polled_values['I']['last_polled_value'] = 0
+        self.polled_values['SetU'] = {}
+        self.polled_values['SetU']['last_polled_value'] = 0
+        self.polled_values['SetI'] = {}
+        self.polled_values['SetI']['last_polled_value'] = 0
+        self.polled_values['RunStop'] = {}
+        self.polled_values['RunStop'][
+            'last_polled_value'] = 0xFF  # Invalid value, forces update on GUI startup
+        self.polled_values['RegMode'] = {}
+        self.polled_values['RegMode'][
+            'last_polled_value'] = 0xFF  # Invalid value, forces update on GUI startup
+
+        # Every polled sample, for plots and statistics
+        self.history = SampleHistory()
+
+        # Charge and energy delivered, kept over restarts
+        self.energy = EnergyMeter(energy_path)
+
+        # Bitmaps, packed into atlases in assets/ and each decoded once.  The
+        # ImageSets decode an image the first time its key is used, so the
+        # rarely seen ones cost nothing at startup.
+        self.assets = AssetCache(self)
+
+        # bitmap images of digits passed to the 7SegmentDisplay objects
+        self.number_images = dict()
+        for size in ('l', 'm', 's'):
+            self.number_images[size] = dict()
+            for ordinal in ('d', 'nd'):
+                self.number_images[size][ordinal] = self.assets.digits(
+                    size, ordinal)
+
+        # GUI bitmaps
+        self.label_frame_images = ImageSet(
+            self.assets, {
+                'voltage': 'label-voltage',
+                'current': 'label-current',
+                'output': 'label-output',
+                'setvoltage': 'label-setvoltage',
+                'setcurrent': 'label-setcurrent',
+                'set': 'label-set',
+                'set_mode': 'label-set_mode',
+                'set_mode_blank': 'label-set_mode-blank',
+                'configuration': 'label-configuration',
+                'memory': 'label-memory'
+            })
+
+        self.label_status_images = ImageSet(
+            self.assets, {
+                'voltage-limited': 'status-voltagelimited',
+                'current-limited': 'status-currentlimited',
+                'hide-limited': 'status-hidelimited',
+                'ocp-u': 'status-ocp-u',
+                'ocp-i': 'status-ocp-i',
+                'outputoff': 'status-outputoff',
+                'outputon': 'status-outputon'
+            })
+
+        self.label_images = ImageSet(
+            self.assets, {
+                'comm': 'label-comm',
+                'ipaddr': 'label-ipaddr',
+                'port': 'label-port',
+                'v': 'label-v',
+                'i': 'label-i',
+                'ps': 'label-ps',
+                'm1': 'label-m1',
+                'm2': 'label-m2',
+                'm3': 'label-m3',
+                'm4': 'label-m4'
+            })
+
+        self.button_images = ImageSet(
+            self.assets, {
+                'arrow-up': 'button-arrow-up',
+                'arrow-down': 'button-arrow-down',
+                'mem-store': 'button-store',
+                'mem-recall': 'button-recall',
+                'mem-recall-setfromapp': 'button-recall-setfromapp',
+                'button-conn': 'button-conn',
+                'button-disconn': 'button-disconn',
+                'button-save': 'button-save',
+                'button-quit': 'button-quit',
+                'button-find': 'button-find',
+                'button-apply': 'button-apply',
+                'button-run': 'button-run',
+                'button-stop': 'button-stop'
+            })
+
+        self.radiobutton_images = ImageSet(self.assets, {
+            'serial': 'radiobutton-serial',
+            'network': 'radiobutton-network'
+        })
+
+        self.checkbutton_images = ImageSet(
+            self.assets, {
+                'off-before-change': 'checkbutton-outputoffbeforechange',
+                'on-after-change': 'checkbutton-outputonafterchange'
+            })
+
+        # Labels given their image the first time they are shown, see
+        # show_deferred_images()
+        self.deferred_images = dict()
+
+        # (widget, text) of the tooltips made by attach_tooltips()
+        self.tooltips = []
+
+        # Root dictionary for all the elements of the visible frames and widgets
+        self.frames = {}
+
+        # Create and place the 10 major frames for the App
+        # The names of the sections come from the ModBus programming guide for the PS
+        # Except for 'SetMode' which is necessary to allow the GUI independant control
+        # Of the SetU and SetI displays.
+        self.frames['U'] = {}
+        self.frames['U']['frame'] = ttk.Frame(self.root_frame)
+        self.frames['U']['frame'].place(width=260, height=150, x=35, y=25)
+        self.frames['I'] = {}
+        self.frames['I']['frame'] = ttk.Frame(self.root_frame)
+        self.frames['I']['frame'].place(width=260, height=150, x=350, y=25)
+        self.frames['RS'] = {}
+        self.frames['RS']['frame'] = ttk.Frame(self.root_frame)
+        self.frames['RS']['frame'].place(width=135, height=150, x=630, y=25)
+        self.frames['SetU'] = {}
+        self.frames['SetU']['frame'] = ttk.Frame(self.root_frame)
+        self.frames['SetU']['frame'].place(width=203, height=170, x=66, y=190)
+        self.frames['SetI'] = {}
+        self.frames['SetI']['frame'] = ttk.Frame(self.root_frame)
+        self.frames['SetI']['frame'].place(width=203, height=170, x=381, y=190)
+        self.frames['SetMode'] = {}
+        self.frames['SetMode']['frame'] = ttk.Frame(self.root_frame,
+                                                    style='SetByPSMode.TFrame')
+        self.frames['SetMode']['frame'].place(width=112,
+                                              height=80,
+                                              x=269,
+                                              y=230)
+        self.frames['SetCmd'] = {}
+        self.frames['SetCmd']['frame'] = ttk.Frame(self.root_frame)
+        self.frames['SetCmd']['frame'].place(width=135,
+                                             height=170,
+                                             x=630,
+                                             y=190)
+        self.frames['Config'] = {}
+        self.frames['Config']['frame'] = ttk.Frame(self.root_frame)
+        self.frames['Config']['frame'].place(width=260,
+                                             height=200,
+                                             x=35,
+                                             y=375)
+
+        self.frames['Mem'] = {}
+        self.frames['Mem']['frame'] = ttk.Frame(self.root_frame)
+        self.frames['Mem']['frame'].place(width=415, height=200, x=350, y=375)
+
+        self.frames['Trend'] = {}
+        self.frames['Trend']['frame'] = ttk.Frame(self.root_frame)
+        self.frames['Trend']['frame'].place(width=730, height=170, x=35, y=590)
+
+        ####   ===============================================================
+
+        # The 'U' frame shows the voltage currently being delivered by the PS
+        # shorthand for clarity of code
+        pt = self.frames['U']
+        fpt = pt['frame']
+
+        ttk.Label(fpt,
+                  image=self.label_frame_images['voltage'],
+                  style='FrameLabel.TLabel').place(anchor='n', x=130, y=8)
+
+        # 'U' Display
+        pt['display'] = SevenSegmentModule(
+            fpt,
+            height=80,
+            width=56,
+            images_dp=self.number_images['l']['d'],
+            images_ndp=self.number_images['l']['nd'],
+            max_value=PSU.RawLimits.VOLTAGE)
+        pt['display'].place(anchor='center', x=130, y=75)
+
+        pt['subframes'] = {}
+
+        pt['subframes']['voltage-limited'] = ttk.Frame(fpt,
+                                                       width=244,
+                                                       height=18)
+        ttk.Label(pt['subframes']['voltage-limited'],
+                  image=self.label_status_images['voltage-limited']).pack()
+        pt['subframes']['voltage-limited'].place(anchor='s', x=130, y=140)
+
+        pt['subframes']['hide-limited'] = ttk.Frame(fpt, width=244, height=18)
+        ttk.Label(pt['subframes']['hide-limited'],
+                  image=self.label_status_images['hide-limited']).pack()
+        pt['subframes']['hide-limited'].place(anchor='s', x=130, y=140)
+
+        pt['subframes']['ocp'] = ttk.Frame(fpt, width=244, height=18)
+        label = ttk.Label(pt['subframes']['ocp'])
+        label.pack()
+        self.defer_image(pt['subframes']['ocp'], label,
+                         self.label_status_images, 'ocp-u')
+        pt['subframes']['ocp'].place(anchor='s', x=130, y=140)
+
+        ####   ===============================================================
+
+        # The 'I' frame shows the current presently being delivered by the PS
+        # shorthand for clarity of code
+        pt = self.frames['I']
+        fpt = pt['frame']
+
+        ttk.Label(fpt,
+                  image=self.label_frame_images['current'],
+                  style='FrameLabel.TLabel').place(anchor='n', x=130, y=8)
+
+        # 'I' Display
+        pt['display'] = SevenSegmentModule(
+            fpt,
+            height=80,
+            width=56,
+            images_dp=self.number_images['l']['d'],
+            images_ndp=self.number_images['l']['nd'],
+            max_value=PSU.RawLimits.CURRENT)
+        pt['display'].place(anchor='center', x=130, y=75)
+
+        pt['subframes'] = {}
+
+        pt['subframes']['current-limited'] = ttk.Frame(fpt,
+                                                       width=244,
+                                                       height=18)
+        ttk.Label(pt['subframes']['current-limited'],
+                  image=self.label_status_images['current-limited']).pack()
+        pt['subframes']['current-limited'].place(anchor='s', x=130, y=140)
+
+        pt['subframes']['hide-limited'] = ttk.Frame(fpt, width=244, height=18)
+        ttk.Label(pt['subframes']['hide-limited'],
+                  image=self.label_status_images['hide-limited']).pack()
+        pt['subframes']['hide-limited'].place(anchor='s', x=130, y=140)
+
+        pt['subframes']['ocp'] = ttk.Frame(fpt, width=244, height=18)
+        label = ttk.Label(pt['subframes']['ocp'])
+        label.pack()
+        self.defer_image(pt['subframes']['ocp'], label,
+                         self.label_status_images, 'ocp-i')
+        pt['subframes']['ocp'].place(anchor='s', x=130, y=140)
+
+        ####   ===============================================================
+
+        # The Run/Stop (aka RunStop or RS) frame provides the controls for turning the PS output on/off
+        # shorthand for clarity of code
+        pt = self.frames['RS']
+        fpt = pt['frame']
+
+        ttk.Label(fpt,
+                  image=self.label_frame_images['output'],
+                  style='FrameLabel.TLabel').place(anchor='n', x=67, y=10)
+
+        pt['run_stop_button'] = ttk.Button(
+            fpt,
+            image=self.button_images['button-run'],
+            command=self.send_toggleRS_to_queue)
+
+        pt['run_stop_button'].place(anchor='center',
+                                    x=67,
+                                    y=75,
+                                    width=96,
+                                    height=38)
+
+        pt['subframes'] = {}
+
+        pt['subframes']['outputoff'] = ttk.Frame(fpt, width=100, height=20)
+        pt['subframes']['outputoff'].place(anchor='s', x=67, y=140)
+        ttk.Label(pt['subframes']['outputoff'],
+                  image=self.label_status_images['outputoff']).pack()
+
+        pt['subframes']['outputon'] = ttk.Frame(fpt, width=100, height=20)
+        pt['subframes']['outputon'].place(anchor='s', x=67, y=140)
+        ttk.Label(pt['subframes']['outputon'],
+                  image=self.label_status_images['outputon']).pack()
+
+        ####   ===============================================================
+
+        # The 'SetU' frame shows the present Voltage Limit set point
+
+        # shorthand for clarity of code
+        pt = self.frames['SetU']
+        fpt = pt['frame']
+
+        ttk.Label(fpt,
+                  image=self.label_frame_images['setvoltage'],
+                  style='FrameLabel.TLabel').pack(side='top', pady=8)
+
+        # 'SetU' Display
+        pt['display'] = SevenSegmentModule(
+            fpt,
+            height=58,
+            width=40,
+            images_dp=self.number_images['m']['d'],
+            images_ndp=self.number_images['m']['nd'],
+            max_value=PSU.RawLimits.VOLTAGE)
+        pt['display'].place(anchor='center', x=102, y=70)
+
+        # 3 Up Buttons display for 'SetU'
+        pt['digits_up_buttons'] = []
+        # Button for ones position
+        pt['digits_up_buttons'].append(
+            ttk.Button(fpt,
+                       image=self.button_images['arrow-up'],
+                       command=self.inc_setu_by_one))
+        pt['digits_up_buttons'][-1].place(x=82,
+                                          y=120,
+                                          width=32,
+                                          height=22,
+                                          anchor='center')
+        # Button for tenths
+        pt['digits_up_buttons'].append(
+            ttk.Button(fpt,
+                       image=self.button_images['arrow-up'],
+                       command=self.inc_setu_by_tenth))
+        pt['digits_up_buttons'][-1].place(x=122,
+                                          y=120,
+                                          width=32,
+                                          height=22,
+                                          anchor='center')
+        # Button for hundreths
+        pt['digits_up_buttons'].append(
+            ttk.Button(fpt,
+                       image=self.button_images['arrow-up'],
+                       command=self.inc_setu_by_hundreth))
+        pt['digits_up_buttons'][-1].place(x=162,
+                                          y=120,
+                                          width=32,
+                                          height=22,
+                                          anchor='center')
+
+        # 3 Down Buttons display for 'SetU'
+        pt['digits_down_buttons'] = []
+        # Button for ones position
+        pt['digits_down_buttons'].append(
+            ttk.Button(fpt,
+                       image=self.button_images['arrow-down'],
+                       command=self.dec_setu_by_one))
+        pt['digits_down_buttons'][-1].place(x=82,
+                                            y=150,
+                                            width=32,
+                                            height=22,
+                                            anchor='center')
+        # Button for tenths
+        pt['digits_down_buttons'].append(
+            ttk.Button(fpt,
+                       image=self.button_images['arrow-down'],
+                       command=self.dec_setu_by_tenth))
+        pt['digits_down_buttons'][-1].place(x=122,
+                                            y=150,
+                                            width=32,
+                                            height=22,
+                                            anchor='center')
+        # Button for hundreths
+        pt['digits_down_buttons'].append(
+            ttk.Button(fpt,
+                       image=self.button_images['arrow-down'],
+                       command=self.dec_setu_by_hundreth))
+        pt['digits_down_buttons'][-1].place(x=162,
+                                            y=150,
+                                            width=32,
+                                            height=22,
+                                            anchor='center')
+
+        ####   ===============================================================
+
+        # The 'SetI' frame shows the present Current Limit set point
+        # shorthand for clarity of code
+        pt = self.frames['SetI']
+        fpt = pt['frame']
+
+        ttk.Label(fpt,
+                  image=self.label_frame_images['setcurrent'],
+                  style='FrameLabel.TLabel').pack(side='top', pady=8)
+
+        # 'SetI' Display
+        pt['display'] = SevenSegmentModule(
+            fpt,
+            height=58,
+            width=40,
+            images_dp=self.number_images['m']['d'],
+            images_ndp=self.number_images['m']['nd'],
+            max_value=PSU.RawLimits.CURRENT)
+        pt['display'].place(anchor='center', x=102, y=70)
+
+        # 3 Up Buttons display for 'SetI'
+        pt['digits_up_buttons'] = []
+        # Button for ones position
+        pt['digits_up_buttons'].append(
+            ttk.Button(fpt,
+                       image=self.button_images['arrow-up'],
+                       command=self.inc_seti_by_one))
+        pt['digits_up_buttons'][-1].place(x=82,
+                                          y=120,
+                                          width=32,
+                                          height=22,
+                                          anchor='center')
+        # Button for tenths
+        pt['digits_up_buttons'].append(
+            ttk.Button(fpt,
+                       image=self.button_images['arrow-up'],
+                       command=self.inc_seti_by_tenth))
+        pt['digits_up_buttons'][-1].place(x=122,
+                                          y=120,
+                                          width=32,
+                                          height=22,
+                                          anchor='center')
+        # Button for hundreths
+        pt['digits_up_buttons'].append(
+            ttk.Button(fpt,
+                       image=self.button_images['arrow-up'],
+                       command=self.inc_seti_by_hundreth))
+        pt['digits_up_buttons'][-1].place(x=162,
+                                          y=120,
+                                          width=32,
+                                          height=22,
+                                          anchor='center')
+
+        # 3 Down Buttons display for 'SetI'
+        pt['digits_down_buttons'] = []
+        # Button for ones position
+        pt['digits_down_buttons'].append(
+            ttk.Button(fpt,
+                       image=self.button_images['arrow-down'],
+                       command=self.dec_seti_by_one))
+        pt['digits_down_buttons'][-1].place(x=82,
+                                            y=150,
+                                            width=32,
+                                            height=22,
+                                            anchor='center')
+        # Button for tenths
+        pt['digits_down_buttons'].append(
+            ttk.Button(fpt,
+                       image=self.button_images['arrow-down'],
+                       command=self.dec_seti_by_tenth))
+        pt['digits_down_buttons'][-1].place(x=122,
+                                            y=150,
+                                            width=32,
+                                            height=22,
+                                            anchor='center')
+        # Button for hundreths
+        pt['digits_down_buttons'].append(
+            ttk.Button(fpt,
+                       image=self.button_images['arrow-down'],
+                       command=self.dec_seti_by_hundreth))
+        pt['digits_down_buttons'][-1].place(x=162,
+                                            y=150,
+                                            width=32,
+                                            height=22,
+                                            anchor='center')
+
+        ####   ===============================================================
+        # SetMode frame contains the label widgets that will appear when the
+        # SetU and SetI frames are reflecting local application values and
+        # are not being read from the PS
+        # See comments for self.set_by_app Boolean
+
+        pt = self.frames['SetMode']
+        fpt = pt['frame']
+
+        pt['subframes'] = {}
+
+        pt['subframes']['app_mode'] = ttk.Frame(fpt,
+                                                width=112,
+                                                height=80,
+                                                style='SetByAppMode.TFrame')
+        pt['subframes']['app_mode'].place(x=7, y=0)
+        pt['notice'] = ttk.Label(pt['subframes']['app_mode'],
+                                 image=self.label_frame_images['set_mode'])
+        pt['notice'].pack()
+
+        pt['subframes']['ps_mode'] = ttk.Frame(fpt,
+                                               width=112,
+                                               height=80,
+                                               style='SetByPSMode.TFrame')
+        pt['subframes']['ps_mode'].place(x=7, y=0)
+        pt['notice'] = ttk.Label(
+            pt['subframes']['ps_mode'],
+            image=self.label_frame_images['set_mode_blank'])
+        pt['notice'].pack()
+
+        ####   ===============================================================
+        # SetCmd frame contains the controls for pushing the values of SetU and SetI to
+        # be the active U and I for the power supply.
+
+        pt = self.frames['SetCmd']
+        fpt = pt['frame']
+
+        ttk.Label(fpt,
+                  image=self.label_frame_images['set'],
+                  style='FrameLabel.TLabel').place(anchor='n', x=68, y=8)
+
+        pt['off_before_change'] = tk.BooleanVar()
+        try:
+            self.config['set']
+            pt['off_before_change'].set(self.config['set'].get(
+                'output_off_before_change', False))
+        except KeyError:
+            pt['off_before_change'].set(False)
+
+        pt['off_before_change_checkbutton'] = ttk.Checkbutton(
+            fpt,
+            image=self.checkbutton_images['off-before-change'],
+            variable=pt['off_before_change'])
+        pt['off_before_change_checkbutton'].place(anchor='n',
+                                                  x=68,
+                                                  y=40,
+                                                  width=110,
+                                                  height=35)
+
+        pt['on_after_change'] = tk.BooleanVar()
+        try:
+            self.config['set']
+            pt['on_after_change'].set(self.config['set'].get(
+                'output_on_after_change', False))
+        except KeyError:
+            pt['on_after_change'].set(False)
+
+        pt['on_after_change_checkbutton'] = ttk.Checkbutton(
+            fpt,
+            image=self.checkbutton_images['on-after-change'],
+            variable=pt['on_after_change'])
+        pt['on_after_change_checkbutton'].place(anchor='n',
+                                                x=68,
+                                                y=85,
+                                                width=110,
+                                                height=35)
+        pt['apply_button'] = ttk.Button(
+            fpt,
+            image=self.button_images['button-apply'],
+            command=self.send_applySet_to_queue)
+        pt['apply_button'].place(anchor='s', x=68, y=160, width=60, height=30)
+
+        ####   ===============================================================
+
+        # Config Frame
+
+        # The configuration frame has multiple communication methods ('serial' and 'network')
+        # The PS3010EC as shipped by Longwei is serial only.  'network' reaches it through
+        # an Ethernet to RS-485 gateway using Modbus TCP or RTU over TCP framing
+        # The framing is set by 'framing' ('tcp' or 'rtu') in the config file
+
+        pt = self.frames['Config']
+        fpt = pt['frame']
+
+        # 'disconnected', 'connecting' or 'connected', set from the asyncio
+        # side through update_connection_status_display()
+        pt['connection_status'] = 'disconnected'
+
+        # Place the frame label
+        ttk.Label(fpt,
+                  image=self.label_frame_images['configuration'],
+                  style='FrameLabel.TLabel').place(x=130,
+                                                   y=19,
+                                                   anchor='center')
+
+        pt['comm_method_text'] = tk.StringVar()
+        try:
+            pt['comm_method_text'].set(self.config['communication'].get(
+                'method', 'Serial'))
+        except KeyError:
+            pt['comm_method_text'].set('Serial')
+        pt['comm_method_buttons'] = []
+        for image, value, x in ((self.radiobutton_images['serial'], 'Serial',
+                                 52), (self.radiobutton_images['network'],
+                                       'Network', 208)):
+            pt['comm_method_buttons'].append(
+                ttk.Radiobutton(fpt,
+                                image=image,
+                                value=value,
+                                variable=pt['comm_method_text'],
+                                style='CommMethod.TRadiobutton',
+                                command=self.raise_command_method_frame))
+            pt['comm_method_buttons'][-1].place(x=x,
+                                                y=50,
+                                                anchor='center',
+                                                width=76,
+                                                height=18)
+
+        # create subframes for different comm methods
+        #    These frame will be swapped in and out depending on the button selection
+        pt['subframes'] = {}
+        for method in ('serial', 'network'):
+            pt['subframes'][method] = ttk.Frame(fpt,
+                                                width=234,
+                                                height=50,
+                                                style='CommMethod.TFrame')
+            pt['subframes'][method].place(x=130, y=95, anchor='center')
+
+        ttk.Label(pt['subframes']['serial'],
+                  image=self.label_images['comm'],
+                  style='FrameLabel.TLabel').place(x=0, y=10, anchor='w')
+        pt['comm_text_box'] = ttk.Entry(pt['subframes']['serial'], width=24)
+        pt['comm_text_box'].place(x=234, y=10, anchor='e')
+        try:
+            pt['comm_text_box'].insert(
+                tk.INSERT,
+                self.config['communication'].get('comm', '/dev/ttyUSB0'))
+        except KeyError:
+            pt['comm_text_box'].insert(tk.INSERT, '/dev/ttyUSB0')
+
+        label = ttk.Label(pt['subframes']['network'],
+                          style='FrameLabel.TLabel')
+        label.place(x=0, y=10, anchor='w')
+        self.defer_image(pt['subframes']['network'], label, self.label_images,
+                         'ipaddr')
+        pt['ipaddr_text_box'] = ttk.Entry(pt['subframes']['network'], width=24)
+        pt['ipaddr_text_box'].place(x=234, y=10, anchor='e')
+        try:
+            pt['ipaddr_text_box'].insert(
+                tk.INSERT,
+                self.config['communication'].get('ipaddr', '127.0.0.1'))
+        except KeyError:
+            pt['ipaddr_text_box'].insert(tk.INSERT, '127.0.0.1')
+
+        label = ttk.Label(pt['subframes']['network'],
+                          style='FrameLabel.TLabel')
+        label.place(x=0, y=40, anchor='w')
+        self.defer_image(pt['subframes']['network'], label, self.label_images,
+                         'port')
+        pt['port_text_box'] = ttk.Entry(pt['subframes']['network'], width=24)
+        pt['port_text_box'].place(x=234, y=40, anchor='e')
+        try:
+            pt['port_text_box'].insert(
+                tk.INSERT, self.config['communication'].get('port', '502'))
+        except KeyError:
+            pt['port_text_box'].insert(tk.INSERT, '502')
+
+        self.raise_command_method_frame(
+        )  # Make the serial frame the default shown
+
+        pt['connection_text'] = tk.StringVar(value='Not connected')
+        ttk.Label(fpt,
+                  textvariable=pt['connection_text'],
+                  style='FrameLabel.TLabel').place(x=10, y=140, anchor='w')
+
+        pt['connect_button'] = ttk.Button(
+            fpt,
+            image=self.button_images['button-conn'],
+            command=self.send_connect_to_queue)
+        pt['connect_button'].place(x=248,
+                                   y=140,
+                                   height=30,
+                                   width=60,
+                                   anchor='e')
+
+        pt['quit_button'] = ttk.Button(fpt,
+                                       image=self.button_images['button-quit'],
+                                       command=self.send_appQuit_to_queue)
+        pt['quit_button'].place(x=10, y=175, height=30, width=60, anchor='w')
+
+        pt['save_config_button'] = ttk.Button(
+            fpt,
+            image=self.button_images['button-save'],
+            command=self.update_and_write_config_file)
+        pt['save_config_button'].place(x=248,
+                                       y=175,
+                                       height=30,
+                                       width=60,
+                                       anchor='e')
+
+        # pt['find_button'] = ttk.Button(fpt,
+        #                                image=self.button_images['button-find'],
+        #                                command=lambda: self.root_frame.quit())
+        # pt['find_button'].place(x=130,
+        #                         y=175,
+        #                         height=30,
+        #                         width=60,
+        #                         anchor='center')
+
+        ####   ===============================================================
+
+        # Memory Registers Frame
+        pt = self.frames['Mem']
+        fpt = pt['frame']
+        pt['registers'] = []
+        rpt = pt['registers']
+
+        # Fixed labels in frame
+        ttk.Label(fpt,
+                  image=self.label_frame_images['memory'],
+                  style='FrameLabel.TLabel').place(x=206,
+                                                   y=19,
+                                                   anchor='center')
+
+        ttk.Label(fpt,
+                  image=self.label_images['v'],
+                  style='MemoryLabel.TLabel').place(x=22,
+                                                    y=80,
+                                                    width=15,
+                                                    anchor='center')
+        ttk.Label(fpt,
+                  image=self.label_images['i'],
+                  style='MemoryLabel.TLabel').place(x=22,
+                                                    y=110,
+                                                    width=15,
+                                                    anchor='center')
+
+        # Create the memories columns.
+        # Tuple contains index and frame relative pixel X location
+        for i, x in ((0, 62), (1, 135), (2, 208), (3, 281), (4, 354)):
+            # Place the memory number label ("PS" and 1-4)
+            if i == 0:
+                ttk.Label(fpt,
+                          image=self.label_images['ps'],
+                          style='MemoryLabel.TLabel').place(x=x,
+                                                            y=50,
+                                                            anchor='center')
+            if i >= 1:
+                ttk.Label(fpt,
+                          image=self.label_images[f'm{i}'],
+                          style='FrameLabel.TLabel').place(x=x,
+                                                           y=50,
+                                                           anchor='center')
+
+            rpt.append(dict())  # Dictionary under each 'registers' instance
+
+            # Memory register 'U' value
+            rpt[-1]['U'] = {}
+            rpt[-1]['U']['display'] = SevenSegmentModule(
+                fpt,
+                height=20,
+                width=14,
+                images_dp=self.number_images['s']['d'],
+                images_ndp=self.number_images['s']['nd'],
+                max_value=PSU.RawLimits.VOLTAGE)
+            rpt[-1]['U']['display'].place(anchor='center', x=x, y=80)
+
+            # Memory register 'I' value
+            rpt[-1]['I'] = {}
+            rpt[-1]['I']['display'] = SevenSegmentModule(
+                fpt,
+                height=20,
+                width=14,
+                images_dp=self.number_images['s']['d'],
+                images_ndp=self.number_images['s']['nd'],
+                max_value=PSU.RawLimits.CURRENT)
+            rpt[-1]['I']['display'].place(anchor='center', x=x, y=110)
+
+            # if this is a configurable memory register add the value from the config file
+            if i >= 1:
+                try:
+                    rpt[-1]['U']['display'].value = int(
+                        self.config['memory_registers'].get(f"memory_{i}_u"))
+                    rpt[-1]['I']['display'].value = int(
+                        self.config['memory_registers'].get(f"memory_{i}_i"))
+                except KeyError:
+                    pass
+
+            # Recall Button from memory to Set Windows
+            if i >= 1:
+                rpt[-1]['rcl_button'] = ttk.Button(
+                    fpt,
+                    image=self.button_images['mem-recall'],
+                    command=eval(f"self.memRecall{i}"))
+                self.add_tooltip(rpt[-1]['rcl_button'],
+                                 "Recall memory values to Set Windows")
+                rpt[-1]['rcl_button'].place(x=x,
+                                            y=140,
+                                            width=40,
+                                            height=20,
+                                            anchor='center')
+            elif i == 0:
+                rpt[-1]['rcl_button'] = ttk.Button(
+                    fpt,
+                    image=self.button_images['mem-recall'],
+                    command=eval(f"self.memRecall{i}"))
+                self.add_tooltip(
+                    rpt[-1]['rcl_button'],
+                    "Recall PS settings to Set Windows and end set_by_app mode")
+                rpt[-1]['rcl_button'].place(x=x,
+                                            y=140,
+                                            width=40,
+                                            height=20,
+                                            anchor='center')
+
+            # Store Button to memory from Set Windows
+            if i >= 1:
+                rpt[-1]['sto_button'] = ttk.Button(
+                    fpt,
+                    image=self.button_images['mem-store'],
+                    command=eval(f"self.memStore{i}"))
+                self.add_tooltip(rpt[-1]['sto_button'],
+                                 "Store values from Set Windows to memory")
+                rpt[-1]['sto_button'].place(x=x,
+                                            y=170,
+                                            width=40,
+                                            height=20,
+                                            anchor='center')
+
+        ####   ===============================================================
+
+        # The 'Trend' frame plots the delivered voltage and current history
+        pt = self.frames['Trend']
+        fpt = pt['frame']
+
+        pt['chart'] = TrendChartModule(
+            fpt,
+            height=130,
+            width=710,
+            series=({
+                'column': 'u',
+                'full_scale': PSU.RawLimits.VOLTAGE,
+                'color': 'chocolate1',
+                'label': f"U 0-{PSU.RawLimits.VOLTAGE // 100} V"
+            }, {
+                'column': 'i',
+                'full_scale': PSU.RawLimits.CURRENT,
+                'color': 'steelblue2',
+                'label': f"I 0-{PSU.RawLimits.CURRENT / 100:g} A"
+            }))
+        pt['chart'].place(anchor='center', x=365, y=75)
+
+        # Charge and energy delivered while the output is on
+        pt['energy_text'] = tk.StringVar()
+        ttk.Label(fpt, textvariable=pt['energy_text'],
+                  style='FrameLabel.TLabel').place(x=10, y=155, anchor='w')
+        pt['energy_reset_button'] = ttk.Button(fpt,
+                                               text='Reset',
+                                               command=self.reset_energy)
+        self.add_tooltip(pt['energy_reset_button'],
+                         "Reset the charge and energy totals")
+        pt['energy_reset_button'].place(x=720,
+                                        y=155,
+                                        width=60,
+                                        height=20,
+                                        anchor='e')
+        self.update_energy_display()
+
+        self.after_idle(self.attach_tooltips)
+
+        # Seconds spent building the window, for --profile-startup
+        assets_seconds = self.assets.stats['seconds']
+        self.startup_times = {
+            'config': config_seconds,
+            'assets': assets_seconds,
+            'widgets': (time.perf_counter() - started - config_seconds -
+                        assets_seconds)
+        }
+
+####   ===============================================================
+####   All Frames Completed
+
+    def add_tooltip(self, widget, text):
+        """Show text in a balloon over widget once attach_tooltips() has run"""
+        self.tooltips.append((widget, text))
+
+    def attach_tooltips(self):
+        """Create the tooltip balloons
+
+        Run after the window is drawn, as importing ttkwidgets takes longer
+        than building the rest of the window
+        """
+        self.update_idletasks()
+        started = time.perf_counter()
+        from ttkwidgets.frames import Tooltip
+        for widget, text in self.tooltips:
+            Tooltip(widget, text=text)
+        self.tooltips.clear()
+        self.startup_times['tooltips'] = time.perf_counter() - started
+
+    def post(self, function, *args):
+        """Run function(*args) on the Tk thread, from any thread"""
+        self.posted_calls.put((function, args))
+        try:
+            self.event_generate('<<PostedCalls>>', when='tail')
+        except (RuntimeError, tk.TclError):
+            pass  # The window has closed
+
+    def run_posted_calls(self, event=None):
+        while True:
+            try:
+                function, args = self.posted_calls.get_nowait()
+            except queue.Empty:
+                return
+            function(*args)
+
+    def update_last_polled_value(self, polled_values, timestamp):
+        """Called from the asyncio thread, the values are shown by the Tk
+        thread"""
+        self.post(self.show_polled_values, polled_values, timestamp)
+
+    def show_polled_values(self, polled_values, timestamp):
+        """Update the GUI frames with the last polled values supplied
+
+        timestamp is the time.monotonic() of the poll, which the history and
+        energy totals use rather than the time the values are shown
+        """
+
+        # print(polled_values)
+        self.history.append(timestamp, polled_values)
+        self.energy.add(timestamp, polled_values)
+
+        SetU = polled_values[0]
+        SetI = polled_values[1]
+        U = polled_values[2]
+        I = polled_values[3]
+        RunStop = polled_values[4]
+        RegMode = polled_values[5]
+
+        if RegMode != self.polled_values['RegMode']['last_polled_value']:
+            self.polled_values['RegMode']['last_polled_value'] = RegMode
+            self.set_regulation_mode(RegMode)
+
+        if U != self.polled_values['U']['last_polled_value']:
+            self.polled_values['U']['last_polled_value'] = U
+            self.frames['U']['display'].value = U
+
+        if I != self.polled_values['I']['last_polled_value']:
+            self.polled_values['I']['last_polled_value'] = I
+            self.frames['I']['display'].value = I
+
+        # Only update the display from the polled values if not in local set mode
+        if self.set_by_app != True:
+            if SetU != self.polled_values['SetU']['last_polled_value']:
+                self.polled_values['SetU']['last_polled_value'] = SetU
+                self.frames['SetU']['display'].value = SetU
+
+            if SetI != self.polled_values['SetI']['last_polled_value']:
+                self.polled_values['SetI']['last_polled_value'] = SetI
+                self.frames['SetI']['display'].value = SetI
+
+        # "PS" memory register always displays polled value
+        self.frames['Mem']['registers'][0]['U']['display'].value = SetU
+        self.frames['Mem']['registers'][0]['I']['display'].value = SetI
+
+        if RegMode != self.polled_values['RunStop']['last_polled_value']:
+            self.polled_values['RunStop']['last_polled_value'] = RunStop
+            self.update_runstop_display()
+
+        self.frames['Trend']['chart'].update_chart(self.history)
+        self.update_energy_display()
+
+    def update_energy_display(self):
+        self.frames['Trend']['energy_text'].set(
+            f"{self.energy.ah:.4f} Ah   {self.energy.wh:.4f} Wh   "
+            f"{self.energy.elapsed()} output on   since {self.energy.since}")
+
+    def update_runstop_display(self):
+        "Update the runstop icons and power output status strings"
+        if self.polled_values['RunStop']['last_polled_value']:
+            self.frames['RS']['run_stop_button'].configure(
+                image=self.button_images['button-stop'])
+            self.frames['RS']['subframes']['outputon'].tkraise()
+        else:
+            self.frames['RS']['run_stop_button'].configure(
+                image=self.button_images['button-run'])
+            self.frames['RS']['subframes']['outputoff'].tkraise()
+
+    def update_connection_status_display(self, status, message):
+        """Update the connect/disconnect button and connection status text
+
+        Args:
+            * status (str): 'disconnected', 'connecting' or 'connected'
+            * message (str): Shown next to the button
+        """
+        self.frames['Config']['connection_status'] = status
+        self.frames['Config']['connection_text'].set(message)
+        # Disconnect also cancels a connection still being made
+        if status == 'disconnected':
+            self.frames['Config']['connect_button'].configure(
+                image=self.button_images['button-conn'])
+        else:
+            self.frames['Config']['connect_button'].configure(
+                image=self.button_images['button-disconn'])
+
+    def show_command_dropped(self, event):
+        """Tell the user a command was dropped, with too many waiting to be
+        sent"""
+        self.frames['Config']['connection_text'].set('Command dropped')
+
+    def set_set_by_app(self, set_by_app):
+        "Sets the set_by_app status strings and colors of SetU and SetI frames"
+
+        self.set_by_app = set_by_app
+
+        if self.set_by_app == True:
+            self.frames['SetU']['frame'].config(style='SetByAppMode.TFrame')
+            self.frames['SetI']['frame'].config(style='SetByAppMode.TFrame')
+            self.frames['SetMode']['subframes']['app_mode'].tkraise()
+            self.frames['Mem']['registers'][0]['rcl_button'].configure(
+                image=self.button_images['mem-recall-setfromapp'])
+
+        if self.set_by_app == False:
+            self.frames['SetU']['frame'].config(style='.TFrame')
+            self.frames['SetI']['frame'].config(style='.TFrame')
+            self.frames['SetMode']['subframes']['ps_mode'].tkraise()
+            self.frames['Mem']['registers'][0]['rcl_button'].configure(
+                image=self.button_images['mem-recall'])
+
+    def set_regulation_mode(self, RegMode):
+        "Raise the regulation mode status images and set colors of U and I frames"
+
+        #print(f"in set_regulation_mode().  RegMode: {RegMode}")
+
+        # Constant Current Mode
+        if RegMode == PSU.RegulationMode.CURRENT:
+            self.frames['I']['frame'].config(style='ActiveRegMode.TFrame')
+            self.frames['I']['subframes']['current-limited'].tkraise()
+            self.frames['U']['frame'].config(style='TFrame')
+            self.frames['U']['subframes']['hide-limited'].tkraise()
+
+        # Constant Voltage Mode
+        if RegMode == PSU.RegulationMode.VOLTAGE:
+            self.frames['U']['frame'].config(style='ActiveRegMode.TFrame')
+            self.frames['U']['subframes']['voltage-limited'].tkraise()
+            self.frames['I']['frame'].config(style='TFrame')
+            self.frames['I']['subframes']['hide-limited'].tkraise()
+
+        # Overcurrent Protection Active
+        if RegMode == PSU.RegulationMode.OVERCURRENT_PROTECTION:
+            self.show_deferred_images(self.frames['I']['subframes']['ocp'])
+            self.show_deferred_images(self.frames['U']['subframes']['ocp'])
+            self.frames['I']['frame'].config(style='ErrorRegMode.TFrame')
+            self.frames['I']['subframes']['ocp'].tkraise()
+            self.frames['U']['frame'].config(style='ErrorRegMode.TFrame')
+            self.frames['U']['subframes']['ocp'].tkraise()
+
+    def attach_queue(self, loop, q):
+        """Send commands to the asyncio queue q of the event loop loop
+
+        Runs on the Tk thread, like send_command(), so the pending commands
+        are handed over without a lock.  From the asyncio thread call it
+        through post().
+        """
+        self.command_loop = loop
+        self.command_queue = q
+        for event in self.pending_commands:
+            self.send_command(event)
+        self.pending_commands.clear()
+
+    def send_command(self, event):
+        """Puts an event on the asyncio queue, waking the dispatcher at once
+
+        Safe to call from a thread other than the one running the loop
+        """
+        if self.command_loop is None:
+            self.pending_commands.append(event)
+            return
+        self.command_loop.call_soon_threadsafe(self.command_queue.put_nowait,
+                                               event)
+
+    def send_applySet_to_queue(self):
+        """ Puts the message to apply set values to output onto the queue """
+        self.send_command(
+            ('applySet', (self.frames['SetU']['display'].value,
+                          self.frames['SetI']['display'].value,
+                          self.frames['SetCmd']['off_before_change'].get(),
+                          self.frames['SetCmd']['on_after_change'].get())))
+        self.set_set_by_app(False)
+
+    def send_toggleRS_to_queue(self):
+        """ Puts the message to toggleRS onto the queue """
+        self.send_command((
+            'toggleRS',
+            '',
+        ))
+        self.update_runstop_display()
+
+    def connection_settings(self):
+        """(method, comm, ipaddr, port, framing) from the Config frame, the
+        arguments of ps3010ec.create_psu"""
+        return (self.frames['Config']['comm_method_text'].get(),
+                self.frames['Config']['comm_text_box'].get(),
+                self.frames['Config']['ipaddr_text_box'].get(),
+                self.frames['Config']['port_text_box'].get(),
+                self.config.get('communication', 'framing', fallback='tcp'))
+
+    def send_connect_to_queue(self):
+        """ Puts the message to connect, or to disconnect, onto the queue """
+        if self.frames['Config']['connection_status'] == 'disconnected':
+            self.send_command(('connectPS', self.connection_settings()))
+            self.update_connection_status_display('connecting',
+                                                  'Connecting...')
+        else:
+            self.send_command(('disconnectPS', ''))
+
+    def send_appQuit_to_queue(self):
+        """ Puts the message to toggleRS onto the queue """
+        #print("in send_appQuit_to_queue()")
+        self.send_command((
+            'appQuit',
+            '',
+        ))
+        # Close anyway if the asyncio side is stuck, e.g. still connecting
+        self.after(3000, self.quit)
+
+    # Button Callbacks
+
+    def reset_energy(self):
+        self.energy.reset()
+        self.update_energy_display()
+
+    def update_and_write_config_file(self):
+        """ Write config file"""
+        for section in ('set', 'communication', 'memory_registers'):
+            try:
+                self.config[section]
+            except (configparser.NoSectionError, KeyError):
+                self.config[section] = dict()
+
+        self.config.set('set', 'output_off_before_change',
+                        f"{self.frames['SetCmd']['off_before_change'].get()}")
+        self.config.set('set', 'output_on_after_change',
+                        f"{self.frames['SetCmd']['on_after_change'].get()}")
+
+        self.config.set('communication', 'method',
+                        self.frames['Config']['comm_method_text'].get())
+        self.config.set('communication', 'comm',
+                        self.frames['Config']['comm_text_box'].get())
+        self.config.set('communication', 'ipaddr',
+                        self.frames['Config']['ipaddr_text_box'].get())
+        self.config.set('communication', 'port',
+                        self.frames['Config']['port_text_box'].get())
+        self.config.set('communication', 'framing',
+                        self.config['communication'].get('framing', 'tcp'))
+        #self.config.set('communication','comm', self.frames['Config']['comm_text_box'])
+
+        self.config.set(
+            'memory_registers', 'memory_1_u',
+            f"{self.frames['Mem']['registers'][1]['U']['display'].value:04}")
+        self.config.set(
+            'memory_registers', 'memory_1_i',
+            f"{self.frames['Mem']['registers'][1]['I']['display'].value:04}")
+        self.config.set(
+            'memory_registers', 'memory_2_u',
+            f"{self.frames['Mem']['registers'][2]['U']['display'].value:04}")
+        self.config.set(
+            'memory_registers', 'memory_2_i',
+            f"{self.frames['Mem']['registers'][2]['I']['display'].value:04}")
+        self.config.set(
+            'memory_registers', 'memory_3_u',
+            f"{self.frames['Mem']['registers'][3]['U']['display'].value:04}")
+        self.config.set(
+            'memory_registers', 'memory_3_i',
+            f"{self.frames['Mem']['registers'][3]['I']['display'].value:04}")
+        self.config.set(
+            'memory_registers', 'memory_4_u',
+            f"{self.frames['Mem']['registers'][4]['U']['display'].value:04}")
+        self.config.set(
+            'memory_registers', 'memory_4_i',
+            f"{self.frames['Mem']['registers'][4]['I']['display'].value:04}")
+
+        if self.config_path is None:
+            return
+        with open(self.config_path, 'w+') as configfile:
+            self.config.write(configfile)
+
+    def raise_command_method_frame(self):
+        """raises either the 'serial' or 'network' frame to a visible state"""
+        if self.frames['Config']['comm_method_text'].get() == 'Serial':
+            self.frames['Config']['subframes']['serial'].tkraise()
+        else:
+            self.show_deferred_images(
+                self.frames['Config']['subframes']['network'])
+            self.frames['Config']['subframes']['network'].tkraise()
+
+    def defer_image(self, parent, widget, images, key):
+        """Give widget the image images[key] when parent is first shown
+
+        Args:
+            * parent (widget): Frame passed to show_deferred_images()
+            * widget (widget): Label or button to configure
+            * images (ImageSet): Where the image is taken from
+            * key (str): Key of the image in images
+        """
+        self.deferred_images.setdefault(parent, []).append(
+            (widget, images, key))
+
+    def show_deferred_images(self, parent):
+        """Decode and configure the deferred images of the widgets in parent"""
+        for widget, images, key in self.deferred_images.pop(parent, ()):
+            widget.configure(image=images[key])
+
+    def inc_setu_by_one(self):
+        """Increment the SetU display by 1"""
+        self.frames['SetU']['display'] += 100
+        self.set_set_by_app(True)
+
+    def inc_setu_by_hundreth(self):
+        """Increment the SetU display by 0.01"""
+        self.frames['SetU']['display'] += 1
+        self.set_set_by_app(True)
+
+    def inc_setu_by_tenth(self):
+        """Increment the SetU display by 0.1"""
+        self.frames['SetU']['display'] += 10
+        self.set_set_by_app(True)
+
+    def dec_setu_by_one(self):
+        """Decrement the SetU display by 1"""
+        self.frames['SetU']['display'] -= 100
+        self.set_set_by_app(True)
+
+    def dec_setu_by_hundreth(self):
+        """Decrement the SetU display by 0.01"""
+        self.frames['SetU']['display'] -= 1
+        self.set_set_by_app(True)
+
+    def dec_setu_by_tenth(self):
+        """Decrement the SetU display by 0.1"""
+        self.frames['SetU']['display'] -= 10
+        self.set_set_by_app(True)
+
+    def inc_seti_by_one(self):
+        """Increment the SetI display by 1"""
+        self.frames['SetI']['display'] += 100
+        self.set_set_by_app(True)
+
+    def inc_seti_by_hundreth(self):
+        """Increment the SetI display by 0.01"""
+        self.frames['SetI']['display'] += 1
+        self.set_set_by_app(True)
+
+    def inc_seti_by_tenth(self):
+        """Increment the SetI display by 0.1"""
+        self.frames['SetI']['display'] += 10
+        self.set_set_by_app(True)
+
+    def dec_seti_by_one(self):
+        """Decrement the SetI display by 1"""
+        self.frames['SetI']['display'] -= 100
+        self.set_set_by_app(True)
+
+    def dec_seti_by_hundreth(self):
+        """Decrement the SetI display by 0.01"""
+        self.frames['SetI']['display'] -= 1
+        self.set_set_by_app(True)
+
+    def dec_seti_by_tenth(self):
+        """Decrement the SetI display by 0.1"""
+        self.frames['SetI']['display'] -= 10
+        self.set_set_by_app(True)
+
+    def memRecall1(self):
+        """Button callback.  Recall Memory 1"""
+        self.memRecall(1)
+
+    def memRecall2(self):
+        """Button callback.  Recall Memory 2"""
+        self.memRecall(2)
+
+    def memRecall3(self):
+        """Button callback.  Recall Memory 3"""
+        self.memRecall(3)
+
+    def memRecall4(self):
+        """Button callback.  Recall Memory 4"""
+        self.memRecall(4)
+
+    def memRecall0(self):
+        """Button callback.  Recall values from PS and make set_by_app = False"""
+        self.memRecall(0)
+
+    def memRecall(self, mem_id):
+        #print(f"in memRecall(), mem_id: {mem_id}")
+
+        self.frames['SetU']['display'].value = self.frames['Mem']['registers'][
+            mem_id]['U']['display'].value
+        self.frames['SetI']['display'].value = self.frames['Mem']['registers'][
+            mem_id]['I']['display'].value
+
+        if mem_id == 0:
+            self.set_set_by_app(False)
+
+    def memStore1(self):
+        """Button callback.  Store Memory 1"""
+        self.memStore(1)
+
+    def memStore2(self):
+        """Button callback.  Store Memory 2"""
+        self.memStore(2)
+
+    def memStore3(self):
+        """Button callback.  Store Memory 3"""
+        self.memStore(3)
+
+    def memStore4(self):
+        """Button callback.  Store Memory 4"""
+        self.memStore(4)
+
+    def memStore(self, mem_id):
+        #print(f"in memRecall(), mem_id: {mem_id}")
+
+        self.frames['Mem']['registers'][mem_id]['U'][
+            'display'].value = self.frames['SetU']['display'].value
+        self.frames['Mem']['registers'][mem_id]['I'][
+            'display'].value = self.frames['SetI']['display'].value
+
+
+#  End of App() Class
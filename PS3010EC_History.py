@@ -0,0 +1,97 @@
+"""Fixed capacity history of polled samples
+
+Each field is a contiguous NumPy column, and each sample is written twice,
+at i and i + capacity, so the newest capacity samples are always one slice
+of every column. Queries return views of those slices, never copies.
+"""
+
+import numpy as np
+
+
+class SampleHistory():
+    """Ring buffer of timestamp, SetU, SetI, U, I, RunStop and RegMode
+
+    Values are the raw registers, timestamps are time.monotonic().  Views
+    returned are only valid until capacity more samples have been appended.
+    """
+
+    COLUMNS = (('timestamp', 'f8'), ('set_u', 'u2'), ('set_i', 'u2'),
+               ('u', 'u2'), ('i', 'u2'), ('run_stop', 'u1'), ('reg_mode',
+                                                              'u1'))
+
+    def __init__(self, capacity=2**17):
+        """
+        Args:
+            * capacity (int): Samples kept, 2**17 holds over 3.5 hours at
+              10 Hz in 4 MB
+        """
+        self.capacity = capacity
+        self._columns = [
+            np.zeros(2 * capacity, dtype=dtype) for _, dtype in self.COLUMNS
+        ]
+        self._timestamps = self._columns[0]
+        self._next = 0  # Index the next sample is written to
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, timestamp, polled_values):
+        """Add a sample
+
+        Args:
+            * timestamp (float): time.monotonic() of the sample
+            * polled_values (sequence): Raw registers 0x1000-0x1005
+        """
+        first = self._next
+        second = first + self.capacity
+        self._timestamps[first] = self._timestamps[second] = timestamp
+        for column, value in zip(self._columns[1:], polled_values[:6]):
+            column[first] = column[second] = value
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def clear(self):
+        self._next = 0
+        self._count = 0
+
+    def _range(self, first, last):
+        """Column views of samples first to last, counted from the oldest"""
+        oldest = self._next + self.capacity - self._count
+        return {
+            name: column[oldest + first:oldest + last]
+            for (name, _), column in zip(self.COLUMNS, self._columns)
+        }
+
+    def view(self):
+        """All samples held, oldest first, as a dict of column arrays"""
+        return self._range(0, self._count)
+
+    def window(self, start=None, end=None):
+        """Samples with start <= timestamp < end, oldest first, as a dict of
+        column arrays
+
+        Args:
+            * start (float): Earliest timestamp, None for the oldest
+            * end (float): Timestamp after the last one, None for the newest
+        """
+        oldest = self._next + self.capacity - self._count
+        timestamps = self._timestamps[oldest:oldest + self._count]
+        first = 0 if start is None else int(
+            np.searchsorted(timestamps, start))
+        last = self._count if end is None else int(
+            np.searchsorted(timestamps, end))
+        return self._range(first, last)
+
+    def last(self, seconds):
+        """Samples from the newest one back over the given seconds"""
+        if self._count == 0:
+            return self.view()
+        return self.window(self.latest_timestamp - seconds)
+
+    @property
+    def latest_timestamp(self):
+        """Timestamp of the newest sample, None if empty"""
+        if self._count == 0:
+            return None
+        return float(self._timestamps[self._next + self.capacity - 1])
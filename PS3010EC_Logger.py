@@ -0,0 +1,200 @@
+"""Rotating on-disk log of every polled sample
+
+The event loop only appends each sample to a chunk; full chunks are handed
+over a bounded queue to a writer thread which formats, writes and rotates
+the files, so memory stays flat however long a soak test runs.  The writer
+also takes a part filled chunk once it is flush_interval old, so samples
+reach the disk even after polling stops.
+"""
+
+import atexit
+import os
+import queue
+import sys
+import threading
+import time
+
+
+class SampleLogger():
+    """Logs polled values with their monotonic and wall clock times
+
+    Files are CSV with the columns
+    monotonic,time,set_u,set_i,u,i,output,mode
+    and rotate as path, path.1 ... path.N once max_bytes is reached.
+
+    A chunk that cannot be written (disk full, directory removed) is counted
+    in stats['dropped'], the error in stats['errors'] and last_error, and
+    reported on standard error.  The writer carries on, opening the file
+    again for the next chunk.
+    """
+
+    HEADER = 'monotonic,time,set_u,set_i,u,i,output,mode\n'
+
+    def __init__(self,
+                 path,
+                 max_bytes=10 * 1024 * 1024,
+                 backups=10,
+                 chunk_size=256,
+                 flush_interval=1.0,
+                 max_chunks=64):
+        """
+        Args:
+            * path (str): Log file
+            * max_bytes (int): Size at which the log is rotated
+            * backups (int): Rotated files kept, the oldest is deleted
+            * chunk_size (int): Samples written together
+            * flush_interval (float): Seconds before a part filled chunk
+              is written anyway, bounding what a crash can lose
+            * max_chunks (int): Chunks waiting for the writer before new
+              ones are dropped, bounding memory if the disk stalls
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.chunk_size = chunk_size
+        self.flush_interval = flush_interval
+        self.stats = {
+            'logged': 0,
+            'written': 0,
+            'dropped': 0,
+            'rotations': 0,
+            'errors': 0
+        }
+        self.last_error = None
+
+        self._chunk = []
+        self._chunk_started = time.monotonic()
+        self._chunk_lock = threading.Lock()  # The writer takes stale chunks
+        self._queue = queue.Queue(maxsize=max_chunks)
+        self._file = None
+        self._writer = threading.Thread(target=self._write_chunks,
+                                        name='SampleLogger',
+                                        daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def log(self, timestamp, polled_values):
+        """Record one sample, never blocks
+
+        Args:
+            * timestamp (float): time.monotonic() of the poll
+            * polled_values (sequence): Raw registers 0x1000-0x1005
+        """
+        with self._chunk_lock:
+            if not self._chunk:
+                self._chunk_started = timestamp
+            self._chunk.append(
+                (timestamp, time.time(), tuple(polled_values[:6])))
+            self.stats['logged'] += 1
+            full = (len(self._chunk) >= self.chunk_size or
+                    timestamp - self._chunk_started >= self.flush_interval)
+
+        if full:
+            self.flush()
+
+    def _take_chunk(self):
+        with self._chunk_lock:
+            chunk, self._chunk = self._chunk, []
+        return chunk
+
+    def flush(self):
+        """Hand the samples collected so far to the writer thread"""
+        chunk = self._take_chunk()
+        if not chunk:
+            return
+        try:
+            self._queue.put_nowait(chunk)
+        except queue.Full:
+            self.stats['dropped'] += len(chunk)
+
+    def _flush_due(self):
+        """Seconds until the chunk being filled is due to be written"""
+        if not self._chunk:
+            return self.flush_interval
+        return max(
+            0.0,
+            self._chunk_started + self.flush_interval - time.monotonic())
+
+    def close(self):
+        """Write out everything logged and stop the writer thread"""
+        if not self._writer.is_alive():
+            return
+        self.flush()
+        self._queue.put(None)
+        self._writer.join()
+        atexit.unregister(self.close)
+
+    def _open(self):
+        self._file = open(self.path, 'a')
+        if self._file.tell() == 0:
+            self._file.write(self.HEADER)
+
+    def _close_file(self):
+        if self._file is None:
+            return
+        try:
+            self._file.close()
+        except OSError:
+            pass  # What was still buffered is lost with the failed chunk
+        self._file = None
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        for n in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{n}"):
+                os.replace(f"{self.path}.{n}", f"{self.path}.{n + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.stats['rotations'] += 1
+        self._open()
+
+    def _write_chunk(self, chunk):
+        """Write a chunk, opening or rotating the file first if need be"""
+        if self._file is None:
+            self._open()
+        elif self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+        lines = []
+        for monotonic, wall, values in chunk:
+            SetU, SetI, U, I, RunStop, RegMode = values
+            lines.append(f"{monotonic:.4f},{wall:.3f},{SetU / 100:.2f},"
+                         f"{SetI / 100:.2f},{U / 100:.2f},{I / 100:.2f},"
+                         f"{RunStop},{RegMode}\n")
+        self._file.write(''.join(lines))
+        self._file.flush()
+        self.stats['written'] += len(chunk)
+
+    def _write_chunks(self):
+        """Writer thread"""
+        failing = False
+        while True:
+            try:
+                chunk = self._queue.get(timeout=self._flush_due())
+            except queue.Empty:
+                # No sample has come to fill the chunk, e.g. polling has
+                # stopped, so write what there is
+                chunk = self._take_chunk()
+                if not chunk:
+                    continue
+            if chunk is None:
+                break
+
+            try:
+                self._write_chunk(chunk)
+                failing = False
+            except OSError as e:
+                self.stats['dropped'] += len(chunk)
+                self.stats['errors'] += 1
+                self.last_error = e
+                if not failing:
+                    # Once until a chunk is written again
+                    print(f'Sample log {self.path}: {e}, samples are being '
+                          f'dropped', file=sys.stderr)
+                failing = True
+                self._close_file()
+
+        self._close_file()
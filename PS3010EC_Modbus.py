@@ -1,13 +1,280 @@
-from serial.tools.list_ports import comports
-from serial import Serial, PARITY_NONE, STOPBITS_ONE, EIGHTBITS
-from pymodbus.client.sync import ModbusSerialClient
+import asyncio
+import configparser
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, asynccontextmanager
+from typing import NamedTuple
 from enum import Enum
 
+# pymodbus and pyserial are imported where they are first used, so the
+# register definitions can be imported, and the window shown, without
+# waiting for them to load
+
+
+# Application configuration directory, also holds the serial port cache
+CONFIG_DIR = os.path.join(os.path.expanduser('~'), '.config/ps3010ec')
+CONFIG_PATH = os.path.join(CONFIG_DIR, 'config.ini')
+PORT_CACHE_PATH = os.path.join(CONFIG_DIR, 'ports.ini')
+
+# USB serial adapters the supplies are known to use
+ADAPTER_IDS = {
+    "CH340": ("1A86", "7523"),
+    "FT232": ("0403", "6001")
+    # add other serial devices here if we find them
+}
+
+
+def tcp_framer(framing):
+    """pymodbus framer class for a network connection: 'tcp' for Modbus
+    TCP, or 'rtu' for RTU frames tunnelled through a transparent Ethernet to
+    RS-485 gateway"""
+    if framing == 'tcp':
+        from pymodbus.framer.socket_framer import ModbusSocketFramer
+        return ModbusSocketFramer
+    if framing == 'rtu':
+        from pymodbus.framer.rtu_framer import ModbusRtuFramer
+        return ModbusRtuFramer
+    raise PSU_Exception(f'Unknown network framing [{framing}]')
+
 
 class PSU_Exception(Exception):
     pass
 
 
+class RetryPolicy:
+    """Deadline policy for a single Modbus transaction
+
+    The first attempt waits first_timeout for a response.  A missing response
+    is retried up to retries times, each attempt waiting backoff times longer
+    than the one before (capped at max_timeout) after a pause that grows the
+    same way from retry_delay.  deadline is the longest a transaction can take.
+
+    A dropped frame then costs first_timeout instead of a fixed 5 s, and a
+    dead unit costs at most deadline before its CircuitBreaker opens.
+    """
+
+    def __init__(self,
+                 first_timeout=0.25,
+                 retries=2,
+                 backoff=2.0,
+                 max_timeout=2.0,
+                 retry_delay=0.05):
+        self.first_timeout = first_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_timeout = max_timeout
+        self.retry_delay = retry_delay
+
+    def timeout(self, attempt):
+        """Seconds to wait for a response on attempt 0, 1, 2..."""
+        return min(self.first_timeout * self.backoff**attempt,
+                   self.max_timeout)
+
+    def delay(self, attempt):
+        """Seconds to pause before retry attempt 1, 2..."""
+        return self.retry_delay * self.backoff**(attempt - 1)
+
+    @property
+    def attempts(self):
+        return self.retries + 1
+
+    @property
+    def deadline(self):
+        return sum(self.timeout(attempt) for attempt in range(self.attempts)) \
+            + sum(self.delay(attempt) for attempt in range(1, self.attempts))
+
+
+class CircuitBreaker:
+    """Stops sending to a unit that has stopped answering
+
+    After failure_threshold transactions in a row fail the breaker opens and
+    requests are refused at once, without touching the bus, for
+    reset_timeout seconds.  Then one trial request is let through: a
+    response closes the breaker, another failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=3, reset_timeout=5.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CircuitBreaker.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.opened_at = 0.0
+
+    @property
+    def is_open(self):
+        """True while requests would be refused"""
+        return (self.state == CircuitBreaker.OPEN and
+                time.monotonic() - self.opened_at < self.reset_timeout)
+
+    def allow(self):
+        """True if a request may be sent now"""
+        if self.state == CircuitBreaker.OPEN and not self.is_open:
+            self.state = CircuitBreaker.HALF_OPEN
+            return True
+        return self.state != CircuitBreaker.OPEN
+
+    def record_success(self):
+        self.state = CircuitBreaker.CLOSED
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if (self.state == CircuitBreaker.HALF_OPEN
+                or self.failures >= self.failure_threshold):
+            if self.state != CircuitBreaker.OPEN:
+                self.trips += 1
+            self.state = CircuitBreaker.OPEN
+            self.opened_at = time.monotonic()
+
+
+def _set_client_timeout(client, timeout):
+    """Change the response timeout of a pymodbus synchronous client"""
+    client.timeout = timeout
+    if client.socket is None:
+        return
+    if hasattr(client.socket, 'settimeout'):
+        client.socket.settimeout(timeout)
+    else:
+        client.socket.timeout = timeout
+
+
+def _no_delay_tcp_client(host, port, framer):
+    """pymodbus TCP client that disables Nagle's algorithm on every
+    (re)connection, so small request frames are not held back"""
+    from pymodbus.client.sync import ModbusTcpClient
+
+    class NoDelayTcpClient(ModbusTcpClient):
+
+        def connect(self):
+            if not super().connect():
+                return False
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            return True
+
+    return NoDelayTcpClient(host, port, framer=framer)
+
+
+# Open network connections shared by every PSU on the same gateway
+_tcp_pool = {}
+
+
+def pooled_tcp_client(host, port=502, framing='tcp'):
+    """Return the (client, lock) pair for a gateway, creating it on first use
+
+    The connection stays open between transactions and is shared by all the
+    supplies behind the gateway, so polling never pays for a reconnect.
+    """
+    key = (host, port, framing)
+    if key not in _tcp_pool:
+        _tcp_pool[key] = (_no_delay_tcp_client(host, port,
+                                               tcp_framer(framing)),
+                          threading.RLock())
+    return _tcp_pool[key]
+
+
+class Transaction:
+    """Register reads and writes queued to be sent in the fewest frames
+
+    Consecutive writes to neighbouring registers are merged into a single
+    Write Multiple Registers (FC16) frame and consecutive overlapping or
+    neighbouring reads into a single Read Holding Registers (FC3) frame.
+    The order of the queued operations is otherwise kept, so an output off
+    queued before new set points is still sent before them.
+
+    Reads return a Transaction.Result whose value is filled in when the
+    transaction is sent.  The frames that got no response, or an exception
+    response, are listed in errors as (start address, response) once sent.
+    Nothing after a write that failed is sent.
+    """
+
+    MAX_READ = 125  # Modbus limit of registers per FC3 frame
+    MAX_WRITE = 123  # Modbus limit of registers per FC16 frame
+
+    class Result():
+        def __init__(self, len):
+            self.len = len
+            self.value = None
+
+    def __init__(self):
+        self.operations = []
+        self.errors = []
+
+    def write(self, address, value):
+        self.operations.append(('write', address.value, value))
+
+    def read(self, address, len=1):
+        result = Transaction.Result(len)
+        self.operations.append(('read', address.value, len, result))
+        return result
+
+    def frames(self):
+        """Plan the frames for the queued operations
+
+        Returns a list of ('write', start, [values]) and
+        ('read', start, count, [(offset, result), ...]) tuples
+        """
+        frames = []
+
+        for operation in self.operations:
+            last = frames[-1] if frames else None
+
+            if operation[0] == 'write':
+                _, address, value = operation
+                if last is not None and last[0] == 'write':
+                    start, values = last[1], last[2]
+                    if start <= address < start + len(values):
+                        # Same register again, the last value wins
+                        values[address - start] = value
+                        continue
+                    if (address == start + len(values)
+                            and len(values) < Transaction.MAX_WRITE):
+                        values.append(value)
+                        continue
+                    if (address == start - 1
+                            and len(values) < Transaction.MAX_WRITE):
+                        frames[-1] = ('write', address, [value] + values)
+                        continue
+                frames.append(('write', address, [value]))
+
+            else:
+                _, address, count, result = operation
+                if last is not None and last[0] == 'read':
+                    start, last_count, results = last[1], last[2], last[3]
+                    new_start = min(start, address)
+                    new_end = max(start + last_count, address + count)
+                    if (address <= start + last_count
+                            and start <= address + count
+                            and new_end - new_start <= Transaction.MAX_READ):
+                        results = [(offset + start - new_start, r)
+                                   for offset, r in results]
+                        results.append((address - new_start, result))
+                        frames[-1] = ('read', new_start, new_end - new_start,
+                                      results)
+                        continue
+                frames.append(('read', address, count, [(0, result)]))
+
+        return frames
+
+    @staticmethod
+    def distribute(frame, registers):
+        """Fill in the Results of a read frame from the registers it returned"""
+        for offset, result in frame[3]:
+            if registers is None:
+                result.value = None
+            elif result.len == 1:
+                result.value = registers[offset]
+            else:
+                result.value = registers[offset:offset + result.len]
+
+
 class PSU:
     """Instrument class for Longwei LW-3010EC and compatible
          Programmable Bench Power Supply.
@@ -18,6 +285,16 @@ class PSU:
         *     Factory default of 1
         *     Address of 0 is broadcast
         *     Set multiple supplies voltage and current supported
+        * cache_ttl (float): seconds a register snapshot may be reused by the
+        *     current, voltage and output properties.  0 reads on every access
+        * policy (RetryPolicy): timeouts and retries of each transaction
+        * host (str): network gateway address.  If given com_port is unused
+        * tcp_port (int): network gateway port
+        * framing (str): 'tcp' for Modbus TCP, 'rtu' for RTU over TCP
+        * client, lock: pymodbus client and lock shared with other supplies
+        *     on the same port.  Normally supplied by PSUBus.psu()
+
+    Transaction counts are kept in stats and a CircuitBreaker in breaker
 
 
     Serial parameters: 9600,8,N,1
@@ -61,44 +338,67 @@ class PSU:
         VOLTAGE = 3000
         CURRENT = 1050
 
-    def __init__(self, com_port=None, slave_id=0x1, debug=False):
+    class Snapshot(NamedTuple):
+        """Raw registers 0x1000-0x1005 and the monotonic time they were read"""
+        set_u: int
+        set_i: int
+        u: int
+        i: int
+        run_stop: int
+        reg_mode: int
+        timestamp: float
+
+    def __init__(self,
+                 com_port=None,
+                 slave_id=0x1,
+                 debug=False,
+                 cache_ttl=0.25,
+                 policy=None,
+                 host=None,
+                 tcp_port=502,
+                 framing='tcp',
+                 client=None,
+                 lock=None):
         self.debug = debug
         self.slave_id = slave_id
         self.com_port = com_port
+        self.cache_ttl = cache_ttl
+        self.policy = policy if policy is not None else RetryPolicy()
+        self.breaker = CircuitBreaker()
+        self.stats = PSU.new_stats()
+        self._snapshot = None
+        self._transaction = None
+        self.lock = lock if lock is not None else threading.Lock()
+        if host is not None:
+            client, self.lock = pooled_tcp_client(host, tcp_port, framing)
+        if client is not None:
+            self.pymc = client
+            return
         if self.com_port is None:
             self.com_port = self.find_PSU_com_port()
+        from pymodbus.client.sync import ModbusSerialClient
         self.pymc = ModbusSerialClient(method='rtu',
                                        port=self.com_port,
                                        baudrate=9600,
-                                       timeout=5)
-
-    def find_PSU_com_port(self):
-        """Searches for PSU USB COM port adapter"""
+                                       timeout=self.policy.first_timeout)
 
-        adapter_ids = {
-            "CH340": ("1A86", "7523"),
-            "FT232": ("0403", "6001")
-            # add other serial devices here if we find them
+    @staticmethod
+    def new_stats():
+        return {
+            'transactions': 0,  # Requests made, including refused ones
+            'timeouts': 0,  # Attempts that got no valid response
+            'retries': 0,  # Attempts after the first
+            'failures': 0,  # Requests that failed after all retries
+            'refused': 0  # Requests refused by the open circuit breaker
         }
 
-        com_ports_list = list(comports())
-
-        for port in com_ports_list:
-            # Don't attempt to test against adapters that do not report VID and PID
-            if port.vid and port.pid:
-                for adapter in adapter_ids:
-                    if ('{:04X}'.format(port.vid),
-                            '{:04X}'.format(port.pid)) == adapter_ids[adapter]:
-                        if self.debug:
-                            print(
-                                f'Found {port.manufacturer} adapter {adapter} on {port.device}'
-                            )
-                        # Use the last com port found
-                        if self.com_port is None or port.device > self.com_port:
-                            self.com_port = port.device
+    def find_PSU_com_port(self):
+        """Searches for PSU USB COM port adapter
 
-        if self.com_port is None:
-            raise OSError('PSU not found')
+        See find_PSU_port().  Only ports where a supply answers are used.
+        """
+        self.com_port = find_PSU_port(slave_id=getattr(self, 'slave_id', 1),
+                                      debug=self.debug)
 
         if self.debug:
             print(f'Attempting PSU on {self.com_port}')
@@ -106,14 +406,19 @@ class PSU:
         return self.com_port
 
     def write(self, address, value):
-        rc = self.pymc.write_register(address.value, value, unit=self.slave_id)
+        if self._transaction is not None:
+            self._transaction.write(address, value)
+            return
+
+        # Any write can change the readings, so the snapshot is discarded
+        self._snapshot = None
+        rc = self.execute(self.pymc.write_register, address.value, value)
         if rc.isError() and self.debug:
             print(address.name, rc.message)
 
     def read(self, address, len=1):
-        rc = self.pymc.read_holding_registers(address.value,
-                                              len,
-                                              unit=self.slave_id)
+        rc = self.execute(self.pymc.read_holding_registers, address.value,
+                          len)
 
         if rc.isError():
             if self.debug:
@@ -125,35 +430,163 @@ class PSU:
         else:
             return rc.registers
 
+    def execute(self, function, *args):
+        """Run one pymodbus client request for this slave under the retry
+        policy and circuit breaker
+
+        The port lock is held for each attempt, so handles sharing a bus never
+        interleave frames, but not during the backoff pauses.  Returns the
+        response, or a ModbusIOException if no response was received.
+        """
+        from pymodbus.exceptions import ModbusIOException, ConnectionException
+
+        self.stats['transactions'] += 1
+        if not self.breaker.allow():
+            self.stats['refused'] += 1
+            return ModbusIOException(
+                f'PSU {self.slave_id} is not responding, request refused')
+
+        for attempt in range(self.policy.attempts):
+            if attempt:
+                self.stats['retries'] += 1
+                time.sleep(self.policy.delay(attempt))
+
+            with self.lock:
+                _set_client_timeout(self.pymc, self.policy.timeout(attempt))
+                try:
+                    rc = function(*args, unit=self.slave_id)
+                except ConnectionException as e:
+                    rc = ModbusIOException(str(e))
+
+            # An exception response still shows the unit is alive
+            if not isinstance(rc, ModbusIOException):
+                self.breaker.record_success()
+                return rc
+            self.stats['timeouts'] += 1
+
+        self.stats['failures'] += 1
+        self.breaker.record_failure()
+        return rc
+
+    @contextmanager
+    def batch(self):
+        """Queue the writes made inside the block and send them on exit in the
+        fewest frames.  e.g.
+
+            with psu.batch() as transaction:
+                psu.voltage = 5
+                psu.current = 1
+                set_u = transaction.read(PSU.Registers.U_WRITE)
+            print(set_u.value)
+
+        Reads through the PSU properties inside the block are not queued; use
+        the read() of the yielded Transaction to read after the writes.  If
+        the block raises nothing is sent.  Nested batches join the outer one.
+        """
+        if self._transaction is not None:
+            yield self._transaction
+            return
+
+        self._transaction = Transaction()
+        try:
+            yield self._transaction
+            transaction = self._transaction
+        finally:
+            self._transaction = None
+
+        self.execute_transaction(transaction)
+
+    def execute_transaction(self, transaction):
+        """Send the frames planned for a Transaction. Returns the frame count
+        sent
+
+        Sending stops at the first write that fails, so an output on queued
+        after set points the supply did not accept is not sent.  The error is
+        the last one in transaction.errors.
+        """
+        frames = transaction.frames()
+
+        sent = 0
+        for frame in frames:
+            sent += 1
+            if frame[0] == 'write':
+                _, start, values = frame
+                self._snapshot = None
+                if len(values) == 1:
+                    rc = self.execute(self.pymc.write_register, start,
+                                      values[0])
+                else:
+                    rc = self.execute(self.pymc.write_registers, start,
+                                      values)
+                if rc.isError():
+                    transaction.errors.append((start, rc))
+                    if self.debug:
+                        print(hex(start), rc.message)
+                    break
+            else:
+                rc = self.execute(self.pymc.read_holding_registers,
+                                  frame[1], frame[2])
+                if rc.isError():
+                    transaction.errors.append((frame[1], rc))
+                    if self.debug:
+                        print(hex(frame[1]), rc.message)
+                    Transaction.distribute(frame, None)
+                else:
+                    Transaction.distribute(frame, rc.registers)
+
+        return sent
+
+    def snapshot(self, max_age=None):
+        """Return the register Snapshot, re-reading the PSU with a single
+        frame if the cached one is older than max_age (default cache_ttl)"""
+        if max_age is None:
+            max_age = self.cache_ttl
+
+        if (self._snapshot is None
+                or time.monotonic() - self._snapshot.timestamp > max_age):
+            if self.all_raw is None:
+                raise PSU_Exception(f'No response from PSU {self.slave_id}')
+
+        return self._snapshot
+
+    def invalidate(self):
+        """Discard the cached snapshot so the next property read is fresh"""
+        self._snapshot = None
+
     @property
     def current(self):
-        return self.read(PSU.Registers.I_READ) / 100
+        return self.snapshot().i / 100
 
     @current.setter
     def current(self, amps):
-        if amps < 0 or amps > self.RawLimits.CURRENT:
+        raw = int(round(amps * 100))
+        if raw < 0 or raw > self.RawLimits.CURRENT:
             raise PSU_Exception(
-                f'Requested current set point [{amps/100}] out of range [{self.RawLimits.CURRENT/100}]'
+                f'Requested current set point [{amps}] out of range [{self.RawLimits.CURRENT/100}]'
             )
 
-        self.write(PSU.Registers.I_WRITE, int(round(amps * 100)))
+        self.write(PSU.Registers.I_WRITE, raw)
 
     @property
     def voltage(self):
-        return self.read(PSU.Registers.U_READ) / 100
+        return self.snapshot().u / 100
 
     @voltage.setter
     def voltage(self, volts):
-        if volts < 0 or volts > self.RawLimits.VOLTAGE:
+        raw = int(round(volts * 100))
+        if raw < 0 or raw > self.RawLimits.VOLTAGE:
             raise PSU_Exception(
-                f'Requested voltage set point [{volts/100}] out of range [{self.RawLimits.VOLTAGE/100}]'
+                f'Requested voltage set point [{volts}] out of range [{self.RawLimits.VOLTAGE/100}]'
             )
 
-        self.write(PSU.Registers.U_WRITE, int(round(volts * 100)))
+        self.write(PSU.Registers.U_WRITE, raw)
 
     @property
     def all_raw(self):
-        return self.read(PSU.Registers.U_WRITE, len=6)
+        values = self.read(PSU.Registers.U_WRITE, len=6)
+        if values is not None:
+            self._snapshot = PSU.Snapshot(*values, time.monotonic())
+        return values
 
 
 #    @all.setter
@@ -169,32 +602,786 @@ class PSU:
 
     @property
     def output(self):
-        return False if self.read(PSU.Registers.RUNSTOP_READ) == 0 else True
+        return False if self.snapshot().run_stop == 0 else True
 
     @output.setter
     def output(self, on):
         self.write(PSU.Registers.RUNSTOP_WRITE, int(on))
 
     def toggle_output(self):
-        if self.output:
-            self.output = False
-        else:
-            self.output = True
+        """Switch the output over.  Raises a PSU_Exception if the supply does
+        not answer"""
+        with self.batch() as transaction:
+            if self.output:
+                self.output = False
+            else:
+                self.output = True
+
+        if transaction.errors:
+            raise PSU_Exception(f'PSU {self.slave_id} did not switch the '
+                                f'output: {transaction.errors[-1][1]}')
 
     def apply_set_points(self, values):
-        """Set the voltage and current set points"""
+        """Set the voltage and current set points
+
+        Sent as one batch: the adjacent Set-U and Set-I registers go out in a
+        single frame and nothing is sent if either set point is out of range.
+        Raises a PSU_Exception if the supply does not accept them.
+        """
         volts, amps, off_before_change, on_after_change = values
 
         # print(f"volts: {volts}, amps: {amps}, off_before_change: {off_before_change}, on_after_change: {on_after_change}")
 
-        if off_before_change:
-            self.output = False
+        with self.batch() as transaction:
+            if off_before_change:
+                self.output = False
+
+            self.voltage = volts / 100
+            self.current = amps / 100
+
+            if on_after_change == True:
+                self.output = True
+
+        if transaction.errors:
+            raise PSU_Exception(f'PSU {self.slave_id} did not accept the set '
+                                f'points: {transaction.errors[-1][1]}')
+
+
+def candidate_ports(debug=False):
+    """List the serial ports on known USB adapters (see ADAPTER_IDS)"""
+    from serial.tools.list_ports import comports
+
+    candidates = []
+
+    for port in comports():
+        # Don't attempt to test against adapters that do not report VID and PID
+        if port.vid and port.pid:
+            for adapter in ADAPTER_IDS:
+                if ('{:04X}'.format(port.vid),
+                        '{:04X}'.format(port.pid)) == ADAPTER_IDS[adapter]:
+                    if debug:
+                        print(
+                            f'Found {port.manufacturer} adapter {adapter} on {port.device}'
+                        )
+                    candidates.append(port)
+
+    return candidates
+
+
+def port_key(port):
+    """Key identifying the adapter across restarts and device renumbering:
+    the USB serial number, else the USB location, else the device name"""
+    if port.serial_number:
+        return f'serial {port.serial_number}'
+    if port.location:
+        return f'location {port.location}'
+    return f'device {port.device}'
+
+
+def probe_port(device, slave_id=1, timeout=0.2):
+    """Read the U register of slave_id on device
+
+    Returns the response time in seconds, or None if no supply answered
+    """
+    from pymodbus.client.sync import ModbusSerialClient
+    from pymodbus.exceptions import ModbusIOException
+
+    client = ModbusSerialClient(method='rtu',
+                                port=device,
+                                baudrate=9600,
+                                timeout=timeout)
+    try:
+        start = time.monotonic()
+        rc = client.read_holding_registers(PSU.Registers.U_READ.value,
+                                           1,
+                                           unit=slave_id)
+        if isinstance(rc, ModbusIOException):
+            return None
+        return time.monotonic() - start
+    except Exception:
+        # Busy, vanished or permission denied ports are not usable either
+        return None
+    finally:
+        client.close()
+
+
+def discover_PSU_ports(slave_id=1, timeout=0.2, debug=False):
+    """Probe every candidate adapter port at the same time
+
+    Returns [(response seconds, port info), ...] for the ports where a
+    supply answered, fastest first
+    """
+    candidates = candidate_ports(debug)
+    if not candidates:
+        return []
+
+    with ThreadPoolExecutor(max_workers=len(candidates)) as executor:
+        times = executor.map(
+            lambda port: probe_port(port.device, slave_id, timeout),
+            candidates)
+        ranked = [(seconds, port)
+                  for seconds, port in zip(times, candidates)
+                  if seconds is not None]
+
+    ranked.sort(key=lambda ranking: ranking[0])
+    if debug:
+        for seconds, port in ranked:
+            print(f'PSU answered on {port.device} in {seconds * 1000:.1f} ms')
+
+    return ranked
+
+
+def find_PSU_port(slave_id=1, timeout=0.2, debug=False, cache_path=None):
+    """Return the device name of the port the supply answers on
+
+    The adapter found last time is looked up in the port cache by its USB
+    serial number or location and probed alone.  If it has gone or does not
+    answer, all the candidate ports are probed concurrently, the fastest
+    responder is used and the cache updated.  Raises an OSError if no
+    supply answers.
+    """
+    if cache_path is None:
+        cache_path = PORT_CACHE_PATH
+    section = f'slave_{slave_id}'
+    cache = configparser.ConfigParser()
+    cache.read(cache_path)
+
+    if cache.has_section(section):
+        cached_key = cache[section].get('key')
+        for port in candidate_ports(debug):
+            if port_key(port) == cached_key and probe_port(
+                    port.device, slave_id, timeout) is not None:
+                if debug:
+                    print(f'Using cached {cached_key} on {port.device}')
+                return port.device
+
+    ranked = discover_PSU_ports(slave_id, timeout, debug)
+    if not ranked:
+        raise OSError('PSU not found')
+
+    port = ranked[0][1]
+    cache[section] = {'key': port_key(port), 'device': port.device}
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, 'w') as cachefile:
+            cache.write(cachefile)
+    except OSError as e:
+        if debug:
+            print(f'Port cache not written: {e}')
+
+    return port.device
+
+
+class AsyncStreamTransport:
+    """Non-blocking Modbus transport over an asyncio stream
+
+    Requests and responses are built and decoded by a pymodbus framer.  The
+    pymodbus asyncio clients are not used because they do not run on current
+    Python versions.  Subclasses open the stream in connect().
+
+    Transactions are serialized with a lock, so the poller, user commands and
+    all the AsyncPSU handles on a multi-drop bus can share one connection.
+    A lost connection is reopened by the next transaction.
+    """
+
+    def __init__(self, framer, timeout=5):
+        self.timeout = timeout
+        self.framer = framer
+        self.reader = None
+        self.writer = None
+        self.lock = asyncio.Lock()
+        self._tid = 0
+
+    async def open(self):
+        """Return the (reader, writer) stream pair"""
+        raise NotImplementedError
+
+    async def connect(self):
+        """Open the connection.  Raises an OSError if it cannot be opened"""
+        if self.writer is None:
+            self.reader, self.writer = await self.open()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+            self.reader = None
+
+    def _discard_input(self):
+        # StreamReader has no public call to drop what it has buffered
+        self.reader._buffer.clear()
+
+    async def execute(self, request, timeout=None):
+        """Send a pymodbus request and wait for the matching response
+
+        Returns the decoded response or a ModbusIOException on timeout, in the
+        same way the pymodbus synchronous client reports errors.  A response
+        to another request, such as a late one to a request that timed out,
+        is ignored and so ends as a timeout.
+        """
+        from pymodbus.exceptions import ModbusIOException
+
+        if timeout is None:
+            timeout = self.timeout
+        self._tid = (self._tid + 1) & 0xFFFF
+        request.transaction_id = self._tid
+        packet = self.framer.buildPacket(request)
+        responses = []
+
+        def accept(response):
+            # Late answers to an earlier, timed out request are dropped.  RTU
+            # frames carry no transaction id, so the function code is checked
+            # too; an exception response has the top bit set.
+            if (response.transaction_id == request.transaction_id
+                    and response.function_code & 0x7F
+                    == request.function_code):
+                responses.append(response)
+
+        async with self.lock:
+            try:
+                await self.connect()
+            except OSError as e:
+                return ModbusIOException(f'Connection failed: {e}')
+
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            # Bytes still unread are a late response to a timed out request,
+            # as the pymodbus serial client discards them before sending
+            self._discard_input()
+            self.framer.resetFrame()
+            try:
+                self.writer.write(packet)
+                await self.writer.drain()
+
+                while not responses:
+                    remaining = deadline - loop.time()
+                    try:
+                        data = await asyncio.wait_for(self.reader.read(256),
+                                                      max(remaining, 0))
+                    except asyncio.TimeoutError:
+                        return ModbusIOException(
+                            'No Response received from the remote unit')
+                    if not data:
+                        self.close()
+                        return ModbusIOException('Connection closed')
+                    self.framer.processIncomingPacket(data,
+                                                      accept,
+                                                      unit=request.unit_id)
+                    # pymodbus decodes one frame a call.  Decode the rest of
+                    # what was read, such as a response behind a late one.
+                    buffered = None
+                    while (not responses
+                           and 0 < len(self.framer._buffer) != buffered):
+                        buffered = len(self.framer._buffer)
+                        self.framer.processIncomingPacket(
+                            b'', accept, unit=request.unit_id)
+            except OSError as e:
+                # Reset by a gateway or an adapter unplugged.  The retry
+                # reopens the connection.
+                self.close()
+                return ModbusIOException(f'Connection lost: {e}')
+
+        return responses[0]
+
+
+class AsyncSerialTransport(AsyncStreamTransport):
+    """Non-blocking Modbus RTU transport for one serial port"""
+
+    def __init__(self, com_port, baudrate=9600, timeout=5):
+        from pymodbus.factory import ClientDecoder
+        from pymodbus.framer.rtu_framer import ModbusRtuFramer
+
+        super().__init__(ModbusRtuFramer(ClientDecoder()), timeout)
+        self.com_port = com_port
+        self.baudrate = baudrate
+
+    async def open(self):
+        from serial import PARITY_NONE, STOPBITS_ONE, EIGHTBITS
+        from serial_asyncio import open_serial_connection
+
+        return await open_serial_connection(url=self.com_port,
+                                            baudrate=self.baudrate,
+                                            bytesize=EIGHTBITS,
+                                            parity=PARITY_NONE,
+                                            stopbits=STOPBITS_ONE)
+
+
+class AsyncTcpTransport(AsyncStreamTransport):
+    """Non-blocking Modbus TCP or RTU over TCP transport for one gateway
+
+    The connection is kept open between transactions with TCP_NODELAY set.
+    Use pooled_async_transport() to share it between supplies.
+    """
+
+    def __init__(self, host, port=502, framing='tcp', timeout=5):
+        from pymodbus.factory import ClientDecoder
+
+        super().__init__(tcp_framer(framing)(ClientDecoder()), timeout)
+        self.host = host
+        self.port = port
+        self.framing = framing
+
+    async def open(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP,
+                                                   socket.TCP_NODELAY, 1)
+        return reader, writer
+
+
+# Network transports shared by every AsyncPSU on the same gateway
+_async_tcp_pool = {}
+
+
+def pooled_async_transport(host, port=502, framing='tcp'):
+    """Return the shared AsyncTcpTransport for a gateway"""
+    key = (host, port, framing)
+    if key not in _async_tcp_pool:
+        _async_tcp_pool[key] = AsyncTcpTransport(host, port, framing)
+    return _async_tcp_pool[key]
+
+
+class AsyncPSU:
+    """asyncio version of PSU
+
+    Transactions are awaitable and run on an AsyncSerialTransport or an
+    AsyncTcpTransport so the event loop (GUI, queues, other tasks) keeps
+    running while a frame is in flight.
+
+    Args:
+        * com_port (str): port name, searched for if None
+        * slave_id (int): slave address in the range 1 to 247
+        * cache_ttl (float): seconds a register snapshot may be reused
+        * policy (RetryPolicy): timeouts and retries of each transaction
+        * host, tcp_port, framing: network gateway, as for PSU
+        * transport: transport shared with other supplies on the same port.
+        *     Normally supplied by AsyncPSUBus.psu()
+
+    Call connect() before the first transaction.  Transaction counts are kept
+    in stats and a CircuitBreaker in breaker, as for PSU.
+    """
+
+    Registers = PSU.Registers
+    RegulationMode = PSU.RegulationMode
+    OutputState = PSU.OutputState
+    RawLimits = PSU.RawLimits
+    Snapshot = PSU.Snapshot
+
+    def __init__(self,
+                 com_port=None,
+                 slave_id=0x1,
+                 debug=False,
+                 cache_ttl=0.25,
+                 policy=None,
+                 host=None,
+                 tcp_port=502,
+                 framing='tcp',
+                 transport=None):
+        self.debug = debug
+        self.slave_id = slave_id
+        self.com_port = com_port
+        self.cache_ttl = cache_ttl
+        self.policy = policy if policy is not None else RetryPolicy()
+        self.breaker = CircuitBreaker()
+        self.stats = PSU.new_stats()
+        self._snapshot = None
+        self._transaction = None
+        if host is not None:
+            transport = pooled_async_transport(host, tcp_port, framing)
+        if transport is not None:
+            self.transport = transport
+            return
+        if self.com_port is None:
+            self.com_port = self.find_PSU_com_port()
+        self.transport = AsyncSerialTransport(self.com_port)
+
+    find_PSU_com_port = PSU.find_PSU_com_port
+
+    async def connect(self):
+        """Open the port.  Raises an OSError if it cannot be opened"""
+        await self.transport.connect()
+
+    def close(self):
+        self.transport.close()
+
+    async def execute(self, request):
+        """Send a pymodbus request to this slave under the retry policy and
+        circuit breaker.  See PSU.execute"""
+        from pymodbus.exceptions import ModbusIOException
+
+        request.unit_id = self.slave_id
+        self.stats['transactions'] += 1
+        if not self.breaker.allow():
+            self.stats['refused'] += 1
+            return ModbusIOException(
+                f'PSU {self.slave_id} is not responding, request refused')
+
+        for attempt in range(self.policy.attempts):
+            if attempt:
+                self.stats['retries'] += 1
+                await asyncio.sleep(self.policy.delay(attempt))
+
+            rc = await self.transport.execute(request,
+                                              self.policy.timeout(attempt))
+            if not isinstance(rc, ModbusIOException):
+                self.breaker.record_success()
+                return rc
+            self.stats['timeouts'] += 1
+
+        self.stats['failures'] += 1
+        self.breaker.record_failure()
+        return rc
+
+    async def write(self, address, value):
+        if self._transaction is not None:
+            self._transaction.write(address, value)
+            return
+
+        from pymodbus.register_write_message import WriteSingleRegisterRequest
+
+        self._snapshot = None
+        rc = await self.execute(
+            WriteSingleRegisterRequest(address.value, value))
+        if rc.isError() and self.debug:
+            print(address.name, rc)
+
+    async def read(self, address, len=1):
+        from pymodbus.register_read_message import ReadHoldingRegistersRequest
+
+        rc = await self.execute(
+            ReadHoldingRegistersRequest(address.value, len))
+
+        if rc.isError():
+            if self.debug:
+                print(address.name, rc)
+            return None
+
+        if len == 1:
+            return rc.registers[0]
+        else:
+            return rc.registers
+
+    @asynccontextmanager
+    async def batch(self):
+        """See PSU.batch.  Used as: async with psu.batch() as transaction:"""
+        if self._transaction is not None:
+            yield self._transaction
+            return
+
+        self._transaction = Transaction()
+        try:
+            yield self._transaction
+            transaction = self._transaction
+        finally:
+            self._transaction = None
+
+        await self.execute_transaction(transaction)
+
+    async def execute_transaction(self, transaction):
+        """See PSU.execute_transaction"""
+        from pymodbus.register_read_message import ReadHoldingRegistersRequest
+        from pymodbus.register_write_message import (
+            WriteSingleRegisterRequest, WriteMultipleRegistersRequest)
+
+        frames = transaction.frames()
+
+        sent = 0
+        for frame in frames:
+            sent += 1
+            if frame[0] == 'write':
+                _, start, values = frame
+                self._snapshot = None
+                if len(values) == 1:
+                    request = WriteSingleRegisterRequest(start, values[0])
+                else:
+                    request = WriteMultipleRegistersRequest(start, values)
+                rc = await self.execute(request)
+                if rc.isError():
+                    transaction.errors.append((start, rc))
+                    if self.debug:
+                        print(hex(start), rc)
+                    break
+            else:
+                rc = await self.execute(
+                    ReadHoldingRegistersRequest(frame[1], frame[2]))
+                if rc.isError():
+                    transaction.errors.append((frame[1], rc))
+                    if self.debug:
+                        print(hex(frame[1]), rc)
+                    Transaction.distribute(frame, None)
+                else:
+                    Transaction.distribute(frame, rc.registers)
+
+        return sent
+
+    async def all_raw(self):
+        values = await self.read(PSU.Registers.U_WRITE, len=6)
+        if values is not None:
+            self._snapshot = PSU.Snapshot(*values, time.monotonic())
+        return values
+
+    async def snapshot(self, max_age=None):
+        """See PSU.snapshot"""
+        if max_age is None:
+            max_age = self.cache_ttl
+
+        if (self._snapshot is None
+                or time.monotonic() - self._snapshot.timestamp > max_age):
+            if await self.all_raw() is None:
+                raise PSU_Exception(f'No response from PSU {self.slave_id}')
+
+        return self._snapshot
+
+    def invalidate(self):
+        self._snapshot = None
+
+    async def get_current(self):
+        return (await self.snapshot()).i / 100
+
+    async def set_current(self, amps):
+        raw = int(round(amps * 100))
+        if raw < 0 or raw > self.RawLimits.CURRENT:
+            raise PSU_Exception(
+                f'Requested current set point [{amps}] out of range [{self.RawLimits.CURRENT/100}]'
+            )
+
+        await self.write(PSU.Registers.I_WRITE, raw)
+
+    async def get_voltage(self):
+        return (await self.snapshot()).u / 100
+
+    async def set_voltage(self, volts):
+        raw = int(round(volts * 100))
+        if raw < 0 or raw > self.RawLimits.VOLTAGE:
+            raise PSU_Exception(
+                f'Requested voltage set point [{volts}] out of range [{self.RawLimits.VOLTAGE/100}]'
+            )
+
+        await self.write(PSU.Registers.U_WRITE, raw)
+
+    async def get_output(self):
+        return False if (await self.snapshot()).run_stop == 0 else True
+
+    async def set_output(self, on):
+        await self.write(PSU.Registers.RUNSTOP_WRITE, int(on))
+
+    async def toggle_output(self):
+        """See PSU.toggle_output"""
+        on = not await self.get_output()
+        async with self.batch() as transaction:
+            await self.set_output(on)
+
+        if transaction.errors:
+            raise PSU_Exception(f'PSU {self.slave_id} did not switch the '
+                                f'output: {transaction.errors[-1][1]}')
+
+    async def apply_set_points(self, values):
+        """Set the voltage and current set points.  See PSU.apply_set_points"""
+        volts, amps, off_before_change, on_after_change = values
+
+        async with self.batch() as transaction:
+            if off_before_change:
+                await self.set_output(False)
+
+            await self.set_voltage(volts / 100)
+            await self.set_current(amps / 100)
+
+            if on_after_change == True:
+                await self.set_output(True)
+
+        if transaction.errors:
+            raise PSU_Exception(f'PSU {self.slave_id} did not accept the set '
+                                f'points: {transaction.errors[-1][1]}')
+
+
+class PSUBus:
+    """Multi-drop RS-485 bus with several supplies sharing one serial port
+
+    The bus owns the port and hands out a PSU handle per slave address.  The
+    handles share one pymodbus client and lock, so they never compete for
+    the adapter.  poll_next() polls the slaves round-robin.
+
+    Args:
+        * com_port (str): port name, searched for if None
+        * baudrate (int): line speed, 9600 for the LW-3010EC
+        * policy (RetryPolicy): timeouts and retries shared by the handles
+
+    Each handle has its own CircuitBreaker.  Slaves whose breaker is open are
+    skipped by poll_next(), so a dead unit does not slow the others down.
+
+    e.g.
+        bus = PSUBus('/dev/ttyUSB0')
+        for slave_id in (1, 2, 3):
+            bus.psu(slave_id)
+        while True:
+            slave_id, values = bus.poll_next()
+    """
+
+    # Request and response bytes of the 6 register all_raw read
+    POLL_REQUEST_BYTES = 8
+    POLL_RESPONSE_BYTES = 17
+
+    def __init__(self, com_port=None, baudrate=9600, policy=None, debug=False):
+        self.debug = debug
+        self.com_port = com_port
+        self.baudrate = baudrate
+        self.policy = policy if policy is not None else RetryPolicy()
+        if self.com_port is None:
+            self.com_port = self.find_PSU_com_port()
+        from pymodbus.client.sync import ModbusSerialClient
+        self.pymc = ModbusSerialClient(method='rtu',
+                                       port=self.com_port,
+                                       baudrate=baudrate,
+                                       timeout=self.policy.first_timeout)
+        self.lock = threading.RLock()
+        self._init_schedule()
+
+    find_PSU_com_port = PSU.find_PSU_com_port
+
+    def _init_schedule(self):
+        self.handles = {}
+        self._next = 0
+        self.polls = 0
+        self._poll_time = None  # Moving average of seconds per poll
+
+    def psu(self, slave_id, **kwargs):
+        """Return the handle for slave_id, creating it on first use"""
+        if slave_id not in self.handles:
+            self.handles[slave_id] = PSU(self.com_port,
+                                         slave_id=slave_id,
+                                         debug=self.debug,
+                                         policy=self.policy,
+                                         client=self.pymc,
+                                         lock=self.lock,
+                                         **kwargs)
+        return self.handles[slave_id]
+
+    @property
+    def slave_ids(self):
+        return list(self.handles)
+
+    def _next_handle(self):
+        """Next handle in round-robin order, skipping units whose circuit
+        breaker is open unless all of them are"""
+        if not self.handles:
+            raise PSU_Exception('No supplies on the bus')
+        handles = list(self.handles.values())
+        for _ in range(len(handles)):
+            handle = handles[self._next % len(handles)]
+            self._next = (self._next + 1) % len(handles)
+            if not handle.breaker.is_open:
+                break
+        return handle
+
+    @property
+    def stats(self):
+        """Transaction counts summed over all the handles"""
+        totals = PSU.new_stats()
+        for handle in self.handles.values():
+            for key in totals:
+                totals[key] += handle.stats[key]
+        return totals
+
+    def _record_poll(self, handle, refused, seconds):
+        """Count a poll of handle that took seconds, unless it was refused
+        by the circuit breaker (refused is the handle's count before it)"""
+        if handle.stats['refused'] != refused:
+            return  # It never went on the bus
+        self.polls += 1
+        if self._poll_time is None:
+            self._poll_time = seconds
+        else:
+            self._poll_time += 0.1 * (seconds - self._poll_time)
+
+    def poll_next(self):
+        """Poll the next slave.  Returns (slave_id, all_raw values or None)"""
+        handle = self._next_handle()
+        refused = handle.stats['refused']
+        start = time.monotonic()
+        values = handle.all_raw
+        self._record_poll(handle, refused, time.monotonic() - start)
+        return handle.slave_id, values
+
+    def poll_all(self):
+        """Poll every slave once.  Returns {slave_id: values or None}"""
+        return dict(self.poll_next() for _ in range(len(self.handles)))
+
+    def frame_time(self, request_bytes, response_bytes):
+        """Seconds a request/response pair occupies the line
+
+        8N1 characters are 10 bits and each frame is preceded by the 3.5
+        character silent interval of the RTU framing.
+        """
+        characters = request_bytes + response_bytes + 2 * 3.5
+        return characters * 10 / self.baudrate
+
+    @property
+    def max_poll_rate(self):
+        """Theoretical all_raw polls per second for the whole bus, ignoring
+        the response delay of the supplies"""
+        return 1 / self.frame_time(self.POLL_REQUEST_BYTES,
+                                   self.POLL_RESPONSE_BYTES)
+
+    @property
+    def measured_poll_rate(self):
+        """All_raw polls per second the bus sustains, from recent polls that
+        went on the bus"""
+        if not self._poll_time:
+            return None
+        return 1 / self._poll_time
+
+    def close(self):
+        self.pymc.close()
+
+
+class AsyncPSUBus(PSUBus):
+    """asyncio version of PSUBus handing out AsyncPSU handles
+
+    Call connect() before polling
+    """
+
+    def __init__(self, com_port=None, baudrate=9600, policy=None, debug=False):
+        self.debug = debug
+        self.com_port = com_port
+        self.baudrate = baudrate
+        self.policy = policy if policy is not None else RetryPolicy()
+        if self.com_port is None:
+            self.com_port = self.find_PSU_com_port()
+        self.transport = AsyncSerialTransport(self.com_port,
+                                              baudrate=baudrate)
+        self._init_schedule()
+
+    async def connect(self):
+        await self.transport.connect()
+
+    def psu(self, slave_id, **kwargs):
+        """Return the handle for slave_id, creating it on first use"""
+        if slave_id not in self.handles:
+            self.handles[slave_id] = AsyncPSU(self.com_port,
+                                              slave_id=slave_id,
+                                              debug=self.debug,
+                                              policy=self.policy,
+                                              transport=self.transport,
+                                              **kwargs)
+        return self.handles[slave_id]
+
+    async def poll_next(self):
+        """Poll the next slave.  Returns (slave_id, all_raw values or None)"""
+        handle = self._next_handle()
+        refused = handle.stats['refused']
+        start = time.monotonic()
+        values = await handle.all_raw()
+        self._record_poll(handle, refused, time.monotonic() - start)
+        return handle.slave_id, values
+
+    async def poll_all(self):
+        """Poll every slave once.  Returns {slave_id: values or None}"""
+        return dict([
+            await self.poll_next() for _ in range(len(self.handles))
+        ])
 
-        self.voltage = volts / 100
-        self.current = amps / 100
+    def close(self):
+        self.transport.close()
 
-        if on_after_change == True:
-            self.output = True
 
 if __name__ == '__main__':
     # Run some tests and output
@@ -0,0 +1,166 @@
+"""Event queue for event_dispatcher
+
+Commands from the GUI (applySet, toggleRS, appQuit) are always handed out
+before polled values, in the order they were sent.  Only the newest polled
+values are kept: a poll that has not been shown by the time the next one
+arrives is replaced, so a dispatcher that falls behind shows the latest
+state rather than working through stale ones.
+
+Commands still waiting are coalesced as new ones arrive: an applySet sent
+straight after another replaces it with the newer set points, and a
+toggleRS sent straight after another cancels it, so a slow link does not
+build up writes that no longer matter.
+"""
+
+import asyncio
+import collections
+import time
+
+
+class EventScheduler():
+    """Bounded priority queue of (event_type, parameters) events
+
+    Used in place of an asyncio.Queue: put(), put_nowait() and get() take
+    and return the same events.  put_nowait() never blocks or raises.  An
+    applySet or toggleRS sent while maxsize of them are waiting is dropped
+    and counted, and the callables in on_drop are called with it, e.g. to
+    tell the user.  Other commands (appQuit, connectPS, disconnectPS) are
+    never dropped.
+
+    Depth and wait time metrics are in stats, and summarized by metrics().
+    """
+
+    POLL_EVENT = 'polled_values'
+    BUS_COMMANDS = ('applySet', 'toggleRS')  # Bounded by maxsize
+
+    @staticmethod
+    def transactions(event):
+        """Bus transactions the dispatcher spends on a command"""
+        event_type, parameters = event
+        if event_type == 'applySet':
+            # Set points in one frame, and the output off and on if asked
+            _, _, off_before_change, on_after_change = parameters
+            return 1 + bool(off_before_change) + bool(on_after_change)
+        if event_type == 'toggleRS':
+            return 2  # Read the output state, then write it
+        return 0
+
+    def __init__(self, maxsize=32):
+        """
+        Args:
+            * maxsize (int): applySet and toggleRS commands that may wait
+              at once
+        """
+        self.maxsize = maxsize
+        self._commands = collections.deque()  # (event, time enqueued)
+        self._bus_commands = 0  # Of them applySet or toggleRS
+        self._poll = None  # (event, time enqueued)
+        self._waiter = None
+        self.on_drop = []
+        self.stats = {
+            'commands': 0,
+            'polls': 0,
+            'polls_replaced': 0,
+            'dropped': 0,
+            'applies_merged': 0,
+            'toggles_cancelled': 0,
+            'saved_transactions': 0,
+            'max_depth': 0,
+            'command_wait_total': 0.0,
+            'command_wait_max': 0.0,
+            'poll_wait_total': 0.0,
+            'poll_wait_max': 0.0
+        }
+
+    def qsize(self):
+        return len(self._commands) + (self._poll is not None)
+
+    def empty(self):
+        return self.qsize() == 0
+
+    def put_nowait(self, event):
+        """Queue an event, replacing any polled values still waiting and
+        coalescing it with the last command waiting"""
+        last_type = self._commands[-1][0][0] if self._commands else None
+
+        if event[0] == self.POLL_EVENT:
+            if self._poll is not None:
+                self.stats['polls_replaced'] += 1
+            self._poll = (event, time.monotonic())
+        elif event[0] == 'applySet' and last_type == 'applySet':
+            # The newer set points supersede the ones not yet written
+            self.stats['applies_merged'] += 1
+            self.stats['saved_transactions'] += self.transactions(
+                self._commands[-1][0])
+            self._commands[-1] = (event, self._commands[-1][1])
+        elif event[0] == 'toggleRS' and last_type == 'toggleRS':
+            # Two toggles leave the output as it is
+            self._commands.pop()
+            self._bus_commands -= 1
+            self.stats['toggles_cancelled'] += 2
+            self.stats['saved_transactions'] += 2 * self.transactions(event)
+        elif (event[0] in self.BUS_COMMANDS
+              and self._bus_commands >= self.maxsize):
+            self.stats['dropped'] += 1
+            for callback in self.on_drop:
+                callback(event)
+            return
+        else:
+            self._commands.append((event, time.monotonic()))
+            self._bus_commands += event[0] in self.BUS_COMMANDS
+
+        self.stats['max_depth'] = max(self.stats['max_depth'], self.qsize())
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def put(self, event):
+        self.put_nowait(event)
+
+    async def get(self):
+        """The oldest command, or else the newest polled values"""
+        while self.empty():
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+
+        if self._commands:
+            event, enqueued = self._commands.popleft()
+            self._bus_commands -= event[0] in self.BUS_COMMANDS
+            kind = 'command'
+        else:
+            event, enqueued = self._poll
+            self._poll = None
+            kind = 'poll'
+
+        wait = time.monotonic() - enqueued
+        self.stats[f'{kind}s'] += 1
+        self.stats[f'{kind}_wait_total'] += wait
+        self.stats[f'{kind}_wait_max'] = max(self.stats[f'{kind}_wait_max'],
+                                             wait)
+        return event
+
+    def metrics(self):
+        """Present depth, and counts and wait times in ms so far"""
+        stats = self.stats
+
+        def mean_ms(kind):
+            count = stats[f'{kind}s']
+            return stats[f'{kind}_wait_total'] / count * 1000 if count else 0.0
+
+        return {
+            'depth': self.qsize(),
+            'max_depth': stats['max_depth'],
+            'commands': stats['commands'],
+            'polls': stats['polls'],
+            'polls_replaced': stats['polls_replaced'],
+            'dropped': stats['dropped'],
+            'applies_merged': stats['applies_merged'],
+            'toggles_cancelled': stats['toggles_cancelled'],
+            'saved_transactions': stats['saved_transactions'],
+            'command_wait_mean_ms': mean_ms('command'),
+            'command_wait_max_ms': stats['command_wait_max'] * 1000,
+            'poll_wait_mean_ms': mean_ms('poll'),
+            'poll_wait_max_ms': stats['poll_wait_max'] * 1000
+        }
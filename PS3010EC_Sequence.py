@@ -0,0 +1,422 @@
+#! /usr/bin/env python
+"""Scripted test sequences for the LW-3010EC
+
+A step file is compiled once into register writes, polled conditions and
+deadlines, then run on the asyncio loop against an AsyncPSU.  Each step's
+actual start and duration is reported against its schedule.
+
+Step file, one step per line, # starts a comment:
+
+    set u=12.00 i=1.50      write the set points (either may be left out)
+    output on               or off
+    wait mode=CV timeout=5  until every condition holds in a polled sample
+    hold 10                 seconds, measured from the end of the last hold
+                            or wait, so write and read times do not add up
+    measure warm            record a fresh sample under a name
+    repeat 3                the steps up to the matching end, 3 times
+    end
+
+wait conditions are u, i, set_u or set_i compared with <, <=, =, >= or >
+to volts or amps, mode=CV, CC or OCP, and output=on or off.  A wait that
+times out, or a set or output the supply does not accept, ends the
+sequence.
+
+e.g.
+    ./PS3010EC_Sequence.py burn-in.txt --port /dev/ttyUSB0
+    ./PS3010EC_Sequence.py burn-in.txt --simulate   (simulated time)
+"""
+
+import argparse
+import asyncio
+import operator
+import re
+from typing import NamedTuple
+from PS3010EC_Clock import RealClock, VirtualClock
+from PS3010EC_Modbus import PSU, AsyncPSU, PSU_Exception
+
+
+class SequenceError(Exception):
+    """A step file that cannot be compiled"""
+
+    def __init__(self, line, message):
+        super().__init__(f'line {line}: {message}')
+        self.line = line
+
+
+class Step(NamedTuple):
+    """A compiled step
+
+    op is 'write' with args [(register, raw value)], 'wait' with args
+    (predicate, timeout), 'hold' with args seconds or 'measure' with args
+    the name.
+    """
+    line: int
+    text: str
+    op: str
+    args: object
+
+
+class StepReport(NamedTuple):
+    """Timing of a step run, in seconds from the start of the sequence
+
+    late is how long after its scheduled time the step started.  result is
+    'ok', 'timeout' for a wait, 'failed' for writes the supply did not
+    accept or 'no response' for a measure.  values holds the sample of a
+    measure step, or of a wait step when it ended.
+    """
+    line: int
+    text: str
+    scheduled: float
+    started: float
+    duration: float
+    late: float
+    result: str
+    values: tuple
+
+
+CONDITION = re.compile(r'^(set_u|set_i|u|i|mode|output)(<=|>=|<|>|=)(.+)$')
+OPERATORS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '=': operator.eq,
+    '>=': operator.ge,
+    '>': operator.gt
+}
+MODES = {
+    'CC': PSU.RegulationMode.CURRENT,
+    'CV': PSU.RegulationMode.VOLTAGE,
+    'OCP': PSU.RegulationMode.OVERCURRENT_PROTECTION
+}
+# Output register values, 1 is on as written by PSU.output
+OUTPUT = {'on': 1, 'off': 0}
+# Step results that end the sequence
+STOP_RESULTS = ('timeout', 'failed')
+LIMITS = {
+    'u': PSU.RawLimits.VOLTAGE,
+    'i': PSU.RawLimits.CURRENT,
+    'set_u': PSU.RawLimits.VOLTAGE,
+    'set_i': PSU.RawLimits.CURRENT
+}
+
+
+def _raw(line, name, text):
+    """Volts or amps as a raw register value"""
+    try:
+        raw = int(round(float(text) * 100))
+    except ValueError:
+        raise SequenceError(line, f'{name}={text} is not a number')
+    if not 0 <= raw <= LIMITS[name]:
+        raise SequenceError(
+            line, f'{name}={text} is outside 0-{LIMITS[name] / 100:g}')
+    return raw
+
+
+def _seconds(line, text):
+    try:
+        seconds = float(text)
+    except ValueError:
+        raise SequenceError(line, f'{text} is not a number of seconds')
+    if seconds < 0:
+        raise SequenceError(line, f'{text} seconds is negative')
+    return seconds
+
+
+def _condition(line, text):
+    """Predicate on a PSU.Snapshot"""
+    match = CONDITION.match(text)
+    if match is None:
+        raise SequenceError(line, f'unknown condition {text}')
+    name, op, value = match.groups()
+
+    if name == 'mode':
+        if op != '=' or value.upper() not in MODES:
+            raise SequenceError(line, f'{text}, expected mode=CV, CC or OCP')
+        mode = MODES[value.upper()]
+        return lambda snapshot: snapshot.reg_mode == mode
+
+    if name == 'output':
+        if op != '=' or value.lower() not in OUTPUT:
+            raise SequenceError(line, f'{text}, expected output=on or off')
+        on = OUTPUT[value.lower()] != 0
+        return lambda snapshot: (snapshot.run_stop != 0) == on
+
+    compare = OPERATORS[op]
+    raw = _raw(line, name, value)
+    return lambda snapshot: compare(getattr(snapshot, name), raw)
+
+
+def compile_steps(text):
+    """Compile the text of a step file into a list of Steps
+
+    Raises SequenceError for the first line that cannot be compiled.
+    """
+    steps = []
+    blocks = []  # (line, repeat count, index of the first step)
+
+    for number, source in enumerate(text.splitlines(), start=1):
+        source = source.split('#', 1)[0].strip()
+        if not source:
+            continue
+        command, *words = source.split()
+        command = command.lower()
+
+        if command == 'set':
+            writes = []
+            for word in words:
+                name, _, value = word.partition('=')
+                if name not in ('u', 'i'):
+                    raise SequenceError(number, f'set takes u= and i=, not {word}')
+                register = (PSU.Registers.U_WRITE
+                            if name == 'u' else PSU.Registers.I_WRITE)
+                writes.append((register, _raw(number, f'set_{name}', value)))
+            if not writes:
+                raise SequenceError(number, 'set needs u= and/or i=')
+            steps.append(Step(number, source, 'write', writes))
+
+        elif command == 'output':
+            if len(words) != 1 or words[0].lower() not in OUTPUT:
+                raise SequenceError(number, 'output takes on or off')
+            steps.append(
+                Step(number, source, 'write',
+                     [(PSU.Registers.RUNSTOP_WRITE, OUTPUT[words[0].lower()])]))
+
+        elif command == 'wait':
+            timeout = None
+            predicates = []
+            for word in words:
+                if word.startswith('timeout='):
+                    timeout = _seconds(number, word[len('timeout='):])
+                else:
+                    predicates.append(_condition(number, word))
+            if not predicates:
+                raise SequenceError(number, 'wait needs a condition')
+            steps.append(
+                Step(number, source, 'wait',
+                     (lambda snapshot, predicates=predicates: all(
+                         predicate(snapshot)
+                         for predicate in predicates), timeout)))
+
+        elif command == 'hold':
+            if len(words) != 1:
+                raise SequenceError(number, 'hold takes a number of seconds')
+            steps.append(Step(number, source, 'hold',
+                              _seconds(number, words[0])))
+
+        elif command == 'measure':
+            steps.append(
+                Step(number, source, 'measure',
+                     words[0] if words else f'line {number}'))
+
+        elif command == 'repeat':
+            if len(words) != 1 or not words[0].isdigit():
+                raise SequenceError(number, 'repeat takes a count')
+            blocks.append((number, int(words[0]), len(steps)))
+
+        elif command == 'end':
+            if not blocks:
+                raise SequenceError(number, 'end without repeat')
+            _, count, first = blocks.pop()
+            steps[first:] = steps[first:] * count
+
+        else:
+            raise SequenceError(number, f'unknown step {command}')
+
+    if blocks:
+        raise SequenceError(blocks[-1][0], 'repeat without end')
+    return steps
+
+
+def load_steps(path):
+    """Compile a step file"""
+    with open(path) as infile:
+        return compile_steps(infile.read())
+
+
+class SequenceRunner():
+    """Runs compiled steps against an AsyncPSU
+
+    Args:
+        * ps (AsyncPSU): Connected supply
+        * poll_interval (float): Seconds between samples while waiting
+        * on_step (callable): Called with each StepReport as it completes
+        * clock: RealClock, or the VirtualClock of a simulator to run on
+          simulated time
+
+    e.g.
+        reports = await SequenceRunner(ps).run(load_steps('burn-in.txt'))
+        print(format_report(reports))
+    """
+
+    def __init__(self, ps, poll_interval=0.1, on_step=None, clock=None):
+        self.ps = ps
+        self.poll_interval = poll_interval
+        self.on_step = on_step
+        self.clock = clock if clock is not None else RealClock()
+
+    async def _sample(self, max_age):
+        try:
+            return await self.ps.snapshot(max_age=max_age)
+        except PSU_Exception:
+            return None
+
+    async def _wait(self, predicate, timeout):
+        """Returns (result, last sample)"""
+        clock = self.clock
+        deadline = None if timeout is None else clock.now() + timeout
+
+        while True:
+            # A fresh sample each time: the snapshot cache ages in real time,
+            # which a virtual clock does not follow
+            snapshot = await self._sample(0)
+            if snapshot is not None and predicate(snapshot):
+                return 'ok', snapshot
+            if deadline is not None and clock.now() >= deadline:
+                return 'timeout', snapshot
+            delay = self.poll_interval
+            if deadline is not None:
+                delay = min(delay, deadline - clock.now())
+            await clock.sleep(max(0, delay))
+
+    async def run(self, steps):
+        """Run the steps, returning a StepReport for each step run"""
+        clock = self.clock
+        start = clock.now()
+        # Holds are timed from this deadline rather than from when the step
+        # starts, so time spent writing and measuring is not added to them
+        deadline = start
+        reports = []
+
+        for step in steps:
+            started = clock.now()
+            scheduled = deadline
+            result = 'ok'
+            snapshot = None
+
+            if step.op == 'write':
+                async with self.ps.batch() as transaction:
+                    for register, value in step.args:
+                        await self.ps.write(register, value)
+                if transaction.errors:
+                    result = 'failed'
+
+            elif step.op == 'wait':
+                predicate, timeout = step.args
+                result, snapshot = await self._wait(predicate, timeout)
+                deadline = clock.now()
+
+            elif step.op == 'hold':
+                deadline += step.args
+                await clock.sleep(max(0, deadline - clock.now()))
+
+            elif step.op == 'measure':
+                snapshot = await self._sample(0)
+                if snapshot is None:
+                    result = 'no response'
+
+            report = StepReport(step.line, step.text, scheduled - start,
+                                started - start,
+                                clock.now() - started,
+                                max(0, started - scheduled), result,
+                                tuple(snapshot[:6]) if snapshot else ())
+            reports.append(report)
+            if self.on_step is not None:
+                self.on_step(report)
+            if result in STOP_RESULTS:
+                break
+
+        return reports
+
+
+REPORT_HEADER = (f"{'line':>4} {'scheduled':>9} {'started':>9} "
+                 f"{'duration':>9} {'late':>7} {'result':<11} step")
+
+
+def format_step(r):
+    """Report lines of one step, under REPORT_HEADER"""
+    lines = [
+        f"{r.line:4} {r.scheduled:9.3f} {r.started:9.3f} "
+        f"{r.duration:9.3f} {r.late:7.3f} {r.result:<11} {r.text}"
+    ]
+    if r.values:
+        SetU, SetI, U, I, RunStop, RegMode = r.values
+        lines.append(f"{'':>54}set {SetU / 100:.2f} V {SetI / 100:.2f} A, "
+                     f"out {U / 100:.2f} V {I / 100:.2f} A, "
+                     f"output {RunStop}, mode {RegMode}")
+    return '\n'.join(lines)
+
+
+def format_report(reports):
+    """Table of step timings and measurements"""
+    return '\n'.join([REPORT_HEADER] + [format_step(r) for r in reports])
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description='Run a step file against an LW-3010EC')
+    parser.add_argument('steps', help='step file')
+    parser.add_argument('--port',
+                        help='serial port (default: search for the supply)')
+    parser.add_argument('--host', help='Modbus TCP host instead of serial')
+    parser.add_argument('--tcp-port',
+                        type=int,
+                        default=502,
+                        help='Modbus TCP port (default 502)')
+    parser.add_argument('--framing',
+                        choices=('tcp', 'rtu'),
+                        default='tcp',
+                        help='framing used on the TCP port')
+    parser.add_argument('--slave', type=int, default=1, help='slave address')
+    parser.add_argument('--check',
+                        action='store_true',
+                        help='only compile the step file')
+    parser.add_argument('--simulate',
+                        action='store_true',
+                        help='run against a simulated supply on simulated '
+                        'time, so holds do not wait')
+    args = parser.parse_args()
+
+    try:
+        steps = load_steps(args.steps)
+    except (OSError, SequenceError) as e:
+        parser.exit(1, f'{args.steps}: {e}\n')
+    if args.check:
+        print(f'{len(steps)} steps')
+        return
+
+    clock = None
+    try:
+        if args.simulate:
+            from PS3010EC_Simulator import simulated_psu
+            clock = VirtualClock()
+            _, ps = await simulated_psu(clock, slave_id=args.slave)
+        elif args.host:
+            ps = AsyncPSU(host=args.host,
+                          tcp_port=args.tcp_port,
+                          framing=args.framing,
+                          slave_id=args.slave)
+        else:
+            ps = AsyncPSU(args.port, slave_id=args.slave)
+        await ps.connect()
+    except (OSError, PSU_Exception) as e:
+        parser.exit(1, f'Cannot connect to the supply: {e}\n')
+
+    # Each step is printed as it completes, so a long sequence shows its
+    # progress and an interrupted one keeps the results so far
+    print(REPORT_HEADER, flush=True)
+    runner = SequenceRunner(
+        ps,
+        on_step=lambda report: print(format_step(report), flush=True),
+        clock=clock)
+    try:
+        reports = await runner.run(steps)
+    finally:
+        ps.close()
+    if reports and reports[-1].result in STOP_RESULTS:
+        parser.exit(1, f'stopped at line {reports[-1].line}\n')
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,404 @@
+#! /usr/bin/env python
+"""Simulated Longwei LW-3010EC for running the application without hardware
+
+The simulator serves the register map documented in the PSU class
+(0x1000-0x1008) on a pseudo-terminal, as Modbus RTU, or on a loopback TCP
+port, as Modbus TCP or RTU over TCP.  The PSU and AsyncPSU classes connect
+to it exactly as they would to a real supply.
+
+The supply is modelled driving a resistive load: it regulates voltage (CV)
+until the load asks for more than the current set point, then regulates
+current (CC), or trips the output off (OCP) when over current protection is
+enabled.  Readings approach their target with a first order lag.
+
+Each frame is delayed by the time it would occupy a 9600 baud line plus the
+turnaround time of the supply.  With a VirtualClock shared by a driver in
+the same process (see simulated_psu()), the delays, the model and the
+driver's holds and waits advance simulated time instead of waiting, so long
+scenarios run in seconds.
+
+e.g.
+    ./PS3010EC_Simulator.py --pty --load 10
+    ./ps3010ec.py         (with comm set to the printed device)
+    ./PS3010EC_Sequence.py burn-in.txt --simulate
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import struct
+import tty
+from pymodbus.utilities import computeCRC, checkCRC
+from PS3010EC_Clock import RealClock
+from PS3010EC_Modbus import PSU, AsyncPSU
+
+
+class SimulatedPSU():
+    """Register level model of one supply
+
+    Args:
+        * slave_id (int): Modbus address, changed by writing 0x1008
+        * load_ohms (float): resistance across the output, math.inf for none
+        * ocp (bool): over current protection enabled on the front panel
+        * settle_time (float): time constant of the output in seconds
+        * clock: RealClock or VirtualClock
+    """
+
+    # Modbus exception codes
+    ILLEGAL_FUNCTION = 1
+    ILLEGAL_ADDRESS = 2
+    ILLEGAL_VALUE = 3
+
+    FIRST_REGISTER = PSU.Registers.U_WRITE.value
+    LAST_REGISTER = PSU.Registers.ADDRESS_WRITE.value
+
+    def __init__(self,
+                 slave_id=1,
+                 load_ohms=10.0,
+                 ocp=False,
+                 settle_time=0.02,
+                 clock=None):
+        self.slave_id = slave_id
+        self.load_ohms = load_ohms
+        self.ocp = ocp
+        self.settle_time = settle_time
+        self.clock = clock if clock is not None else RealClock()
+
+        self.set_u = 500  # Raw register values, hundredths
+        self.set_i = 100
+        self.run_stop = 0
+        self.reg_mode = PSU.RegulationMode.VOLTAGE
+        self.u = 0.0  # Output in volts and amps
+        self.i = 0.0
+        self._updated = self.clock.now()
+
+    def _targets(self):
+        """Output the supply is regulating towards and its regulation mode"""
+        volts = self.set_u / 100
+        amps = self.set_i / 100
+
+        if not self.run_stop:
+            return 0.0, 0.0, self.reg_mode
+
+        demand = volts / self.load_ohms if self.load_ohms > 0 else math.inf
+        if demand <= amps:
+            return volts, demand, PSU.RegulationMode.VOLTAGE
+
+        if self.ocp:
+            self.run_stop = 0
+            return 0.0, 0.0, PSU.RegulationMode.OVERCURRENT_PROTECTION
+
+        return amps * self.load_ohms, amps, PSU.RegulationMode.CURRENT
+
+    def update(self):
+        """Advance the output to the present clock time"""
+        now = self.clock.now()
+        elapsed = now - self._updated
+        self._updated = now
+
+        u, i, self.reg_mode = self._targets()
+        if self.settle_time > 0:
+            step = 1 - math.exp(-elapsed / self.settle_time)
+        else:
+            step = 1
+        self.u += (u - self.u) * step
+        self.i += (i - self.i) * step
+
+    @property
+    def registers(self):
+        """Present register values from 0x1000"""
+        self.update()
+        return [
+            self.set_u, self.set_i,
+            int(round(self.u * 100)),
+            int(round(self.i * 100)), self.run_stop, self.reg_mode,
+            self.run_stop, 0, self.slave_id
+        ]
+
+    def read(self, address, count):
+        """Returns the registers or a Modbus exception code"""
+        if (address < self.FIRST_REGISTER
+                or address + count - 1 > self.LAST_REGISTER or count < 1):
+            return SimulatedPSU.ILLEGAL_ADDRESS
+        start = address - self.FIRST_REGISTER
+        return self.registers[start:start + count]
+
+    def write(self, address, values):
+        """Returns None or a Modbus exception code"""
+        writable = {
+            PSU.Registers.U_WRITE.value: PSU.RawLimits.VOLTAGE,
+            PSU.Registers.I_WRITE.value: PSU.RawLimits.CURRENT,
+            PSU.Registers.RUNSTOP_WRITE.value: 1,
+            PSU.Registers.ADDRESS_WRITE.value: 127
+        }
+        for offset, value in enumerate(values):
+            if address + offset not in writable:
+                return SimulatedPSU.ILLEGAL_ADDRESS
+            if value > writable[address + offset]:
+                return SimulatedPSU.ILLEGAL_VALUE
+
+        self.update()
+        for offset, value in enumerate(values):
+            register = address + offset
+            if register == PSU.Registers.U_WRITE.value:
+                self.set_u = value
+            elif register == PSU.Registers.I_WRITE.value:
+                self.set_i = value
+            elif register == PSU.Registers.RUNSTOP_WRITE.value:
+                self.run_stop = value
+            else:
+                self.slave_id = value
+        return None
+
+
+class Simulator():
+    """Serves SimulatedPSUs over a pseudo-terminal or TCP
+
+    Args:
+        * supplies: list of SimulatedPSU sharing the line
+        * baudrate (int): line speed used for the frame delay
+        * turnaround (float): seconds the supply takes to start answering
+        * latency (bool): delay responses by the frame time
+        * clock: RealClock or VirtualClock, shared with the supplies
+
+    Callables in on_write are called with (slave_id, address, values, time)
+    for each accepted write, e.g. to time commands arriving.
+    """
+
+    def __init__(self,
+                 supplies,
+                 baudrate=9600,
+                 turnaround=0.005,
+                 latency=True,
+                 clock=None):
+        self.clock = clock if clock is not None else RealClock()
+        self.supplies = supplies
+        for supply in self.supplies:
+            supply.clock = self.clock
+            supply._updated = self.clock.now()
+        self.baudrate = baudrate
+        self.turnaround = turnaround
+        self.latency = latency
+        self.on_write = []
+        self.frames = 0
+
+    def supply(self, slave_id):
+        for supply in self.supplies:
+            if supply.slave_id == slave_id:
+                return supply
+        return None
+
+    def frame_time(self, request_bytes, response_bytes):
+        """Line time of a request/response pair, see PSUBus.frame_time"""
+        characters = request_bytes + response_bytes + 2 * 3.5
+        return characters * 10 / self.baudrate + self.turnaround
+
+    def handle_pdu(self, unit, pdu):
+        """Process a request PDU.  Returns the response PDU or None if the
+        request is not for any simulated supply or was broadcast
+
+        As on a real bus nothing answers a broadcast: a read sent to unit 0
+        is ignored, and a write is made by every supply without a reply.
+        """
+        if unit == 0:
+            targets = self.supplies
+        else:
+            targets = [
+                supply for supply in self.supplies if supply.slave_id == unit
+            ]
+        if not targets or len(pdu) < 5:
+            return None
+
+        self.frames += 1
+        function_code = pdu[0]
+        address, count = struct.unpack('>HH', pdu[1:5])
+
+        if function_code == 3:
+            if unit == 0:
+                return None
+            result = targets[0].read(address, count)
+            if isinstance(result, int):
+                return struct.pack('>BB', function_code | 0x80, result)
+            return struct.pack(f'>BB{len(result)}H', function_code,
+                               2 * len(result), *result)
+
+        if function_code == 6:
+            values = [count]
+        elif function_code == 16:
+            values = list(struct.unpack(f'>{count}H', pdu[6:6 + 2 * count]))
+        elif unit == 0:
+            return None
+        else:
+            return struct.pack('>BB', function_code | 0x80,
+                               SimulatedPSU.ILLEGAL_FUNCTION)
+
+        errors = [supply.write(address, values) for supply in targets]
+        error = next((error for error in errors if error is not None), None)
+        if error is not None:
+            if unit == 0:
+                return None
+            return struct.pack('>BB', function_code | 0x80, error)
+
+        for callback in self.on_write:
+            callback(unit, address, values, self.clock.now())
+
+        if unit == 0:
+            return None
+        return pdu[:5]
+
+    async def _respond(self, request_bytes, response_bytes):
+        if self.latency:
+            await self.clock.sleep(
+                self.frame_time(request_bytes, response_bytes))
+
+    @staticmethod
+    def rtu_frame_length(buffer):
+        """Length of the RTU request at the start of buffer, None if more
+        bytes are needed to tell"""
+        if len(buffer) < 2:
+            return None
+        if buffer[1] in (3, 6):
+            return 8
+        if buffer[1] == 16:
+            return 9 + buffer[6] if len(buffer) >= 7 else None
+        return len(buffer)  # Unsupported request, answered with an exception
+
+    async def handle_rtu(self, buffer, send):
+        """Answer the complete RTU frames in buffer.  Returns the unused bytes"""
+        while True:
+            length = self.rtu_frame_length(buffer)
+            if length is None or len(buffer) < length:
+                return buffer
+            frame, buffer = buffer[:length], buffer[length:]
+
+            crc = struct.unpack('>H', frame[-2:])[0]
+            if length < 4 or not checkCRC(frame[:-2], crc):
+                return b''  # Lost sync, drop everything like a real slave
+
+            pdu = self.handle_pdu(frame[0], frame[1:-2])
+            if pdu is None:
+                continue
+            response = bytes([frame[0]]) + pdu
+            response += struct.pack('>H', computeCRC(response))
+            await self._respond(len(frame), len(response))
+            send(response)
+
+    async def serve_pty(self):
+        """Serve Modbus RTU on a new pseudo-terminal.  Returns its device
+        name, to be used as the com port"""
+        master, slave = os.openpty()
+        tty.setraw(slave)
+        requests = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        loop.add_reader(master,
+                        lambda: requests.put_nowait(os.read(master, 256)))
+
+        async def serve():
+            buffer = b''
+            while True:
+                buffer += await requests.get()
+                buffer = await self.handle_rtu(
+                    buffer, lambda data: os.write(master, data))
+
+        self._pty = (master, slave, asyncio.create_task(serve()))
+        return os.ttyname(slave)
+
+    async def serve_tcp(self, host='127.0.0.1', port=5020, framing='tcp'):
+        """Serve Modbus TCP (framing 'tcp') or RTU over TCP ('rtu')"""
+
+        async def connection(reader, writer):
+            buffer = b''
+            while True:
+                data = await reader.read(256)
+                if not data:
+                    writer.close()
+                    return
+                buffer += data
+                if framing == 'rtu':
+                    buffer = await self.handle_rtu(buffer, writer.write)
+                    continue
+
+                while len(buffer) >= 7:
+                    tid, _, length, unit = struct.unpack('>HHHB', buffer[:7])
+                    if len(buffer) < 6 + length:
+                        break
+                    pdu, buffer = buffer[7:6 + length], buffer[6 + length:]
+                    response = self.handle_pdu(unit, pdu)
+                    if response is None:
+                        continue
+                    await self._respond(len(pdu) + 3, len(response) + 3)
+                    writer.write(
+                        struct.pack('>HHHB', tid, 0,
+                                    len(response) + 1, unit) + response)
+
+        return await asyncio.start_server(connection, host, port)
+
+
+async def simulated_psu(clock=None, slave_id=1, load_ohms=10.0, ocp=False):
+    """Serve a SimulatedPSU on a pseudo-terminal from the running loop and
+    connect an AsyncPSU to it
+
+    Give a driver running in the same loop the same clock, e.g. a
+    VirtualClock to run a sequence on simulated time.
+
+    Returns (simulator, connected AsyncPSU)
+    """
+    simulator = Simulator(
+        [SimulatedPSU(slave_id, load_ohms=load_ohms, ocp=ocp)], clock=clock)
+    ps = AsyncPSU(await simulator.serve_pty(), slave_id=slave_id)
+    await ps.connect()
+    return simulator, ps
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description='Simulated LW-3010EC power supplies')
+    parser.add_argument('--pty',
+                        action='store_true',
+                        help='serve Modbus RTU on a pseudo-terminal')
+    parser.add_argument('--tcp',
+                        type=int,
+                        metavar='PORT',
+                        help='serve on a loopback TCP port')
+    parser.add_argument('--framing',
+                        choices=('tcp', 'rtu'),
+                        default='tcp',
+                        help='framing used on the TCP port')
+    parser.add_argument('--slaves',
+                        default='1',
+                        help='comma separated slave addresses (default 1)')
+    parser.add_argument('--load',
+                        type=float,
+                        default=10.0,
+                        help='load resistance in ohms (default 10)')
+    parser.add_argument('--ocp',
+                        action='store_true',
+                        help='trip the output instead of current limiting')
+    parser.add_argument('--no-latency',
+                        action='store_true',
+                        help='answer at once instead of at 9600 baud speed')
+    args = parser.parse_args()
+
+    supplies = [
+        SimulatedPSU(int(slave_id), load_ohms=args.load, ocp=args.ocp)
+        for slave_id in args.slaves.split(',')
+    ]
+    simulator = Simulator(supplies, latency=not args.no_latency)
+
+    if not args.pty and args.tcp is None:
+        parser.error('choose --pty and/or --tcp PORT')
+    if args.pty:
+        print(f'Serving Modbus RTU on {await simulator.serve_pty()}')
+    if args.tcp is not None:
+        await simulator.serve_tcp(port=args.tcp, framing=args.framing)
+        print(f'Serving {args.framing} framing on 127.0.0.1:{args.tcp}')
+
+    await asyncio.Event().wait()
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,334 @@
+#! /usr/bin/env python
+"""Automated I-V sweeps of a device on the LW-3010EC
+
+The voltage, or current limit, is stepped through a list of set points.
+After each write the delivered U and I are read back until consecutive
+readings agree, and the last of those settle readings is the measurement,
+so no fixed delay is needed and no extra read is spent on it.  Frames are
+not overlapped, as nothing else may be sent on the half duplex bus while a
+response is due: the next set point is written as soon as a point settles.
+A point whose set point write fails is recorded unsettled, and the sweep
+stops when the supply's circuit breaker opens.
+
+Results are NumPy arrays with a least squares resistance fit, knee point
+and CSV export.
+
+e.g.
+    ./PS3010EC_Sweep.py --start 0 --stop 12 --step 0.1 --limit 0.5 \\
+        --port /dev/ttyUSB0 --output iv.csv
+    ./PS3010EC_Sweep.py --start 0 --stop 12 --limit 0.5 --simulate
+"""
+
+import argparse
+import asyncio
+import numpy as np
+from PS3010EC_Clock import RealClock, VirtualClock
+from PS3010EC_Modbus import PSU, AsyncPSU, PSU_Exception
+
+
+def raw_set_points(set_points, limit):
+    """Set points in V or A as raw register values
+
+    Raises a ValueError if there are none, they do not rise or fall in
+    order, or they are outside 0 to limit (raw)
+    """
+    set_points = np.asarray(set_points, dtype=float)
+    if set_points.ndim != 1 or len(set_points) == 0:
+        raise ValueError('no set points to sweep')
+    steps = np.diff(set_points)
+    if not (np.all(steps >= 0) or np.all(steps <= 0)):
+        raise ValueError('set points must rise or fall in order')
+    raw_points = np.rint(set_points * 100).astype(int)
+    if raw_points.min() < 0 or raw_points.max() > limit:
+        raise ValueError(f'set points must be within 0-{limit / 100:g}')
+    return raw_points
+
+
+class SweepResult():
+    """Set points and the delivered U (V), I (A) and regulation mode at each
+
+    Attributes are NumPy arrays of one entry per point: set_points, u, i,
+    mode, settled (False where the readings never agreed before the
+    timeout, or the set point was not written) and seconds (time spent on
+    the point).  u and i are NaN, and mode -1, for points not measured.
+    """
+
+    def __init__(self, sweep, set_points, u, i, mode, settled, seconds):
+        self.sweep = sweep
+        self.set_points = set_points
+        self.u = u
+        self.i = i
+        self.mode = mode
+        self.settled = settled
+        self.seconds = seconds
+
+    def __len__(self):
+        return len(self.set_points)
+
+    def resistance(self, mask=None):
+        """Least squares fit of U = R * I + offset
+
+        Args:
+            * mask (ndarray): Points to fit, default every settled point
+              with current flowing in the regulation mode swept, CV for a
+              voltage sweep and CC for a current sweep
+
+        Returns (R in ohms, offset in V), NaN if there are too few points
+        """
+        if mask is None:
+            swept_mode = (PSU.RegulationMode.VOLTAGE if self.sweep
+                          == 'voltage' else PSU.RegulationMode.CURRENT)
+            mask = self.settled & (self.mode == swept_mode) & (self.i > 0)
+        i = self.i[mask]
+        u = self.u[mask]
+        if len(i) < 2 or np.ptp(i) == 0:
+            return float('nan'), float('nan')
+        slope, offset = np.polyfit(i, u, 1)
+        return float(slope), float(offset)
+
+    def knee(self):
+        """Index of the knee of the I-V curve, None if there are too few
+        points
+
+        The point of the response (I for a voltage sweep, U for a current
+        sweep) against the set point furthest from the straight line
+        joining the first and last points, both scaled to 0-1: where a
+        diode starts to conduct, or where a load moves the supply from CV
+        to CC.
+        """
+        if len(self) < 3:
+            return None
+        response = self.i if self.sweep == 'voltage' else self.u
+        x = self.set_points - self.set_points[0]
+        y = response - response[0]
+        x = x / (np.ptp(x) or 1.0)
+        y = y / (np.ptp(y) or 1.0)
+        # Distance from the chord, up to a constant factor
+        distance = np.abs(x * y[-1] - y * x[-1])
+        return int(np.argmax(distance))
+
+    def to_csv(self, path):
+        """Write set point, U, I, mode, settled and seconds per point"""
+        unit = 'V' if self.sweep == 'voltage' else 'A'
+        np.savetxt(path,
+                   np.column_stack((self.set_points, self.u, self.i,
+                                    self.mode, self.settled, self.seconds)),
+                   fmt=('%.2f', '%.2f', '%.2f', '%d', '%d', '%.3f'),
+                   delimiter=',',
+                   header=f'set_{unit},u_V,i_A,mode,settled,seconds',
+                   comments='')
+
+
+class Sweep():
+    """Steps one set point of an AsyncPSU and records the response
+
+    Args:
+        * ps (AsyncPSU): Connected supply
+        * sweep (str): 'voltage' to step U_WRITE, 'current' to step I_WRITE
+        * tolerance (int): Raw counts consecutive U and I readings may
+          differ by and count as settled, 2 is 0.02 V or A
+        * settle_readings (int): Consecutive agreeing readings needed
+        * timeout (float): Seconds before a point is recorded unsettled
+        * retry_pause (float): Seconds to wait after a failed reading
+        * clock: RealClock, or the VirtualClock of a simulator to run on
+          simulated time
+
+    e.g.
+        result = await Sweep(ps).run(np.arange(0, 12.01, 0.1))
+        print(result.resistance())
+    """
+
+    def __init__(self,
+                 ps,
+                 sweep='voltage',
+                 tolerance=2,
+                 settle_readings=3,
+                 timeout=2.0,
+                 retry_pause=0.05,
+                 clock=None):
+        if sweep not in ('voltage', 'current'):
+            raise ValueError(f'sweep is voltage or current, not {sweep}')
+        self.ps = ps
+        self.sweep = sweep
+        self.register = (PSU.Registers.U_WRITE
+                         if sweep == 'voltage' else PSU.Registers.I_WRITE)
+        self.limit = (PSU.RawLimits.VOLTAGE
+                      if sweep == 'voltage' else PSU.RawLimits.CURRENT)
+        self.tolerance = tolerance
+        self.settle_readings = settle_readings
+        self.timeout = timeout
+        self.retry_pause = retry_pause
+        self.clock = clock if clock is not None else RealClock()
+
+    async def _settle(self):
+        """Read U, I, output and mode until settle_readings agree
+
+        Returns (the last reading, settled).  Gives up unsettled when the
+        circuit breaker of the supply opens.
+        """
+        deadline = self.clock.now() + self.timeout
+        last = None
+        agreeing = 0
+
+        while True:
+            # U_READ, I_READ, RUNSTOP_READ and CC_CV_OC_READ in one frame
+            reading = await self.ps.read(PSU.Registers.U_READ, len=4)
+            if reading is not None:
+                if (last is not None
+                        and abs(reading[0] - last[0]) <= self.tolerance
+                        and abs(reading[1] - last[1]) <= self.tolerance
+                        and reading[3] == last[3]):
+                    agreeing += 1
+                else:
+                    agreeing = 1
+                last = reading
+                if agreeing >= self.settle_readings:
+                    return last, True
+            elif self.ps.breaker.is_open:
+                return last, False
+            else:
+                # A refused request returns without waiting, so pause rather
+                # than spin until the deadline
+                await self.clock.sleep(self.retry_pause)
+            if self.clock.now() >= deadline:
+                return last, False
+
+    async def run(self, set_points):
+        """Sweep the set points, in V or A, returning a SweepResult.  See
+        raw_set_points for the ValueErrors raised"""
+        set_points = np.asarray(set_points, dtype=float)
+        raw_points = raw_set_points(set_points, self.limit)
+
+        count = len(raw_points)
+        u = np.full(count, np.nan)
+        i = np.full(count, np.nan)
+        mode = np.full(count, -1, dtype=int)
+        settled = np.zeros(count, dtype=bool)
+        seconds = np.zeros(count)
+
+        for n, raw in enumerate(raw_points.tolist()):
+            started = self.clock.now()
+            async with self.ps.batch() as transaction:
+                await self.ps.write(self.register, raw)
+            if not transaction.errors:
+                # Readings after a failed write are of the last level
+                reading, settled[n] = await self._settle()
+                if reading is not None:
+                    u[n] = reading[0] / 100
+                    i[n] = reading[1] / 100
+                    mode[n] = reading[3]
+            seconds[n] = self.clock.now() - started
+            if self.ps.breaker.is_open:
+                break
+
+        return SweepResult(self.sweep, set_points, u, i, mode, settled,
+                           seconds)
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description='I-V sweep of a device on an LW-3010EC')
+    parser.add_argument('--start', type=float, required=True, help='first set point')
+    parser.add_argument('--stop', type=float, required=True, help='last set point')
+    parser.add_argument('--step', type=float, default=0.1, help='set point step')
+    parser.add_argument('--current',
+                        action='store_true',
+                        help='sweep the current limit instead of the voltage')
+    parser.add_argument('--limit',
+                        type=float,
+                        required=True,
+                        help='current limit (A) for a voltage sweep, or '
+                        'voltage (V) for a current sweep')
+    parser.add_argument('--output', help='CSV results file')
+    parser.add_argument('--leave-on',
+                        action='store_true',
+                        help='leave the output on after the sweep')
+    parser.add_argument('--port',
+                        help='serial port (default: search for the supply)')
+    parser.add_argument('--host', help='Modbus TCP host instead of serial')
+    parser.add_argument('--tcp-port',
+                        type=int,
+                        default=502,
+                        help='Modbus TCP port (default 502)')
+    parser.add_argument('--framing',
+                        choices=('tcp', 'rtu'),
+                        default='tcp',
+                        help='framing used on the TCP port')
+    parser.add_argument('--slave', type=int, default=1, help='slave address')
+    parser.add_argument('--simulate',
+                        action='store_true',
+                        help='sweep a simulated supply and load on '
+                        'simulated time')
+    args = parser.parse_args()
+
+    if args.step <= 0:
+        parser.error('--step must be more than 0')
+    step = args.step if args.stop >= args.start else -args.step
+    set_points = np.arange(args.start, args.stop + step / 2, step)
+    try:
+        raw_set_points(
+            set_points,
+            PSU.RawLimits.CURRENT if args.current else PSU.RawLimits.VOLTAGE)
+    except ValueError as e:
+        parser.error(str(e))
+
+    clock = None
+    try:
+        if args.simulate:
+            from PS3010EC_Simulator import simulated_psu
+            clock = VirtualClock()
+            _, ps = await simulated_psu(clock, slave_id=args.slave)
+        elif args.host:
+            ps = AsyncPSU(host=args.host,
+                          tcp_port=args.tcp_port,
+                          framing=args.framing,
+                          slave_id=args.slave)
+        else:
+            ps = AsyncPSU(args.port, slave_id=args.slave)
+        await ps.connect()
+    except (OSError, PSU_Exception) as e:
+        parser.exit(1, f'Cannot connect to the supply: {e}\n')
+
+    sweep = Sweep(ps, 'current' if args.current else 'voltage', clock=clock)
+    try:
+        async with ps.batch() as transaction:
+            if args.current:
+                await ps.set_voltage(args.limit)
+                await ps.set_current(set_points[0])
+            else:
+                await ps.set_current(args.limit)
+                await ps.set_voltage(set_points[0])
+            await ps.set_output(True)
+    except PSU_Exception as e:  # The --limit out of range
+        ps.close()
+        parser.exit(1, f'{e}\n')
+    if transaction.errors:
+        # Nothing after the failed write was sent, so the output is not on
+        ps.close()
+        parser.exit(
+            1, f'The supply did not accept the sweep setup: '
+            f'{transaction.errors[-1][1]}\n')
+
+    try:
+        result = await sweep.run(set_points)
+    finally:
+        if not args.leave_on:
+            await ps.set_output(False)
+        ps.close()
+
+    resistance, offset = result.resistance()
+    knee = result.knee()
+    print(f'{len(result)} points in {result.seconds.sum():.1f} s, '
+          f'{np.count_nonzero(~result.settled)} unsettled')
+    print(f'R = {resistance:.3f} ohm, offset {offset:.3f} V')
+    if knee is not None:
+        print(f'knee at {result.u[knee]:.2f} V {result.i[knee]:.2f} A')
+    if args.output:
+        result.to_csv(args.output)
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
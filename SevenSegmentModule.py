@@ -26,15 +26,24 @@ class SevenSegmentModule():
        The height and width of individual digits are provided by the caller and the
        tkinter frame containing the digits is expanded to include all the digits called for
 
+       By default the whole display is drawn on one canvas with one image item per
+       digit, and a digit is changed by pointing its item at another image from the
+       arrays.  With single_canvas=False each digit gets a canvas of its own holding all
+       ten images, one of them shown at a time.
+
        The geometry manager of choice is passed through to the created frame to allow the
        display module to be placed from the calling application.
     """
 
     # self._value
-    # self.valueFrame
+    # self.valueFrame                      # The canvas when single_canvas
+    # self.single_canvas
     # self.digits[0-3]['digit_value']
-    # self.digits[0-3]['canvas']
-    # self.digits[0-3]['canvas_images']
+    # self.digits[0-3]['shown']            # Index of the visible image, None if none
+    # self.digits[0-3]['glyphs']           # single_canvas: images zero through nine
+    # self.digits[0-3]['item']             # single_canvas: image item of the digit
+    # self.digits[0-3]['canvas']           # otherwise: canvas of the digit
+    # self.digits[0-3]['canvas_images']    # otherwise: image items zero through nine
     # self.max_value
     # self.places
     # self.point_position
@@ -47,17 +56,38 @@ class SevenSegmentModule():
                  images_ndp,
                  max_value=None,
                  places=4,
-                 point_position=1):
+                 point_position=1,
+                 single_canvas=True):
         self._value = 0  # Starting value 0
-        self.valueFrame = tk.Frame(parent_frame)
         self.max_value = max_value
         self.places = places
         self.point_position = point_position
+        self.single_canvas = single_canvas
         self.digits = []
 
+        if self.single_canvas:
+            self.valueFrame = tk.Canvas(parent_frame,
+                                        width=width * self.places,
+                                        height=height,
+                                        highlightthickness=0)
+            for ci in range(0, self.places):
+                self.digits.append(dict())
+                self.digits[-1]['digit_value'] = 0
+                self.digits[-1]['shown'] = None
+                # This is the decimal point column.  Need images with decimal point
+                self.digits[-1]['glyphs'] = (images_dp if ci == self.point_position
+                                             else images_ndp)
+                self.digits[-1]['item'] = self.valueFrame.create_image(
+                    ci * width, 0, anchor="nw", state='hidden')
+
+            self._update_display()
+            return
+
+        self.valueFrame = tk.Frame(parent_frame)
         for ci in range(0, self.places):
             self.digits.append(dict())
             self.digits[-1]['digit_value'] = 0
+            self.digits[-1]['shown'] = None
             self.digits[-1]['canvas'] = tk.Canvas(self.valueFrame,
                                                   width=width,
                                                   height=height,
@@ -137,13 +167,25 @@ class SevenSegmentModule():
             self.digits[i]['digit_value'] = int(raw_string[i])
 
         for digit in self.digits:
-            # Move all the images out of sight
-            for image in digit['canvas_images']:
-                digit['canvas'].itemconfig(image, state='hidden')
-
-            # Show the new value
-            digit['canvas'].itemconfig(
-                digit['canvas_images'][digit['digit_value']], state='normal')
+            # Only digits whose value changed are touched, so an unchanged
+            # display costs no Tk calls
+            if digit['shown'] == digit['digit_value']:
+                continue
+
+            if self.single_canvas:
+                # Point the digit's item at the image of the new value
+                self.valueFrame.itemconfig(
+                    digit['item'],
+                    image=digit['glyphs'][digit['digit_value']],
+                    state='normal')
+            else:
+                # Move the old image out of sight and show the new value
+                if digit['shown'] is not None:
+                    digit['canvas'].itemconfig(
+                        digit['canvas_images'][digit['shown']], state='hidden')
+                digit['canvas'].itemconfig(
+                    digit['canvas_images'][digit['digit_value']], state='normal')
+            digit['shown'] = digit['digit_value']
 
     # Pass the geometry manager calls through to the frame to allow placement
     def pack(self, *args, **kwargs):
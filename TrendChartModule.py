@@ -0,0 +1,133 @@
+import tkinter as tk
+import numpy as np
+
+
+class TrendChartModule():
+    """TrendChartModule plots the recent history of one or more columns of a
+       SampleHistory as lines on a Tk Canvas
+
+       Each series is scaled so 0 to its full_scale fills the chart height and
+       the newest span seconds fill the width.  Samples are decimated to the
+       minimum and maximum of each pixel column, so a line never has more
+       than two points per pixel however many samples are in the window.
+
+       The canvas items are created once and moved with coords() on each
+       update_chart() call, so redrawing costs the same for 100 samples
+       or 10 million.
+
+       The geometry manager of choice is passed through to the created canvas
+       to allow the chart to be placed from the calling application.
+    """
+
+    # self.canvas
+    # self.width
+    # self.height
+    # self.span
+    # self.series[]['column']
+    # self.series[]['full_scale']
+    # self.series[]['line']
+
+    def __init__(self,
+                 parent_frame,
+                 height,
+                 width,
+                 series,
+                 span=60.0,
+                 background='gray24',
+                 grid_color='dim gray'):
+        """
+        Args:
+            * parent_frame (widget): Parent of the canvas
+            * height (int): Canvas height in pixels
+            * width (int): Canvas width in pixels
+            * series (list): dicts with 'column' (SampleHistory column),
+              'full_scale' (raw value at the top), 'color' and 'label'
+            * span (float): Seconds across the chart
+            * background (str): Canvas color
+            * grid_color (str): Color of the grid lines
+        """
+        self.width = width
+        self.height = height
+        self.span = span
+        self.canvas = tk.Canvas(parent_frame,
+                                width=width,
+                                height=height,
+                                background=background,
+                                highlightthickness=0)
+
+        # Quarter scale grid lines
+        for n in range(1, 4):
+            y = n * height // 4
+            self.canvas.create_line(0, y, width, y, fill=grid_color, dash=(2, 4))
+
+        self.series = []
+        for n, s in enumerate(series):
+            self.series.append(dict(s))
+            self.series[-1]['line'] = self.canvas.create_line(0,
+                                                              0,
+                                                              0,
+                                                              0,
+                                                              fill=s['color'],
+                                                              state='hidden')
+            self.canvas.create_text(6 + 70 * n,
+                                    4,
+                                    text=s['label'],
+                                    fill=s['color'],
+                                    anchor='nw')
+        self.canvas.create_text(width - 6,
+                                height - 4,
+                                text=f"{span:g} s",
+                                fill=grid_color,
+                                anchor='se')
+
+    @staticmethod
+    def decimate(timestamps, values, start, width, span):
+        """Pixel (x, y) pairs, flattened, of the minimum and maximum value
+        in each pixel column
+
+        Args:
+            * timestamps (ndarray): Sorted sample times
+            * values (ndarray): Sample values
+            * start (float): Time at the left edge of the chart
+            * width (int): Pixel columns across the chart
+            * span (float): Seconds across the chart
+        """
+        columns = ((timestamps - start) * (width / span)).astype(np.intp)
+        np.clip(columns, 0, width - 1, out=columns)
+        # First sample of each pixel column
+        firsts = np.flatnonzero(np.diff(columns, prepend=-1))
+
+        points = np.empty((len(firsts), 4))
+        points[:, 0] = points[:, 2] = columns[firsts]
+        points[:, 1] = np.maximum.reduceat(values, firsts)
+        points[:, 3] = np.minimum.reduceat(values, firsts)
+        return points
+
+    def update_chart(self, history):
+        """Redraw from a SampleHistory, the newest sample at the right edge"""
+        latest = history.latest_timestamp
+        if latest is None:
+            for s in self.series:
+                self.canvas.itemconfig(s['line'], state='hidden')
+            return
+
+        start = latest - self.span
+        window = history.window(start)
+        for s in self.series:
+            points = self.decimate(window['timestamp'], window[s['column']],
+                                   start, self.width, self.span)
+            # Values to pixels, 0 at the bottom and full_scale at the top
+            points[:, 1::2] *= -(self.height - 1) / s['full_scale']
+            points[:, 1::2] += self.height - 1
+            self.canvas.coords(s['line'], points.ravel().tolist())
+            self.canvas.itemconfig(s['line'], state='normal')
+
+    # Pass the geometry manager calls through to the canvas to allow placement
+    def pack(self, *args, **kwargs):
+        self.canvas.pack(*args, **kwargs)
+
+    def place(self, *args, **kwargs):
+        self.canvas.place(*args, **kwargs)
+
+    def grid(self, *args, **kwargs):
+        self.canvas.grid(*args, **kwargs)
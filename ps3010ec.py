@@ -1,1346 +1,109 @@
 #! /usr/bin/env python
 
+import time
+
+STARTED = time.perf_counter()  # Before the imports, for --profile-startup
+
+import os
 import sys
 import asyncio
-import os
-import tkinter as tk
-from tkinter import ttk
-from ttkwidgets import tooltips
+import argparse
 import configparser
-from PS3010EC_Modbus import PSU
-from PIL import Image, ImageTk
-from SevenSegmentModule import SevenSegmentModule
-
-
-class App(tk.Tk):
-    """The root window for the application"""
-
-    # Application variables
-
-    # self.config
-    # self.root_frame
-    # self.polled_values
-    # self.set_by_app
-    # self.number_images = dict()
-    # self.label_frame_images = dict()
-    # self.label_status_images = dict()
-    # self.label_images = dict()
-    # self.button_images = dict()
-    # self.radiobutton_images = dict()
-    # self.checkbutton_images = dict()
-
-    # self.frames={}  #Keys here are the sections of the interface e.g. 'U', 'I', etc.
-
-    # # The following dictionary pattern is used for the 'U' and 'I' sections
-    # self.frames['U' or 'I']['frame']
-    # self.frames['U' or 'I']['display']
-    # self.frames['U' or 'I']['reg_mode_banner']
-    # self.frames['U' or 'I']['reg_mode_banner_text']
-
-    # self.frames['RS']['frame']
-    # self.frames['RS']['run_stop_button']
-
-    # self.frames['SetU' or 'SetI']['frame']
-    # self.frames['SetU' or 'SetI']['display']
-    # self.frames['SetU' or 'SetI']['digits_up_buttons'][0-2]
-    # self.frames['SetU' or 'SetI']['digits_down_buttons'][0-2]
-
-    # self.frames['SetMode']['frame']
-    # self.frames['SetMode']['mode_label']
-
-    # self.frames['SetCmd']['frame']
-    # self.frames['SetCmd']['off_before_change']
-    # self.frames['SetCmd']['off_before_change_checkbutton']
-    # self.frames['SetCmd']['on_after_change']
-    # self.frames['SetCmd']['on_after_change_checkbutton']
-    # self.frames['SetCmd']['apply_button']
+import threading
+from PS3010EC_Modbus import AsyncPSU, PSU_Exception, CONFIG_PATH
+from PS3010EC_Scheduler import EventScheduler
 
-    # self.frames['Config']['frame']
-    # self.frames['Config']['subframes']= dict()   # Either 'serial' or 'network'
-    # self.frames['Config']['comm_method_buttons]
-    # self.frames['Config']['comm_method_text]
-    # self.frames['Config']['comm_text_box']
-    # self.frames['Config']['ipaddr_text_box']
-    # self.frames['Config']['port_text_box']
-    # self.frames['Config']['connect_button']
-    # self.frames['Config']['quit_button']
-    # self.frames['Config']['find_button']
-    # self.frames['Config']['save_config_button']
-    # self.frames['Config']['connection_status']
+# The Tk window (PS3010EC_GUI.App) is only imported when it is shown, so
+# --headless runs without tkinter, PIL or ttkwidgets.  pymodbus and pyserial
+# are imported by PS3010EC_Modbus when the PSU is created, after the window
+# has been drawn.
 
-    # self.frames['Mem']['frame']
-    # self.frames['Mem']['registers'][0-4]['U']              # Register 0 is the PS value
-    # self.frames['Mem']['registers'][0-4]['U']['display']   # Registers 1-4 are local app registers
-    # self.frames['Mem']['registers'][0-4]['I']
-    # self.frames['Mem']['registers'][0-4]['I']['display']
-    # self.frames['Mem']['registers'][0-4]['sto_button']
-    # self.frames['Mem']['registers'][0-4]['rcl_button']
+# With the window shown Tk's mainloop runs in the main thread and asyncio in
+# a thread of its own.  Commands reach asyncio through App.send_command and
+# polled values reach Tk through App.post, so both threads sleep until there
+# is something to do.  The window is shown first and the PSU found and
+# connected in the background (PSUConnection), so it opens with no supply.
 
-    def __init__(self, title, geometry):
-        """ The application is for a Programmable Power Supply(PS) Control Interface
-        for the Longwei LW-3010EC and similar
 
-        The PS will switch between Constant Voltage (CV) and Constant Current (CC)
-        regulation modes as well as Over Current Protection Mode
+class SampleWriter():
+    """Writes polled values as CSV lines in place of the GUI
 
-        The Present Voltage or Present Current frames will modify their background
-        color and update a status display to indicate which mode the PS is in.
+    Used by event_dispatcher wherever the App would be, through the same
+    update_last_polled_value() call
+    """
 
-        If the Over Current Protection (OCP) trips the ouput will be disabled by the
-        PS firwmare.  Since there is no Modbus registers for the OCP controls any
-        OCP errors or setting must be done from the device interface
+    HEADER = 'time,set_u,set_i,u,i,output,mode'
 
-        The configuration file for communication and memory registers is at
-        ~/.config/ps3010ec/config.ini
+    def __init__(self, outfile):
         """
-
-        super().__init__()
-        self.title(title)
-        self.resizable(False, False)
-        try:
-            self.root_width, self.root_height = geometry.split('x')
-            #print(f"self.rood_width: {self.root_width}, self.root_height: {self.root_height}")
-        except ValueError as e:
-            print(f"Geometry value could not be parsed.  geometry: {geometry}")
-            sys.exit(1)
-
-        try:
-            self.config = configparser.ConfigParser()
-            self.config_path = os.path.join(os.path.expanduser('~'),
-                                            '.config/ps3010ec/config.ini')
-            self.config.read(self.config_path)
-
-        except configparser.Error as e:
-            print(repr(e))
-            print(e)
-            sys.exit(1)
-
-        # Attach the quit message to the Window Manager close icon
-        self.protocol('WM_DELETE_WINDOW', self.send_appQuit_to_queue)
-
-        # Colors used by the GUI and bitmaps
-        # 'black'            #000000
-        # 'chocolate1'       #ff7f24
-        # 'darkorange4'      #8b4500
-        # 'dim gray'         #696969
-        # 'gray'             #bebebe
-        # 'gray24'           #3d3d3d
-        # 'gray90'           #e5e5e5
-        # 'lemon chiffon'    #fffacd
-        # 'light steel blue' #b0c4de
-        # 'firebrick3'       #cd2626
-        # 'seagreen1'        #54ff9f
-        # 'steel blue'       #4682b4
-        # 'steelblue2'       #5cacee
-        # 'steelblue3'       #4f94cd
-        # 'steelblue4'       #36648b
-        # 'white'            #ffffff
-
-        # Colors, Fonts, and Styles for the GUI
-        self.dbg = 'chocolate1'  #Default background
-        self.dfg = 'gray24'  #Default foreground
-        self.sbg = 'darkorange4'  #Selected background
-        self.sfg = 'lemon chiffon'  #Selected foreground
-
-        self.ps_style = ttk.Style()
-
-        self.ps_style.configure('TFrame', background='gray')
-
-        self.ps_style.configure('Root.TFrame', background='dim gray')
-
-        self.ps_style.configure('ActiveRegMode.TFrame',
-                                background='steelblue3')
-        self.ps_style.configure('ErrorRegMode.TFrame', background='firebrick3')
-        self.ps_style.configure('SetByAppMode.TFrame',
-                                background='steelblue2',
-                                borderwidth=-1)
-        self.ps_style.configure('SetByPSMode.TFrame',
-                                background='dim gray',
-                                borderwidth=-1)
-
-        self.ps_style.configure('CommMethod.TFrame',
-                                background='gray',
-                                borderwidth=-1,
-                                anchor='center',
-                                stick='nsew')
-
-        self.ps_style.configure('TLabel',
-                                anchor='center',
-                                sticky='nsew',
-                                foreground=self.dfg,
-                                background=self.dbg,
-                                borderwidth=-1)
-        self.ps_style.configure('FrameLabel.TLabel',
-                                foreground='steel blue',
-                                background='light steel blue',
-                                borderwidth=-1)
-
-        self.ps_style.configure('TButton',
-                                anchor='nw',
-                                sticky='nsew',
-                                foreground=self.dfg,
-                                background=self.dbg,
-                                padding=0,
-                                borderwidth=-1)
-        self.ps_style.map('TButton', background=[('active', self.sbg)])
-        self.ps_style.map('TButton', foreground=[('active', self.sfg)])
-
-        self.ps_style.configure('TCheckbutton',
-                                justify='center',
-                                foreground=self.dfg,
-                                background=self.dbg)
-
-        self.ps_style.map('TCheckbutton', background=[('active', self.sbg)])
-        self.ps_style.map('TCheckbutton', foreground=[('active', self.sfg)])
-
-        self.ps_style.configure('CommMethod.TRadiobutton',
-                                anchor='nw',
-                                sticky='nsew',
-                                foreground=self.dfg,
-                                background=self.dbg,
-                                padding=0,
-                                margin=0,
-                                borderwidth=-1,
-                                highlightthickness=-1)
-        self.ps_style.map('CommMethod.TRadiobutton',
-                          background=[('active', self.sbg)])
-        self.ps_style.map('CommMethod.TRadiobutton',
-                          foreground=[('active', self.sfg)])
-
-        self.ps_style.configure('TEntry',
-                                foreground=self.dfg,
-                                fieldbackground=self.dbg,
-                                selectbackground=self.sbg,
-                                selectforeground=self.sfg)
-
-        # End Colors, Fonts, and Styles for the GUI
-
-        self.root_frame = ttk.Frame(self,
-                                    width=self.root_width,
-                                    height=self.root_height,
-                                    style='Root.TFrame')
-        self.root_frame.grid(sticky='nsew')
-
-        # holding Queue for command to be passed over to PSU
-        self.holdingQ = []
-
-        self.set_by_app = False
-        # When False the SetU and SetI displays won't show the displayed value
-        # even if the PS controls change the settings.  This allows the SetU
-        # and SetI controls on the Application to be independant of the PS.
-        # To reset to True (and display # the set values from the PS restore
-        # from the "PS" register in the Memory frame
-
-        # Hold the values polled from the power supply
-        self.polled_values = {}
-        self.polled_values['U'] = {}
-        self.polled_values['U']['last_polled_value'] = 0
-        self.polled_values['I'] = {}
-        self.polled_values['I']['last_polled_value'] = 0
-        self.polled_values['SetU'] = {}
-        self.polled_values['SetU']['last_polled_value'] = 0
-        self.polled_values['SetI'] = {}
-        self.polled_values['SetI']['last_polled_value'] = 0
-        self.polled_values['RunStop'] = {}
-        self.polled_values['RunStop'][
-            'last_polled_value'] = 0xFF  # Invalid value, forces update on GUI startup
-        self.polled_values['RegMode'] = {}
-        self.polled_values['RegMode'][
-            'last_polled_value'] = 0xFF  # Invalid value, forces update on GUI startup
-
-        # bitmap images of digits passed to the 7SegmentDisplay objects
-        self.number_images = dict()
-        for size in ('l', 'm', 's'):
-            self.number_images[size] = dict()
-            for ordinal in ('d', 'nd'):
-                self.number_images[size][ordinal] = list()
-                for i in range(0, 10):
-                    self.number_images[size][ordinal].append(
-                        ImageTk.PhotoImage(
-                            file=f"assets/digit-{i}-{ordinal}-{size}.png"))
-
-        # GUI bitmaps
-        self.label_frame_images = dict()
-        self.label_frame_images['voltage'] = ImageTk.PhotoImage(
-            file=f"assets/label-voltage.png")
-        self.label_frame_images['current'] = ImageTk.PhotoImage(
-            file=f"assets/label-current.png")
-        self.label_frame_images['output'] = ImageTk.PhotoImage(
-            file=f"assets/label-output.png")
-        self.label_frame_images['setvoltage'] = ImageTk.PhotoImage(
-            file=f"assets/label-setvoltage.png")
-        self.label_frame_images['setcurrent'] = ImageTk.PhotoImage(
-            file=f"assets/label-setcurrent.png")
-        self.label_frame_images['set'] = ImageTk.PhotoImage(
-            file=f"assets/label-set.png")
-        self.label_frame_images['set_mode'] = ImageTk.PhotoImage(
-            file=f"assets/label-set_mode.png")
-        self.label_frame_images['set_mode_blank'] = ImageTk.PhotoImage(
-            file=f"assets/label-set_mode-blank.png")
-        self.label_frame_images['configuration'] = ImageTk.PhotoImage(
-            file=f"assets/label-configuration.png")
-        self.label_frame_images['memory'] = ImageTk.PhotoImage(
-            file=f"assets/label-memory.png")
-
-        self.label_status_images = dict()
-        self.label_status_images['voltage-limited'] = ImageTk.PhotoImage(
-            file=f"assets/status-voltagelimited.png")
-        self.label_status_images['current-limited'] = ImageTk.PhotoImage(
-            file=f"assets/status-currentlimited.png")
-        self.label_status_images['hide-limited'] = ImageTk.PhotoImage(
-            file=f"assets/status-hidelimited.png")
-        self.label_status_images['ocp-u'] = ImageTk.PhotoImage(
-            file=f"assets/status-ocp-u.png")
-        self.label_status_images['ocp-i'] = ImageTk.PhotoImage(
-            file=f"assets/status-ocp-i.png")
-        self.label_status_images['outputoff'] = ImageTk.PhotoImage(
-            file=f"assets/status-outputoff.png")
-        self.label_status_images['outputon'] = ImageTk.PhotoImage(
-            file=f"assets/status-outputon.png")
-
-        self.label_images = dict()
-        self.label_images['comm'] = ImageTk.PhotoImage(
-            file=f"assets/label-comm.png")
-        self.label_images['ipaddr'] = ImageTk.PhotoImage(
-            file=f"assets/label-ipaddr.png")
-        self.label_images['port'] = ImageTk.PhotoImage(
-            file=f"assets/label-port.png")
-        self.label_images['v'] = ImageTk.PhotoImage(file=f"assets/label-v.png")
-        self.label_images['i'] = ImageTk.PhotoImage(file=f"assets/label-i.png")
-        self.label_images['ps'] = ImageTk.PhotoImage(
-            file=f"assets/label-ps.png")
-        self.label_images['m1'] = ImageTk.PhotoImage(
-            file=f"assets/label-m1.png")
-        self.label_images['m2'] = ImageTk.PhotoImage(
-            file=f"assets/label-m2.png")
-        self.label_images['m3'] = ImageTk.PhotoImage(
-            file=f"assets/label-m3.png")
-        self.label_images['m4'] = ImageTk.PhotoImage(
-            file=f"assets/label-m4.png")
-
-        self.button_images = dict()
-        self.button_images['arrow-up'] = ImageTk.PhotoImage(
-            file=f"assets/button-arrow-up.png")
-        self.button_images['arrow-down'] = ImageTk.PhotoImage(
-            file=f"assets/button-arrow-down.png")
-        self.button_images['mem-store'] = ImageTk.PhotoImage(
-            file=f"assets/button-store.png")
-        self.button_images['mem-recall'] = ImageTk.PhotoImage(
-            file=f"assets/button-recall.png")
-        self.button_images['mem-recall-setfromapp'] = ImageTk.PhotoImage(
-            file=f"assets/button-recall-setfromapp.png")
-        self.button_images['button-conn'] = ImageTk.PhotoImage(
-            file=f"assets/button-conn.png")
-        self.button_images['button-disconn'] = ImageTk.PhotoImage(
-            file=f"assets/button-disconn.png")
-        self.button_images['button-save'] = ImageTk.PhotoImage(
-            file=f"assets/button-save.png")
-        self.button_images['button-quit'] = ImageTk.PhotoImage(
-            file=f"assets/button-quit.png")
-        self.button_images['button-find'] = ImageTk.PhotoImage(
-            file=f"assets/button-find.png")
-        self.button_images['button-apply'] = ImageTk.PhotoImage(
-            file=f"assets/button-apply.png")
-        self.button_images['button-run'] = ImageTk.PhotoImage(
-            file=f"assets/button-run.png")
-        self.button_images['button-stop'] = ImageTk.PhotoImage(
-            file=f"assets/button-stop.png")
-
-        self.radiobutton_images = dict()
-        self.radiobutton_images['serial'] = ImageTk.PhotoImage(
-            file=f"assets/radiobutton-serial.png")
-        self.radiobutton_images['network'] = ImageTk.PhotoImage(
-            file=f"assets/radiobutton-network.png")
-
-        self.checkbutton_images = dict()
-        self.checkbutton_images['off-before-change'] = ImageTk.PhotoImage(
-            file=f"assets/checkbutton-outputoffbeforechange.png")
-        self.checkbutton_images['on-after-change'] = ImageTk.PhotoImage(
-            file=f"assets/checkbutton-outputonafterchange.png")
-
-        # Root dictionary for all the elements of the visible frames and widgets
-        self.frames = {}
-
-        # Create and place the 9 major frames for the App
-        # The names of the sections come from the ModBus programming guide for the PS
-        # Except for 'SetMode' which is necessary to allow the GUI independant control
-        # Of the SetU and SetI displays.
-        self.frames['U'] = {}
-        self.frames['U']['frame'] = ttk.Frame(self.root_frame)
-        self.frames['U']['frame'].place(width=260, height=150, x=35, y=25)
-        self.frames['I'] = {}
-        self.frames['I']['frame'] = ttk.Frame(self.root_frame)
-        self.frames['I']['frame'].place(width=260, height=150, x=350, y=25)
-        self.frames['RS'] = {}
-        self.frames['RS']['frame'] = ttk.Frame(self.root_frame)
-        self.frames['RS']['frame'].place(width=135, height=150, x=630, y=25)
-        self.frames['SetU'] = {}
-        self.frames['SetU']['frame'] = ttk.Frame(self.root_frame)
-        self.frames['SetU']['frame'].place(width=203, height=170, x=66, y=190)
-        self.frames['SetI'] = {}
-        self.frames['SetI']['frame'] = ttk.Frame(self.root_frame)
-        self.frames['SetI']['frame'].place(width=203, height=170, x=381, y=190)
-        self.frames['SetMode'] = {}
-        self.frames['SetMode']['frame'] = ttk.Frame(self.root_frame,
-                                                    style='SetByPSMode.TFrame')
-        self.frames['SetMode']['frame'].place(width=112,
-                                              height=80,
-                                              x=269,
-                                              y=230)
-        self.frames['SetCmd'] = {}
-        self.frames['SetCmd']['frame'] = ttk.Frame(self.root_frame)
-        self.frames['SetCmd']['frame'].place(width=135,
-                                             height=170,
-                                             x=630,
-                                             y=190)
-        self.frames['Config'] = {}
-        self.frames['Config']['frame'] = ttk.Frame(self.root_frame)
-        self.frames['Config']['frame'].place(width=260,
-                                             height=200,
-                                             x=35,
-                                             y=375)
-
-        self.frames['Mem'] = {}
-        self.frames['Mem']['frame'] = ttk.Frame(self.root_frame)
-        self.frames['Mem']['frame'].place(width=415, height=200, x=350, y=375)
-
-        ####   ===============================================================
-
-        # The 'U' frame shows the voltage currently being delivered by the PS
-        # shorthand for clarity of code
-        pt = self.frames['U']
-        fpt = pt['frame']
-
-        ttk.Label(fpt,
-                  image=self.label_frame_images['voltage'],
-                  style='FrameLabel.TLabel').place(anchor='n', x=130, y=8)
-
-        # 'U' Display
-        pt['display'] = SevenSegmentModule(
-            fpt,
-            height=80,
-            width=56,
-            images_dp=self.number_images['l']['d'],
-            images_ndp=self.number_images['l']['nd'],
-            max_value=PSU.RawLimits.VOLTAGE)
-        pt['display'].place(anchor='center', x=130, y=75)
-
-        pt['subframes'] = {}
-
-        pt['subframes']['voltage-limited'] = ttk.Frame(fpt,
-                                                       width=244,
-                                                       height=18)
-        ttk.Label(pt['subframes']['voltage-limited'],
-                  image=self.label_status_images['voltage-limited']).pack()
-        pt['subframes']['voltage-limited'].place(anchor='s', x=130, y=140)
-
-        pt['subframes']['hide-limited'] = ttk.Frame(fpt, width=244, height=18)
-        ttk.Label(pt['subframes']['hide-limited'],
-                  image=self.label_status_images['hide-limited']).pack()
-        pt['subframes']['hide-limited'].place(anchor='s', x=130, y=140)
-
-        pt['subframes']['ocp'] = ttk.Frame(fpt, width=244, height=18)
-        ttk.Label(pt['subframes']['ocp'],
-                  image=self.label_status_images['ocp-u']).pack()
-        pt['subframes']['ocp'].place(anchor='s', x=130, y=140)
-
-        ####   ===============================================================
-
-        # The 'I' frame shows the current presently being delivered by the PS
-        # shorthand for clarity of code
-        pt = self.frames['I']
-        fpt = pt['frame']
-
-        ttk.Label(fpt,
-                  image=self.label_frame_images['current'],
-                  style='FrameLabel.TLabel').place(anchor='n', x=130, y=8)
-
-        # 'I' Display
-        pt['display'] = SevenSegmentModule(
-            fpt,
-            height=80,
-            width=56,
-            images_dp=self.number_images['l']['d'],
-            images_ndp=self.number_images['l']['nd'],
-            max_value=PSU.RawLimits.CURRENT)
-        pt['display'].place(anchor='center', x=130, y=75)
-
-        pt['subframes'] = {}
-
-        pt['subframes']['current-limited'] = ttk.Frame(fpt,
-                                                       width=244,
-                                                       height=18)
-        ttk.Label(pt['subframes']['current-limited'],
-                  image=self.label_status_images['current-limited']).pack()
-        pt['subframes']['current-limited'].place(anchor='s', x=130, y=140)
-
-        pt['subframes']['hide-limited'] = ttk.Frame(fpt, width=244, height=18)
-        ttk.Label(pt['subframes']['hide-limited'],
-                  image=self.label_status_images['hide-limited']).pack()
-        pt['subframes']['hide-limited'].place(anchor='s', x=130, y=140)
-
-        pt['subframes']['ocp'] = ttk.Frame(fpt, width=244, height=18)
-        ttk.Label(pt['subframes']['ocp'],
-                  image=self.label_status_images['ocp-i']).pack()
-        pt['subframes']['ocp'].place(anchor='s', x=130, y=140)
-
-        ####   ===============================================================
-
-        # The Run/Stop (aka RunStop or RS) frame provides the controls for turning the PS output on/off
-        # shorthand for clarity of code
-        pt = self.frames['RS']
-        fpt = pt['frame']
-
-        ttk.Label(fpt,
-                  image=self.label_frame_images['output'],
-                  style='FrameLabel.TLabel').place(anchor='n', x=67, y=10)
-
-        pt['run_stop_button'] = ttk.Button(
-            fpt,
-            image=self.button_images['button-run'],
-            command=self.send_toggleRS_to_queue)
-
-        pt['run_stop_button'].place(anchor='center',
-                                    x=67,
-                                    y=75,
-                                    width=96,
-                                    height=38)
-
-        pt['subframes'] = {}
-
-        pt['subframes']['outputoff'] = ttk.Frame(fpt, width=100, height=20)
-        pt['subframes']['outputoff'].place(anchor='s', x=67, y=140)
-        ttk.Label(pt['subframes']['outputoff'],
-                  image=self.label_status_images['outputoff']).pack()
-
-        pt['subframes']['outputon'] = ttk.Frame(fpt, width=100, height=20)
-        pt['subframes']['outputon'].place(anchor='s', x=67, y=140)
-        ttk.Label(pt['subframes']['outputon'],
-                  image=self.label_status_images['outputon']).pack()
-
-        ####   ===============================================================
-
-        # The 'SetU' frame shows the present Voltage Limit set point
-
-        # shorthand for clarity of code
-        pt = self.frames['SetU']
-        fpt = pt['frame']
-
-        ttk.Label(fpt,
-                  image=self.label_frame_images['setvoltage'],
-                  style='FrameLabel.TLabel').pack(side='top', pady=8)
-
-        # 'SetU' Display
-        pt['display'] = SevenSegmentModule(
-            fpt,
-            height=58,
-            width=40,
-            images_dp=self.number_images['m']['d'],
-            images_ndp=self.number_images['m']['nd'],
-            max_value=PSU.RawLimits.VOLTAGE)
-        pt['display'].place(anchor='center', x=102, y=70)
-
-        # 3 Up Buttons display for 'SetU'
-        pt['digits_up_buttons'] = []
-        # Button for ones position
-        pt['digits_up_buttons'].append(
-            ttk.Button(fpt,
-                       image=self.button_images['arrow-up'],
-                       command=self.inc_setu_by_one))
-        pt['digits_up_buttons'][-1].place(x=82,
-                                          y=120,
-                                          width=32,
-                                          height=22,
-                                          anchor='center')
-        # Button for tenths
-        pt['digits_up_buttons'].append(
-            ttk.Button(fpt,
-                       image=self.button_images['arrow-up'],
-                       command=self.inc_setu_by_tenth))
-        pt['digits_up_buttons'][-1].place(x=122,
-                                          y=120,
-                                          width=32,
-                                          height=22,
-                                          anchor='center')
-        # Button for hundreths
-        pt['digits_up_buttons'].append(
-            ttk.Button(fpt,
-                       image=self.button_images['arrow-up'],
-                       command=self.inc_setu_by_hundreth))
-        pt['digits_up_buttons'][-1].place(x=162,
-                                          y=120,
-                                          width=32,
-                                          height=22,
-                                          anchor='center')
-
-        # 3 Down Buttons display for 'SetU'
-        pt['digits_down_buttons'] = []
-        # Button for ones position
-        pt['digits_down_buttons'].append(
-            ttk.Button(fpt,
-                       image=self.button_images['arrow-down'],
-                       command=self.dec_setu_by_one))
-        pt['digits_down_buttons'][-1].place(x=82,
-                                            y=150,
-                                            width=32,
-                                            height=22,
-                                            anchor='center')
-        # Button for tenths
-        pt['digits_down_buttons'].append(
-            ttk.Button(fpt,
-                       image=self.button_images['arrow-down'],
-                       command=self.dec_setu_by_tenth))
-        pt['digits_down_buttons'][-1].place(x=122,
-                                            y=150,
-                                            width=32,
-                                            height=22,
-                                            anchor='center')
-        # Button for hundreths
-        pt['digits_down_buttons'].append(
-            ttk.Button(fpt,
-                       image=self.button_images['arrow-down'],
-                       command=self.dec_setu_by_hundreth))
-        pt['digits_down_buttons'][-1].place(x=162,
-                                            y=150,
-                                            width=32,
-                                            height=22,
-                                            anchor='center')
-
-        ####   ===============================================================
-
-        # The 'SetI' frame shows the present Current Limit set point
-        # shorthand for clarity of code
-        pt = self.frames['SetI']
-        fpt = pt['frame']
-
-        ttk.Label(fpt,
-                  image=self.label_frame_images['setcurrent'],
-                  style='FrameLabel.TLabel').pack(side='top', pady=8)
-
-        # 'SetI' Display
-        pt['display'] = SevenSegmentModule(
-            fpt,
-            height=58,
-            width=40,
-            images_dp=self.number_images['m']['d'],
-            images_ndp=self.number_images['m']['nd'],
-            max_value=PSU.RawLimits.CURRENT)
-        pt['display'].place(anchor='center', x=102, y=70)
-
-        # 3 Up Buttons display for 'SetI'
-        pt['digits_up_buttons'] = []
-        # Button for ones position
-        pt['digits_up_buttons'].append(
-            ttk.Button(fpt,
-                       image=self.button_images['arrow-up'],
-                       command=self.inc_seti_by_one))
-        pt['digits_up_buttons'][-1].place(x=82,
-                                          y=120,
-                                          width=32,
-                                          height=22,
-                                          anchor='center')
-        # Button for tenths
-        pt['digits_up_buttons'].append(
-            ttk.Button(fpt,
-                       image=self.button_images['arrow-up'],
-                       command=self.inc_seti_by_tenth))
-        pt['digits_up_buttons'][-1].place(x=122,
-                                          y=120,
-                                          width=32,
-                                          height=22,
-                                          anchor='center')
-        # Button for hundreths
-        pt['digits_up_buttons'].append(
-            ttk.Button(fpt,
-                       image=self.button_images['arrow-up'],
-                       command=self.inc_seti_by_hundreth))
-        pt['digits_up_buttons'][-1].place(x=162,
-                                          y=120,
-                                          width=32,
-                                          height=22,
-                                          anchor='center')
-
-        # 3 Down Buttons display for 'SetI'
-        pt['digits_down_buttons'] = []
-        # Button for ones position
-        pt['digits_down_buttons'].append(
-            ttk.Button(fpt,
-                       image=self.button_images['arrow-down'],
-                       command=self.dec_seti_by_one))
-        pt['digits_down_buttons'][-1].place(x=82,
-                                            y=150,
-                                            width=32,
-                                            height=22,
-                                            anchor='center')
-        # Button for tenths
-        pt['digits_down_buttons'].append(
-            ttk.Button(fpt,
-                       image=self.button_images['arrow-down'],
-                       command=self.dec_seti_by_tenth))
-        pt['digits_down_buttons'][-1].place(x=122,
-                                            y=150,
-                                            width=32,
-                                            height=22,
-                                            anchor='center')
-        # Button for hundreths
-        pt['digits_down_buttons'].append(
-            ttk.Button(fpt,
-                       image=self.button_images['arrow-down'],
-                       command=self.dec_seti_by_hundreth))
-        pt['digits_down_buttons'][-1].place(x=162,
-                                            y=150,
-                                            width=32,
-                                            height=22,
-                                            anchor='center')
-
-        ####   ===============================================================
-        # SetMode frame contains the label widgets that will appear when the
-        # SetU and SetI frames are reflecting local application values and
-        # are not being read from the PS
-        # See comments for self.set_by_app Boolean
-
-        pt = self.frames['SetMode']
-        fpt = pt['frame']
-
-        pt['subframes'] = {}
-
-        pt['subframes']['app_mode'] = ttk.Frame(fpt,
-                                                width=112,
-                                                height=80,
-                                                style='SetByAppMode.TFrame')
-        pt['subframes']['app_mode'].place(x=7, y=0)
-        pt['notice'] = ttk.Label(pt['subframes']['app_mode'],
-                                 image=self.label_frame_images['set_mode'])
-        pt['notice'].pack()
-
-        pt['subframes']['ps_mode'] = ttk.Frame(fpt,
-                                               width=112,
-                                               height=80,
-                                               style='SetByPSMode.TFrame')
-        pt['subframes']['ps_mode'].place(x=7, y=0)
-        pt['notice'] = ttk.Label(
-            pt['subframes']['ps_mode'],
-            image=self.label_frame_images['set_mode_blank'])
-        pt['notice'].pack()
-
-        ####   ===============================================================
-        # SetCmd frame contains the controls for pushing the values of SetU and SetI to
-        # be the active U and I for the power supply.
-
-        pt = self.frames['SetCmd']
-        fpt = pt['frame']
-
-        ttk.Label(fpt,
-                  image=self.label_frame_images['set'],
-                  style='FrameLabel.TLabel').place(anchor='n', x=68, y=8)
-
-        pt['off_before_change'] = tk.BooleanVar()
-        try:
-            self.config['set']
-            pt['off_before_change'].set(self.config['set'].get(
-                'output_off_before_change', False))
-        except KeyError:
-            pt['off_before_change'].set(False)
-
-        pt['off_before_change_checkbutton'] = ttk.Checkbutton(
-            fpt,
-            image=self.checkbutton_images['off-before-change'],
-            variable=pt['off_before_change'])
-        pt['off_before_change_checkbutton'].place(anchor='n',
-                                                  x=68,
-                                                  y=40,
-                                                  width=110,
-                                                  height=35)
-
-        pt['on_after_change'] = tk.BooleanVar()
-        try:
-            self.config['set']
-            pt['on_after_change'].set(self.config['set'].get(
-                'output_on_after_change', False))
-        except KeyError:
-            pt['on_after_change'].set(False)
-
-        pt['on_after_change_checkbutton'] = ttk.Checkbutton(
-            fpt,
-            image=self.checkbutton_images['on-after-change'],
-            variable=pt['on_after_change'])
-        pt['on_after_change_checkbutton'].place(anchor='n',
-                                                x=68,
-                                                y=85,
-                                                width=110,
-                                                height=35)
-        pt['apply_button'] = ttk.Button(
-            fpt,
-            image=self.button_images['button-apply'],
-            command=self.send_applySet_to_queue)
-        pt['apply_button'].place(anchor='s', x=68, y=160, width=60, height=30)
-
-        ####   ===============================================================
-
-        # Config Frame
-
-        # The configuration frame has multiple communication methods ('serial' and 'network')
-        # but only 'serial' works with the the PS3010EC as shipped by Longwei
-        # Comment out the button place() calls to show in GUI
-
-        pt = self.frames['Config']
-        fpt = pt['frame']
-
-        # pt['connection_status'] = True
-
-        # Place the frame label
-        ttk.Label(fpt,
-                  image=self.label_frame_images['configuration'],
-                  style='FrameLabel.TLabel').place(x=130,
-                                                   y=19,
-                                                   anchor='center')
-
-        ttk.Label(fpt,
-                  image=self.radiobutton_images['serial'],
-                  style='MemoryLabel.TLabel').place(x=12, y=50, anchor='w')
-
-        pt['comm_method_text'] = tk.StringVar()
-        pt['comm_method_text'].set('Serial')
-        pt['comm_method_buttons'] = []
-        for image, value, x in ((self.radiobutton_images['serial'], 'Serial',
-                                 52), (self.radiobutton_images['network'],
-                                       'Network', 208)):
-            pt['comm_method_buttons'].append(
-                ttk.Radiobutton(fpt,
-                                image=image,
-                                value=value,
-                                variable=pt['comm_method_text'],
-                                style='CommMethod.TRadiobutton',
-                                command=self.raise_command_method_frame))
-        #     pt['comm_method_buttons'][-1].place(x=x,
-        #                                         y=50,
-        #                                         anchor='center',
-        #                                         width=76,
-        #                                         height=18)
-
-        # create subframes for different comm methods
-        #    These frame will be swapped in and out depending on the button selection
-        pt['subframes'] = {}
-        for method in ('serial', 'network'):
-            pt['subframes'][method] = ttk.Frame(fpt,
-                                                width=234,
-                                                height=50,
-                                                style='CommMethod.TFrame')
-            pt['subframes'][method].place(x=130, y=95, anchor='center')
-
-        self.raise_command_method_frame(
-        )  # Make the serial frame the default shown
-
-        ttk.Label(pt['subframes']['serial'],
-                  image=self.label_images['comm'],
-                  style='FrameLabel.TLabel').place(x=0, y=10, anchor='w')
-        pt['comm_text_box'] = ttk.Entry(pt['subframes']['serial'], width=24)
-        pt['comm_text_box'].place(x=234, y=10, anchor='e')
-        try:
-            pt['comm_text_box'].insert(
-                tk.INSERT,
-                self.config['communication'].get('comm', '/dev/ttyUSB0'))
-        except KeyError:
-            pt['comm_text_box'].insert(tk.INSERT, '/dev/ttyUSB0')
-
-        ttk.Label(pt['subframes']['network'],
-                  image=self.label_images['ipaddr'],
-                  style='FrameLabel.TLabel').place(x=0, y=10, anchor='w')
-        pt['ipaddr_text_box'] = ttk.Entry(pt['subframes']['network'], width=24)
-        pt['ipaddr_text_box'].place(x=234, y=10, anchor='e')
-        pt['ipaddr_text_box'].insert(tk.INSERT, '127.0.0.1')
-
-        ttk.Label(pt['subframes']['network'],
-                  image=self.label_images['port'],
-                  style='FrameLabel.TLabel').place(x=0, y=40, anchor='w')
-        pt['port_text_box'] = ttk.Entry(pt['subframes']['network'], width=24)
-        pt['port_text_box'].place(x=234, y=40, anchor='e')
-        pt['port_text_box'].insert(tk.INSERT, '502')
-
-        # pt['connect_button'] = ttk.Button(
-        #     fpt,
-        #     image=self.button_images['button-disconn'],
-        #     command=self.update_connection_status_display)
-        # pt['connect_button'].place(x=248,
-        #                            y=140,
-        #                            height=30,
-        #                            width=60,
-        #                            anchor='e')
-
-        pt['quit_button'] = ttk.Button(fpt,
-                                       image=self.button_images['button-quit'],
-                                       command=self.send_appQuit_to_queue)
-        pt['quit_button'].place(x=10, y=175, height=30, width=60, anchor='w')
-
-        pt['save_config_button'] = ttk.Button(
-            fpt,
-            image=self.button_images['button-save'],
-            command=self.update_and_write_config_file)
-        pt['save_config_button'].place(x=248,
-                                       y=175,
-                                       height=30,
-                                       width=60,
-                                       anchor='e')
-
-        # pt['find_button'] = ttk.Button(fpt,
-        #                                image=self.button_images['button-find'],
-        #                                command=lambda: self.root_frame.quit())
-        # pt['find_button'].place(x=130,
-        #                         y=175,
-        #                         height=30,
-        #                         width=60,
-        #                         anchor='center')
-
-        ####   ===============================================================
-
-        # Memory Registers Frame
-        pt = self.frames['Mem']
-        fpt = pt['frame']
-        pt['registers'] = []
-        rpt = pt['registers']
-
-        # Fixed labels in frame
-        ttk.Label(fpt,
-                  image=self.label_frame_images['memory'],
-                  style='FrameLabel.TLabel').place(x=206,
-                                                   y=19,
-                                                   anchor='center')
-
-        ttk.Label(fpt,
-                  image=self.label_images['v'],
-                  style='MemoryLabel.TLabel').place(x=22,
-                                                    y=80,
-                                                    width=15,
-                                                    anchor='center')
-        ttk.Label(fpt,
-                  image=self.label_images['i'],
-                  style='MemoryLabel.TLabel').place(x=22,
-                                                    y=110,
-                                                    width=15,
-                                                    anchor='center')
-
-        # Create the memories columns.
-        # Tuple contains index and frame relative pixel X location
-        for i, x in ((0, 62), (1, 135), (2, 208), (3, 281), (4, 354)):
-            # Place the memory number label ("PS" and 1-4)
-            if i == 0:
-                ttk.Label(fpt,
-                          image=self.label_images['ps'],
-                          style='MemoryLabel.TLabel').place(x=x,
-                                                            y=50,
-                                                            anchor='center')
-            if i >= 1:
-                ttk.Label(fpt,
-                          image=self.label_images[f'm{i}'],
-                          style='FrameLabel.TLabel').place(x=x,
-                                                           y=50,
-                                                           anchor='center')
-
-            rpt.append(dict())  # Dictionary under each 'registers' instance
-
-            # Memory register 'U' value
-            rpt[-1]['U'] = {}
-            rpt[-1]['U']['display'] = SevenSegmentModule(
-                fpt,
-                height=20,
-                width=14,
-                images_dp=self.number_images['s']['d'],
-                images_ndp=self.number_images['s']['nd'],
-                max_value=PSU.RawLimits.VOLTAGE)
-            rpt[-1]['U']['display'].place(anchor='center', x=x, y=80)
-
-            # Memory register 'I' value
-            rpt[-1]['I'] = {}
-            rpt[-1]['I']['display'] = SevenSegmentModule(
-                fpt,
-                height=20,
-                width=14,
-                images_dp=self.number_images['s']['d'],
-                images_ndp=self.number_images['s']['nd'],
-                max_value=PSU.RawLimits.CURRENT)
-            rpt[-1]['I']['display'].place(anchor='center', x=x, y=110)
-
-            # if this is a configurable memory register add the value from the config file
-            if i >= 1:
-                try:
-                    rpt[-1]['U']['display'].value = int(
-                        self.config['memory_registers'].get(f"memory_{i}_u"))
-                    rpt[-1]['I']['display'].value = int(
-                        self.config['memory_registers'].get(f"memory_{i}_i"))
-                except KeyError:
-                    pass
-
-            # Recall Button from memory to Set Windows
-            if i >= 1:
-                rpt[-1]['rcl_button'] = ttk.Button(
-                    fpt,
-                    image=self.button_images['mem-recall'],
-                    tooltip="Recall memory values to Set Windows",
-                    command=eval(f"self.memRecall{i}"))
-                rpt[-1]['rcl_button'].place(x=x,
-                                            y=140,
-                                            width=40,
-                                            height=20,
-                                            anchor='center')
-            elif i == 0:
-                rpt[-1]['rcl_button'] = ttk.Button(
-                    fpt,
-                    image=self.button_images['mem-recall'],
-                    tooltip=
-                    "Recall PS settings to Set Windows and end set_by_app mode",
-                    command=eval(f"self.memRecall{i}"))
-                rpt[-1]['rcl_button'].place(x=x,
-                                            y=140,
-                                            width=40,
-                                            height=20,
-                                            anchor='center')
-
-            # Store Button to memory from Set Windows
-            if i >= 1:
-                rpt[-1]['sto_button'] = ttk.Button(
-                    fpt,
-                    image=self.button_images['mem-store'],
-                    tooltip="Store values from Set Windows to memory",
-                    command=eval(f"self.memStore{i}"))
-                rpt[-1]['sto_button'].place(x=x,
-                                            y=170,
-                                            width=40,
-                                            height=20,
-                                            anchor='center')
-
-####   ===============================================================
-####   All Frames Completed
-
-    def update_last_polled_value(self, polled_values):
-        """Update the GUI frames with the last polled values supplied"""
-
-        # print(polled_values)
-        SetU = polled_values[0]
-        SetI = polled_values[1]
-        U = polled_values[2]
-        I = polled_values[3]
-        RunStop = polled_values[4]
-        RegMode = polled_values[5]
-
-        if RegMode != self.polled_values['RegMode']['last_polled_value']:
-            self.polled_values['RegMode']['last_polled_value'] = RegMode
-            self.set_regulation_mode(RegMode)
-
-        if U != self.polled_values['U']['last_polled_value']:
-            self.polled_values['U']['last_polled_value'] = U
-            self.frames['U']['display'].value = U
-
-        if I != self.polled_values['I']['last_polled_value']:
-            self.polled_values['I']['last_polled_value'] = I
-            self.frames['I']['display'].value = I
-
-        # Only update the display from the polled values if not in local set mode
-        if self.set_by_app != True:
-            if SetU != self.polled_values['SetU']['last_polled_value']:
-                self.polled_values['SetU']['last_polled_value'] = SetU
-                self.frames['SetU']['display'].value = SetU
-
-            if SetI != self.polled_values['SetI']['last_polled_value']:
-                self.polled_values['SetI']['last_polled_value'] = SetI
-                self.frames['SetI']['display'].value = SetI
-
-        # "PS" memory register always displays polled value
-        self.frames['Mem']['registers'][0]['U']['display'].value = SetU
-        self.frames['Mem']['registers'][0]['I']['display'].value = SetI
-
-        if RegMode != self.polled_values['RunStop']['last_polled_value']:
-            self.polled_values['RunStop']['last_polled_value'] = RunStop
-            self.update_runstop_display()
-
-    def update_runstop_display(self):
-        "Update the runstop icons and power output status strings"
-        if self.polled_values['RunStop']['last_polled_value']:
-            self.frames['RS']['run_stop_button'].configure(
-                image=self.button_images['button-stop'])
-            self.frames['RS']['subframes']['outputon'].tkraise()
-        else:
-            self.frames['RS']['run_stop_button'].configure(
-                image=self.button_images['button-run'])
-            self.frames['RS']['subframes']['outputoff'].tkraise()
-
-    def update_connection_status_display(self):
-        "Update the connect/disconnect button display"
-        self.frames['Config']['connection_status'] = not (
-            self.frames['Config']['connection_status'])
-        if self.frames['Config']['connection_status']:
-            self.frames['Config']['connect_button'].configure(
-                image=self.button_images['button-disconn'])
-        else:
-            self.frames['Config']['connect_button'].configure(
-                image=self.button_images['button-conn'])
-
-    def set_set_by_app(self, set_by_app):
-        "Sets the set_by_app status strings and colors of SetU and SetI frames"
-
-        self.set_by_app = set_by_app
-
-        if self.set_by_app == True:
-            self.frames['SetU']['frame'].config(style='SetByAppMode.TFrame')
-            self.frames['SetI']['frame'].config(style='SetByAppMode.TFrame')
-            self.frames['SetMode']['subframes']['app_mode'].tkraise()
-            self.frames['Mem']['registers'][0]['rcl_button'].configure(
-                image=self.button_images['mem-recall-setfromapp'])
-
-        if self.set_by_app == False:
-            self.frames['SetU']['frame'].config(style='.TFrame')
-            self.frames['SetI']['frame'].config(style='.TFrame')
-            self.frames['SetMode']['subframes']['ps_mode'].tkraise()
-            self.frames['Mem']['registers'][0]['rcl_button'].configure(
-                image=self.button_images['mem-recall'])
-
-    def set_regulation_mode(self, RegMode):
-        "Raise the regulation mode status images and set colors of U and I frames"
-
-        #print(f"in set_regulation_mode().  RegMode: {RegMode}")
-
-        # Constant Current Mode
-        if RegMode == PSU.RegulationMode.CURRENT:
-            self.frames['I']['frame'].config(style='ActiveRegMode.TFrame')
-            self.frames['I']['subframes']['current-limited'].tkraise()
-            self.frames['U']['frame'].config(style='TFrame')
-            self.frames['U']['subframes']['hide-limited'].tkraise()
-
-        # Constant Voltage Mode
-        if RegMode == PSU.RegulationMode.VOLTAGE:
-            self.frames['U']['frame'].config(style='ActiveRegMode.TFrame')
-            self.frames['U']['subframes']['voltage-limited'].tkraise()
-            self.frames['I']['frame'].config(style='TFrame')
-            self.frames['I']['subframes']['hide-limited'].tkraise()
-
-        # Overcurrent Protection Active
-        if RegMode == PSU.RegulationMode.OVERCURRENT_PROTECTION:
-            self.frames['I']['frame'].config(style='ErrorRegMode.TFrame')
-            self.frames['I']['subframes']['ocp'].tkraise()
-            self.frames['U']['frame'].config(style='ErrorRegMode.TFrame')
-            self.frames['U']['subframes']['ocp'].tkraise()
-
-    def pop_next_holdingQ(self):
-        if len(self.holdingQ):
-            return self.holdingQ.pop(0)
-        else:
-            return False
-
-    def send_applySet_to_queue(self):
-        """ Puts the message to apply set values to output onto the queue """
-        self.holdingQ.append(
-            ('applySet', (self.frames['SetU']['display'].value,
-                          self.frames['SetI']['display'].value,
-                          self.frames['SetCmd']['off_before_change'].get(),
-                          self.frames['SetCmd']['on_after_change'].get())))
-        self.set_set_by_app(False)
-
-    def send_toggleRS_to_queue(self):
-        """ Puts the message to toggleRS onto the queue """
-        self.holdingQ.append((
-            'toggleRS',
-            '',
-        ))
-        self.update_runstop_display()
-
-    def send_appQuit_to_queue(self):
-        """ Puts the message to toggleRS onto the queue """
-        #print("in send_appQuit_to_queue()")
-        self.holdingQ.append((
-            'appQuit',
-            '',
-        ))
-
-    # Button Callbacks
-
-    def update_and_write_config_file(self):
-        """ Write config file"""
-        for section in ('set', 'communication', 'memory_registers'):
-            try:
-                self.config[section]
-            except (configparser.NoSectionError, KeyError):
-                self.config[section] = dict()
-
-        self.config.set('set', 'output_off_before_change',
-                        f"{self.frames['SetCmd']['off_before_change'].get()}")
-        self.config.set('set', 'output_on_after_change',
-                        f"{self.frames['SetCmd']['on_after_change'].get()}")
-
-        self.config.set('communication', 'comm',
-                        self.frames['Config']['comm_text_box'].get())
-        #self.config.set('communication','comm', self.frames['Config']['comm_text_box'])
-
-        self.config.set(
-            'memory_registers', 'memory_1_u',
-            f"{self.frames['Mem']['registers'][1]['U']['display'].value:04}")
-        self.config.set(
-            'memory_registers', 'memory_1_i',
-            f"{self.frames['Mem']['registers'][1]['I']['display'].value:04}")
-        self.config.set(
-            'memory_registers', 'memory_2_u',
-            f"{self.frames['Mem']['registers'][2]['U']['display'].value:04}")
-        self.config.set(
-            'memory_registers', 'memory_2_i',
-            f"{self.frames['Mem']['registers'][2]['I']['display'].value:04}")
-        self.config.set(
-            'memory_registers', 'memory_3_u',
-            f"{self.frames['Mem']['registers'][3]['U']['display'].value:04}")
-        self.config.set(
-            'memory_registers', 'memory_3_i',
-            f"{self.frames['Mem']['registers'][3]['I']['display'].value:04}")
-        self.config.set(
-            'memory_registers', 'memory_4_u',
-            f"{self.frames['Mem']['registers'][4]['U']['display'].value:04}")
-        self.config.set(
-            'memory_registers', 'memory_4_i',
-            f"{self.frames['Mem']['registers'][4]['I']['display'].value:04}")
-
-        with open(self.config_path, 'w+') as configfile:
-            self.config.write(configfile)
-
-    def raise_command_method_frame(self):
-        """raises either the 'serial' or 'network' frame to a visible state"""
-        if self.frames['Config']['comm_method_text'].get() == 'Serial':
-            self.frames['Config']['subframes']['serial'].tkraise()
-        else:
-            self.frames['Config']['subframes']['network'].tkraise()
-
-    def inc_setu_by_one(self):
-        """Increment the SetU display by 1"""
-        self.frames['SetU']['display'] += 100
-        self.set_set_by_app(True)
-
-    def inc_setu_by_hundreth(self):
-        """Increment the SetU display by 0.01"""
-        self.frames['SetU']['display'] += 1
-        self.set_set_by_app(True)
-
-    def inc_setu_by_tenth(self):
-        """Increment the SetU display by 0.1"""
-        self.frames['SetU']['display'] += 10
-        self.set_set_by_app(True)
-
-    def dec_setu_by_one(self):
-        """Decrement the SetU display by 1"""
-        self.frames['SetU']['display'] -= 100
-        self.set_set_by_app(True)
-
-    def dec_setu_by_hundreth(self):
-        """Decrement the SetU display by 0.01"""
-        self.frames['SetU']['display'] -= 1
-        self.set_set_by_app(True)
-
-    def dec_setu_by_tenth(self):
-        """Decrement the SetU display by 0.1"""
-        self.frames['SetU']['display'] -= 10
-        self.set_set_by_app(True)
-
-    def inc_seti_by_one(self):
-        """Increment the SetI display by 1"""
-        self.frames['SetI']['display'] += 100
-        self.set_set_by_app(True)
-
-    def inc_seti_by_hundreth(self):
-        """Increment the SetI display by 0.01"""
-        self.frames['SetI']['display'] += 1
-        self.set_set_by_app(True)
-
-    def inc_seti_by_tenth(self):
-        """Increment the SetI display by 0.1"""
-        self.frames['SetI']['display'] += 10
-        self.set_set_by_app(True)
-
-    def dec_seti_by_one(self):
-        """Decrement the SetI display by 1"""
-        self.frames['SetI']['display'] -= 100
-        self.set_set_by_app(True)
-
-    def dec_seti_by_hundreth(self):
-        """Decrement the SetI display by 0.01"""
-        self.frames['SetI']['display'] -= 1
-        self.set_set_by_app(True)
-
-    def dec_seti_by_tenth(self):
-        """Decrement the SetI display by 0.1"""
-        self.frames['SetI']['display'] -= 10
-        self.set_set_by_app(True)
-
-    def memRecall1(self):
-        """Button callback.  Recall Memory 1"""
-        self.memRecall(1)
-
-    def memRecall2(self):
-        """Button callback.  Recall Memory 2"""
-        self.memRecall(2)
-
-    def memRecall3(self):
-        """Button callback.  Recall Memory 3"""
-        self.memRecall(3)
-
-    def memRecall4(self):
-        """Button callback.  Recall Memory 4"""
-        self.memRecall(4)
-
-    def memRecall0(self):
-        """Button callback.  Recall values from PS and make set_by_app = False"""
-        self.memRecall(0)
-
-    def memRecall(self, mem_id):
-        #print(f"in memRecall(), mem_id: {mem_id}")
-
-        self.frames['SetU']['display'].value = self.frames['Mem']['registers'][
-            mem_id]['U']['display'].value
-        self.frames['SetI']['display'].value = self.frames['Mem']['registers'][
-            mem_id]['I']['display'].value
-
-        if mem_id == 0:
-            self.set_set_by_app(False)
-
-    def memStore1(self):
-        """Button callback.  Store Memory 1"""
-        self.memStore(1)
-
-    def memStore2(self):
-        """Button callback.  Store Memory 2"""
-        self.memStore(2)
-
-    def memStore3(self):
-        """Button callback.  Store Memory 3"""
-        self.memStore(3)
-
-    def memStore4(self):
-        """Button callback.  Store Memory 4"""
-        self.memStore(4)
-
-    def memStore(self, mem_id):
-        #print(f"in memRecall(), mem_id: {mem_id}")
-
-        self.frames['Mem']['registers'][mem_id]['U'][
-            'display'].value = self.frames['SetU']['display'].value
-        self.frames['Mem']['registers'][mem_id]['I'][
-            'display'].value = self.frames['SetI']['display'].value
-
-
-#  End of App() Class
+        Args:
+            * outfile (file): Open text file, lines are flushed as written
+        """
+        self.outfile = outfile
+        if not outfile.seekable() or outfile.tell() == 0:
+            self._write_line(self.HEADER)
+
+    def _write_line(self, line):
+        self.outfile.write(line + '\n')
+        self.outfile.flush()
+
+    def update_last_polled_value(self, polled_values, timestamp):
+        """Unix time of the poll, set and present volts and amps, output and
+        regulation mode registers"""
+        SetU, SetI, U, I, RunStop, RegMode = polled_values[:6]
+        polled = time.time() - (time.monotonic() - timestamp)
+        self._write_line(f"{polled:.3f},{SetU / 100:.2f},{SetI / 100:.2f},"
+                         f"{U / 100:.2f},{I / 100:.2f},{RunStop},{RegMode}")
+
+
+def create_psu(method, comm, ipaddr, port, framing='tcp'):
+    """AsyncPSU for the communication settings of the config file
+
+    Args:
+        * method (str): 'Serial' or 'Network'
+        * comm (str): Serial port, an empty string to search for one
+        * ipaddr (str): Network host
+        * port (str or int): Network port
+        * framing (str): 'tcp' or 'rtu' for a serial gateway
+    """
+    if method == 'Network':
+        return AsyncPSU(host=ipaddr,
+                        tcp_port=int(port),
+                        framing=framing,
+                        debug=False)
+    return AsyncPSU(comm or None, debug=False)
 
 
 #  Cooperative Processes
-async def poll_ps_values(q: asyncio.Queue, ps: PSU):
-    """asyncio process to poll PS periodically"""
+async def poll_ps_values(q: EventScheduler,
+                         ps: AsyncPSU,
+                         interval=0.5,
+                         logger=None):
+    """asyncio process to poll PS periodically
+
+    Samples are queued as ('polled_values', (values, time.monotonic() of
+    the poll)).  Every sample is also given to the logger (a SampleLogger),
+    if any.
+    """
     while True:
         # print("in poll_ps_status()")
 
-        # ps.all_raw is not asyncio friendly
-        # (returned_values) = await ps.read_status_raw()
-        # print(returned_values)
-        # await q.put(('polled_values', returned_values))
+        returned_values = await ps.all_raw()
+        # A failed read returns None and is skipped until the next poll
+        if returned_values is not None:
+            timestamp = time.monotonic()
+            if logger is not None:
+                logger.log(timestamp, returned_values)
+            await q.put(('polled_values', (returned_values, timestamp)))
+        await asyncio.sleep(interval)
 
-        #print(ps.all_raw)
-        await q.put(('polled_values', (ps.all_raw)))
-        await asyncio.sleep(0.5)
 
+async def event_dispatcher(q: EventScheduler, gui, ps: AsyncPSU) -> None:
+    """asyncio process to get events out of queue
 
-async def event_dispatcher(q: asyncio.Queue, gui: App, ps: PSU) -> None:
-    """asyncio process to get events out of queue"""
+    gui is the App, which shows the values from its own thread, or a
+    SampleWriter when headless
+    """
     try:
         while True:
             #print("in get_next_event()")
@@ -1348,66 +111,307 @@ async def event_dispatcher(q: asyncio.Queue, gui: App, ps: PSU) -> None:
             #print(f"event_type: {event_type}")
             #print(f"parameters: {parameters}")
             if event_type == 'polled_values':
-                gui.update_last_polled_value(parameters)
-            if event_type == 'toggleRS':
-                ps.toggle_output()
-            if event_type == 'applySet':
-                ps.apply_set_points(parameters)
+                gui.update_last_polled_value(*parameters)
+            try:
+                if event_type == 'toggleRS':
+                    await ps.toggle_output()
+                if event_type == 'applySet':
+                    await ps.apply_set_points(parameters)
+            except (IOError, PSU_Exception) as e:
+                # A supply that does not answer fails the command, not the
+                # application
+                print(repr(e), file=sys.stderr)
+                print(e, file=sys.stderr)
+            if event_type == 'connectPS':
+                ps.start(parameters)
+            if event_type == 'disconnectPS':
+                ps.stop()
             if event_type == 'appQuit':
-                sys.exit(0)
+                return
 
+    except BrokenPipeError:
+        raise  # Whatever read the headless samples has gone
     except Exception as e:
-        print(repr(e))
-        print(e)
-        print(f'event_type={event_type}')
-        print("exit(1) from get_next_event()")
+        # Not on standard output, which carries the headless samples
+        print(repr(e), file=sys.stderr)
+        print(e, file=sys.stderr)
+        print(f'event_type={event_type}', file=sys.stderr)
+        print("exit(1) from get_next_event()", file=sys.stderr)
         sys.exit(1)
 
 
-async def transfer_to_asyncQ(q: asyncio.Queue, gui: App) -> None:
-    """asyncio process that pulls App holdingQ events and
-    places them on the asyncio Q
+def create_logger(args):
+    """SampleLogger for --log, or None"""
+    if not args.log:
+        return None
+    from PS3010EC_Logger import SampleLogger
+    return SampleLogger(args.log,
+                        max_bytes=int(args.log_size * 1024 * 1024),
+                        backups=args.log_backups)
 
-    Used to get modbus commands to the PS from the App
 
+def print_startup_profile(phases, assets):
+    """--profile-startup report of the ms spent in each phase
+
+    Args:
+        * phases (dict): Seconds by phase, in order
+        * assets (dict): AssetCache.stats
+    """
+    for phase, seconds in phases.items():
+        print(f"{phase:>10} {seconds * 1000:8.1f} ms")
+    print(f"{'total':>10} {sum(phases.values()) * 1000:8.1f} ms")
+    print(f"{assets['images']} images from {assets['atlases']} atlases and "
+          f"{assets['files']} files")
+
+
+class PSUConnection():
+    """The PSU the window controls, found, connected and polled in the
+    background
+
+    Used by event_dispatcher in place of an AsyncPSU.  start() runs discovery,
+    the connection and then polling as a task of its own, so neither the
+    window nor the dispatcher waits on them.  The state is shown with
+    App.update_connection_status_display.  Commands sent while no PSU is
+    connected are dropped, and those that fail are shown there too.
     """
-    while True:
-        event = gui.pop_next_holdingQ()
-        if event:
-            await q.put(event)
-        await asyncio.sleep(.25)
 
+    def __init__(self, gui, q: EventScheduler, logger=None, profile=None):
+        """
+        Args:
+            * gui (App): Window showing the connection state
+            * q (EventScheduler): Queue the polled values are put on
+            * logger (SampleLogger): Given every sample, if any
+            * profile (dict): Startup phases so far for --profile-startup,
+              printed once the first connection has been tried
+        """
+        self.gui = gui
+        self.q = q
+        self.logger = logger
+        self.profile = profile
+        self.ps = None
+        self.task = None
+
+    def start(self, settings):
+        """Connect with the create_psu() arguments settings, then poll"""
+        self.stop()
+        self.task = asyncio.create_task(self._run(settings))
+
+    def stop(self):
+        """Disconnect, or give up connecting"""
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def _show(self, status, message):
+        self.gui.post(self.gui.update_connection_status_display, status,
+                      message)
+
+    async def _run(self, settings):
+        self._show('connecting', 'Connecting...')
+        started = time.perf_counter()
+        message = 'Not connected'
+        ps = None
+        try:
+            try:
+                # Port discovery and loading pymodbus block, so they run in a
+                # thread while the loop carries on
+                ps = await asyncio.to_thread(create_psu, *settings)
+                await ps.connect()
+            except (IOError, ValueError, PSU_Exception) as e:
+                print(repr(e))
+                print(e)
+                message = 'Connection failed'
+                return
+            finally:
+                if self.profile is not None:
+                    self.profile['connection'] = time.perf_counter() - started
+                    print_startup_profile(self.profile, self.gui.assets.stats)
+                    self.profile = None
+
+            self.ps = ps
+            self._show('connected', 'Connected')
+            # The first sample fills in the displays
+            await poll_ps_values(self.q, ps, logger=self.logger)
+        finally:
+            self.ps = None
+            if ps is not None:
+                ps.close()
+            self._show('disconnected', message)
+
+    async def _command(self, name, *args):
+        """Run an AsyncPSU command, showing a failure instead of raising"""
+        if self.ps is None:
+            return
+        try:
+            await getattr(self.ps, name)(*args)
+        except (IOError, PSU_Exception) as e:
+            print(repr(e))
+            print(e)
+            self._show('connected', 'Command failed')
+            return
+        self._show('connected', 'Connected')
 
-async def service_gui_event_loop(gui: App) -> None:
-    while True:
-        #        print("in service_gui_event_loop()")
-        gui.update()
-        await asyncio.sleep(.25)
+    async def toggle_output(self):
+        await self._command('toggle_output')
+
+    async def apply_set_points(self, values):
+        await self._command('apply_set_points', values)
 
 
-async def main():
-    q = asyncio.Queue()
-    gui = App("Power Supply Control Interface", "800x600")
-    #print(f"gui.frames['Config']['comm_text_box']: {gui.frames['Config']['comm_text_box'].get()}")
+async def serve_gui(gui, settings, logger=None, profile=None) -> None:
+    """asyncio side of the GUI: dispatch commands, connecting to the PSU
+    with the create_psu() arguments settings in the background"""
+    q = EventScheduler()
+    q.on_drop.append(lambda event: gui.post(gui.show_command_dropped, event))
+    # Button callbacks put their commands straight on the queue.  Attached
+    # on the Tk thread, which also sends the commands.
+    gui.post(gui.attach_queue, asyncio.get_running_loop(), q)
+
+    connection = PSUConnection(gui, q, logger, profile)
+    connection.start(settings)
     try:
-        ps = PSU(gui.frames['Config']['comm_text_box'].get(), debug=False)
-    except IOError as e:
+        # Until the dispatcher is told to quit
+        await event_dispatcher(q, gui, connection)
+    finally:
+        connection.stop()
+
+
+def run_asyncio(gui, coroutine, status):
+    """Thread running the asyncio side of the GUI
+
+    The exit status is appended to status and the window closed when the
+    coroutine ends
+    """
+    try:
+        asyncio.run(coroutine)
+        status.append(0)
+    except SystemExit as e:
+        status.append(e.code)
+    except Exception as e:
         print(repr(e))
         print(e)
+        status.append(1)
+    gui.post(gui.quit)
+
+
+def main(args):
+    from PS3010EC_GUI import App
+
+    imports = time.perf_counter() - STARTED
+    gui = App("Power Supply Control Interface", "800x790")
+
+    # Draw the window before the serial stack is loaded and the PSU found.
+    # The tooltips are made once it has been drawn.
+    gui.update_connection_status_display('connecting', 'Connecting...')
+    started = time.perf_counter()
+    gui.update()
+    profile = None
+    if args.profile_startup:
+        shown = time.perf_counter() - started
+        tooltips = gui.startup_times.get('tooltips', 0.0)
+        profile = {
+            'imports': imports,
+            'config': gui.startup_times['config'],
+            'assets': gui.startup_times['assets'],
+            'widgets': gui.startup_times['widgets'],
+            'paint': shown - tooltips,
+            'tooltips': tooltips
+        }
+
+    # Connects with the settings in the Config frame
+    status = []
+    worker = threading.Thread(target=run_asyncio,
+                              args=(gui,
+                                    serve_gui(gui, gui.connection_settings(),
+                                              create_logger(args), profile),
+                                    status),
+                              name='asyncio',
+                              daemon=True)
+    # Started from the mainloop so posts to Tk always find it running
+    gui.after_idle(worker.start)
+    gui.mainloop()
+    gui.destroy()
+    sys.exit(status[0] if status else 0)
+
+
+async def headless_main(args):
+    """Poll the PS without a window, streaming samples as CSV"""
+    config = configparser.ConfigParser()
+    try:
+        config.read(args.config)
+    except configparser.Error as e:
+        print(repr(e), file=sys.stderr)
+        print(e, file=sys.stderr)
         sys.exit(1)
 
-    # Cooperative processes
-    ps_values = asyncio.create_task(poll_ps_values(q, ps))
-    dispatcher = asyncio.create_task(event_dispatcher(q, gui, ps))
-    Q_transfer = asyncio.create_task(transfer_to_asyncQ(q, gui))
-    gui_event_loop = asyncio.create_task(service_gui_event_loop(gui))
+    try:
+        ps = create_psu(
+            config.get('communication', 'method', fallback='Serial'),
+            config.get('communication', 'comm', fallback=''),
+            config.get('communication', 'ipaddr', fallback='127.0.0.1'),
+            config.get('communication', 'port', fallback='502'),
+            config.get('communication', 'framing', fallback='tcp'))
+        await ps.connect()
+    except (IOError, ValueError, PSU_Exception) as e:
+        print(repr(e), file=sys.stderr)
+        print(e, file=sys.stderr)
+        sys.exit(1)
 
-    await asyncio.gather(ps_values,
-                         dispatcher,
-                         Q_transfer,
-                         gui_event_loop,
-                         return_exceptions=True)
+    if args.output:
+        outfile = open(args.output, 'a')
+    else:
+        outfile = sys.stdout
+
+    q = EventScheduler()
+    with outfile:
+        await asyncio.gather(
+            poll_ps_values(q, ps, args.interval, create_logger(args)),
+            event_dispatcher(q, SampleWriter(outfile), ps))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Power Supply Control Interface for the LW-3010EC')
+    parser.add_argument('--headless',
+                        action='store_true',
+                        help='poll without a window, writing CSV samples')
+    parser.add_argument('--output',
+                        help='append samples to this file instead of '
+                        'standard output (headless)')
+    parser.add_argument('--interval',
+                        type=float,
+                        default=0.5,
+                        help='seconds between polls (headless, default 0.5)')
+    parser.add_argument('--config',
+                        default=CONFIG_PATH,
+                        help=f'config file (headless, default {CONFIG_PATH})')
+    parser.add_argument('--log',
+                        help='keep every sample in this rotating log file')
+    parser.add_argument('--log-size',
+                        type=float,
+                        default=10,
+                        help='MB at which the log rotates (default 10)')
+    parser.add_argument('--log-backups',
+                        type=int,
+                        default=10,
+                        help='rotated logs kept (default 10)')
+    parser.add_argument('--profile-startup',
+                        action='store_true',
+                        help='print the time spent in each phase of '
+                        'startup, up to connecting to the PSU')
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    args = parse_args()
+    if args.headless:
+        try:
+            asyncio.run(headless_main(args))
+        except KeyboardInterrupt:
+            pass
+        except BrokenPipeError:
+            # The reader of the samples, e.g. head, has exited.  Standard
+            # output goes nowhere so Python does not report it again on exit.
+            os.dup2(os.open(os.devnull, os.O_WRONLY), 1)
+    else:
+        main(args)
@@ -0,0 +1,81 @@
+"""Charge and energy integration of EnergyMeter"""
+
+import atexit
+import os
+import tempfile
+import unittest
+
+from PS3010EC_Energy import EnergyMeter
+
+
+def sample(volts, amps, on=True):
+    """Raw registers 0x1000-0x1005 delivering volts and amps"""
+    return (0, 0, int(round(volts * 100)), int(round(amps * 100)), int(on), 1)
+
+
+class TestEnergyMeter(unittest.TestCase):
+
+    def test_trapezoid(self):
+        meter = EnergyMeter(path=None, max_gap=10.0)
+        meter.add(100.0, sample(10.0, 1.0))
+        meter.add(102.0, sample(12.0, 3.0))
+        # Mean current 2 A and mean power (10 + 36) / 2 W over 2 s
+        self.assertAlmostEqual(meter.ah, 2.0 * 2 / 3600)
+        self.assertAlmostEqual(meter.wh, 23.0 * 2 / 3600)
+        self.assertAlmostEqual(meter.seconds, 2.0)
+
+    def test_nothing_while_output_off_at_either_end(self):
+        meter = EnergyMeter(path=None)
+        meter.add(0.0, sample(10.0, 1.0))
+        meter.add(1.0, sample(10.0, 1.0, on=False))
+        meter.add(2.0, sample(10.0, 1.0))
+        self.assertEqual((meter.ah, meter.wh, meter.seconds), (0, 0, 0))
+        meter.add(3.0, sample(10.0, 1.0))
+        self.assertAlmostEqual(meter.seconds, 1.0)
+        self.assertAlmostEqual(meter.wh, 10.0 / 3600)
+
+    def test_gap_is_skipped_and_counted(self):
+        meter = EnergyMeter(path=None, max_gap=5.0)
+        meter.add(0.0, sample(10.0, 1.0))
+        meter.add(60.0, sample(10.0, 1.0))
+        self.assertEqual(meter.ah, 0)
+        self.assertEqual(meter.gaps, 1)
+        # Integration carries on from the sample after the gap
+        meter.add(61.0, sample(10.0, 1.0))
+        self.assertAlmostEqual(meter.ah, 1.0 / 3600)
+
+    def test_time_going_backwards_adds_nothing(self):
+        meter = EnergyMeter(path=None)
+        meter.add(10.0, sample(10.0, 1.0))
+        meter.add(10.0, sample(10.0, 1.0))
+        meter.add(9.0, sample(10.0, 1.0))
+        self.assertEqual((meter.ah, meter.seconds, meter.gaps), (0, 0, 0))
+
+    def test_elapsed(self):
+        meter = EnergyMeter(path=None)
+        meter.seconds = 3 * 3600 + 25 * 60 + 7.9
+        self.assertEqual(meter.elapsed(), '3:25:07')
+
+    def test_totals_carry_over_restarts(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'energy.ini')
+            meter = EnergyMeter(path)
+            meter.add(0.0, sample(10.0, 1.0))
+            meter.add(1.0, sample(10.0, 1.0))
+            meter.save()
+
+            restarted = EnergyMeter(path)
+            self.assertAlmostEqual(restarted.wh, meter.wh)
+            self.assertAlmostEqual(restarted.seconds, 1.0)
+            self.assertEqual(restarted.since, meter.since)
+            # The first sample after a restart only starts a new interval
+            restarted.add(5000.0, sample(10.0, 1.0))
+            self.assertAlmostEqual(restarted.seconds, 1.0)
+
+            # Not saved at exit, once the directory has gone
+            atexit.unregister(meter.save)
+            atexit.unregister(restarted.save)
+
+
+if __name__ == '__main__':
+    unittest.main()
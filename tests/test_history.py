@@ -0,0 +1,69 @@
+"""Wrap around of the SampleHistory ring buffer"""
+
+import unittest
+
+import numpy as np
+
+from PS3010EC_History import SampleHistory
+
+
+class TestSampleHistory(unittest.TestCase):
+
+    def filled(self, capacity, samples):
+        history = SampleHistory(capacity)
+        for n in range(samples):
+            history.append(float(n), (n, n + 1, n + 2, n + 3, n % 2, 0))
+        return history
+
+    def test_empty(self):
+        history = SampleHistory(4)
+        self.assertEqual(len(history), 0)
+        self.assertIsNone(history.latest_timestamp)
+        self.assertEqual(len(history.last(10)['timestamp']), 0)
+
+    def test_before_wrap(self):
+        history = self.filled(4, 3)
+        self.assertEqual(len(history), 3)
+        np.testing.assert_array_equal(history.view()['timestamp'], [0, 1, 2])
+        self.assertEqual(history.latest_timestamp, 2.0)
+
+    def test_wrap_keeps_newest_in_order(self):
+        history = self.filled(4, 10)
+        view = history.view()
+        self.assertEqual(len(history), 4)
+        np.testing.assert_array_equal(view['timestamp'], [6, 7, 8, 9])
+        np.testing.assert_array_equal(view['set_u'], [6, 7, 8, 9])
+        np.testing.assert_array_equal(view['i'], [9, 10, 11, 12])
+        np.testing.assert_array_equal(view['run_stop'], [0, 1, 0, 1])
+        self.assertEqual(history.latest_timestamp, 9.0)
+
+    def test_wrap_at_exact_capacity(self):
+        history = self.filled(4, 8)
+        np.testing.assert_array_equal(history.view()['timestamp'],
+                                      [4, 5, 6, 7])
+        self.assertEqual(history.latest_timestamp, 7.0)
+
+    def test_views_are_not_copies(self):
+        history = self.filled(4, 6)
+        view = history.view()['u']
+        self.assertFalse(view.flags.owndata)
+        self.assertTrue(view.flags.c_contiguous)
+
+    def test_window_across_wrap(self):
+        history = self.filled(4, 10)
+        np.testing.assert_array_equal(history.window(7, 9)['timestamp'],
+                                      [7, 8])
+        np.testing.assert_array_equal(history.window(end=7)['timestamp'],
+                                      [6])
+        np.testing.assert_array_equal(history.last(1.5)['timestamp'], [8, 9])
+
+    def test_clear(self):
+        history = self.filled(4, 6)
+        history.clear()
+        self.assertEqual(len(history), 0)
+        history.append(100.0, (1, 2, 3, 4, 1, 0))
+        np.testing.assert_array_equal(history.view()['timestamp'], [100])
+
+
+if __name__ == '__main__':
+    unittest.main()
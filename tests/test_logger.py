@@ -0,0 +1,110 @@
+"""Rotation, flushing and write failures of SampleLogger"""
+
+import contextlib
+import io
+import os
+import tempfile
+import time
+import unittest
+
+from PS3010EC_Logger import SampleLogger
+
+VALUES = (1200, 150, 1199, 148, 1, 1)
+
+
+def wait_for(condition, timeout=2.0):
+    """Wait for the writer thread to make condition() true"""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+class TestSampleLogger(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'samples.csv')
+
+    def read_lines(self, path):
+        with open(path) as infile:
+            return infile.read().splitlines()
+
+    def test_samples_written_on_close(self):
+        logger = SampleLogger(self.path, chunk_size=4)
+        for n in range(10):
+            logger.log(float(n), VALUES)
+        logger.close()
+        lines = self.read_lines(self.path)
+        self.assertEqual(lines[0], SampleLogger.HEADER.strip())
+        self.assertEqual(len(lines), 11)
+        self.assertTrue(lines[1].startswith('0.0000,'))
+        self.assertTrue(lines[1].endswith(',12.00,1.50,11.99,1.48,1,1'))
+        self.assertEqual(logger.stats['written'], 10)
+
+    def test_rotation_keeps_backups(self):
+        logger = SampleLogger(self.path,
+                              max_bytes=200,
+                              backups=2,
+                              chunk_size=2)
+        for n in range(40):
+            logger.log(float(n), VALUES)
+        logger.close()
+
+        self.assertGreater(logger.stats['rotations'], 2)
+        self.assertTrue(os.path.exists(self.path + '.1'))
+        self.assertTrue(os.path.exists(self.path + '.2'))
+        self.assertFalse(os.path.exists(self.path + '.3'))
+        # The newest samples are in the current file, the older ones in
+        # the backups, each file starting with the header
+        newest = self.read_lines(self.path)
+        older = self.read_lines(self.path + '.1')
+        self.assertEqual(newest[0], SampleLogger.HEADER.strip())
+        self.assertEqual(older[0], SampleLogger.HEADER.strip())
+        self.assertTrue(newest[-1].startswith('39.0000,'))
+        self.assertLess(float(older[-1].split(',')[0]),
+                        float(newest[1].split(',')[0]))
+
+    def test_part_filled_chunk_is_written_once_due(self):
+        logger = SampleLogger(self.path, chunk_size=100, flush_interval=0.05)
+        logger.log(time.monotonic(), VALUES)
+        wait_for(lambda: logger.stats['written'])
+        self.assertEqual(logger.stats['written'], 1)
+        logger.close()
+
+    @unittest.skipUnless(os.path.exists('/dev/full'), 'needs /dev/full')
+    def test_write_failure_is_counted_and_reported(self):
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            logger = SampleLogger('/dev/full', chunk_size=2)
+            for n in range(6):
+                logger.log(float(n), VALUES)
+            logger.close()
+        self.assertEqual(logger.stats['dropped'], 6)
+        self.assertEqual(logger.stats['written'], 0)
+        self.assertEqual(logger.stats['errors'], 3)
+        self.assertIsInstance(logger.last_error, OSError)
+        # Reported once, not for every chunk
+        self.assertEqual(stderr.getvalue().count('/dev/full'), 1)
+
+    def test_writing_resumes_after_a_failure(self):
+        directory = os.path.dirname(self.path)
+        logger = SampleLogger(self.path, max_bytes=1, chunk_size=1)
+        logger.log(0.0, VALUES)
+        logger.flush()
+        wait_for(lambda: logger.stats['written'])
+        # Rotating fails while the directory is gone
+        os.remove(self.path)
+        os.rmdir(directory)
+        with contextlib.redirect_stderr(io.StringIO()):
+            logger.log(1.0, VALUES)
+            wait_for(lambda: logger.stats['errors'])
+        os.mkdir(directory)
+        logger.log(2.0, VALUES)
+        logger.close()
+        self.assertEqual(logger.stats['dropped'], 1)
+        self.assertTrue(self.read_lines(self.path)[-1].startswith('2.0000,'))
+
+
+if __name__ == '__main__':
+    unittest.main()
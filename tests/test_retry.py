@@ -0,0 +1,115 @@
+"""RetryPolicy timing, CircuitBreaker states and polls the breaker refuses"""
+
+import asyncio
+import unittest
+
+from PS3010EC_Modbus import AsyncPSUBus, CircuitBreaker, RetryPolicy
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def test_timeouts_back_off_to_the_cap(self):
+        policy = RetryPolicy(first_timeout=0.25,
+                             retries=4,
+                             backoff=2.0,
+                             max_timeout=1.5)
+        self.assertEqual([policy.timeout(n) for n in range(policy.attempts)],
+                         [0.25, 0.5, 1.0, 1.5, 1.5])
+
+    def test_delays_grow_before_each_retry(self):
+        policy = RetryPolicy(retries=3, backoff=2.0, retry_delay=0.05)
+        self.assertEqual([policy.delay(n) for n in range(1, policy.attempts)],
+                         [0.05, 0.1, 0.2])
+
+    def test_deadline_is_every_timeout_and_delay(self):
+        policy = RetryPolicy(first_timeout=0.25,
+                             retries=2,
+                             backoff=2.0,
+                             max_timeout=2.0,
+                             retry_delay=0.05)
+        self.assertAlmostEqual(policy.deadline,
+                               0.25 + 0.5 + 1.0 + 0.05 + 0.1)
+
+    def test_no_retries(self):
+        policy = RetryPolicy(first_timeout=0.3, retries=0)
+        self.assertEqual(policy.attempts, 1)
+        self.assertAlmostEqual(policy.deadline, 0.3)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def opened(self):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=5.0)
+        for _ in range(3):
+            self.assertTrue(breaker.allow())
+            breaker.record_failure()
+        return breaker
+
+    def expire(self, breaker):
+        """Move the opening back past reset_timeout"""
+        breaker.opened_at -= breaker.reset_timeout
+
+    def test_opens_after_threshold_failures_in_a_row(self):
+        breaker = CircuitBreaker(failure_threshold=3)
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertTrue(breaker.is_open)
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.trips, 1)
+
+    def test_half_open_lets_one_trial_through(self):
+        breaker = self.opened()
+        self.expire(breaker)
+        self.assertFalse(breaker.is_open)
+        self.assertTrue(breaker.allow())
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+
+    def test_trial_success_closes(self):
+        breaker = self.opened()
+        self.expire(breaker)
+        breaker.allow()
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(breaker.failures, 0)
+        self.assertTrue(breaker.allow())
+
+    def test_trial_failure_opens_again(self):
+        breaker = self.opened()
+        self.expire(breaker)
+        breaker.allow()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertTrue(breaker.is_open)
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.trips, 2)
+
+
+class TestRefusedPolls(unittest.TestCase):
+
+    def test_refused_polls_are_not_in_the_poll_rate(self):
+
+        async def scenario():
+            # Never connected: refused polls do not touch the port
+            bus = AsyncPSUBus('/dev/null')
+            for slave_id in (1, 2):
+                breaker = bus.psu(slave_id).breaker
+                for _ in range(breaker.failure_threshold):
+                    breaker.record_failure()
+            polls = [await bus.poll_next() for _ in range(10)]
+            return bus, polls
+
+        bus, polls = asyncio.run(scenario())
+        self.assertEqual([values for _, values in polls], [None] * 10)
+        self.assertEqual(bus.stats['refused'], 10)
+        self.assertEqual(bus.polls, 0)
+        self.assertIsNone(bus.measured_poll_rate)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+"""Ordering, coalescing and dropping in EventScheduler"""
+
+import asyncio
+import unittest
+
+from PS3010EC_Scheduler import EventScheduler
+
+
+def apply_set(volts, off=False, on=False):
+    return ('applySet', (volts, 100, off, on))
+
+
+class TestEventScheduler(unittest.TestCase):
+
+    def drain(self, scheduler):
+        async def get_all():
+            return [await scheduler.get() for _ in range(scheduler.qsize())]
+
+        return asyncio.run(get_all())
+
+    def test_commands_before_newest_poll(self):
+        scheduler = EventScheduler()
+        scheduler.put_nowait(('polled_values', 1))
+        scheduler.put_nowait(apply_set(1200))
+        scheduler.put_nowait(('polled_values', 2))
+        scheduler.put_nowait(('appQuit', None))
+        self.assertEqual(self.drain(scheduler), [
+            apply_set(1200), ('appQuit', None), ('polled_values', 2)
+        ])
+        self.assertEqual(scheduler.stats['polls_replaced'], 1)
+
+    def test_apply_after_apply_is_merged(self):
+        scheduler = EventScheduler()
+        scheduler.put_nowait(apply_set(1200, off=True, on=True))
+        scheduler.put_nowait(apply_set(900))
+        self.assertEqual(self.drain(scheduler), [apply_set(900)])
+        self.assertEqual(scheduler.stats['applies_merged'], 1)
+        self.assertEqual(scheduler.stats['saved_transactions'], 3)
+
+    def test_apply_not_merged_across_other_command(self):
+        scheduler = EventScheduler()
+        scheduler.put_nowait(apply_set(1200))
+        scheduler.put_nowait(('toggleRS', None))
+        scheduler.put_nowait(apply_set(900))
+        self.assertEqual(self.drain(scheduler), [
+            apply_set(1200), ('toggleRS', None), apply_set(900)
+        ])
+        self.assertEqual(scheduler.stats['applies_merged'], 0)
+
+    def test_toggle_pairs_cancel(self):
+        scheduler = EventScheduler()
+        for _ in range(3):
+            scheduler.put_nowait(('toggleRS', None))
+        self.assertEqual(self.drain(scheduler), [('toggleRS', None)])
+        self.assertEqual(scheduler.stats['toggles_cancelled'], 2)
+        self.assertEqual(scheduler.stats['saved_transactions'], 4)
+
+    def test_commands_beyond_maxsize_are_dropped(self):
+        scheduler = EventScheduler(maxsize=2)
+        dropped = []
+        scheduler.on_drop.append(dropped.append)
+        scheduler.put_nowait(apply_set(1200))
+        scheduler.put_nowait(('toggleRS', None))
+        scheduler.put_nowait(apply_set(900))
+        scheduler.put_nowait(('polled_values', 1))
+        self.assertEqual(scheduler.stats['dropped'], 1)
+        self.assertEqual(dropped, [apply_set(900)])
+        self.assertEqual(self.drain(scheduler), [
+            apply_set(1200), ('toggleRS', None), ('polled_values', 1)
+        ])
+
+    def test_control_events_are_never_dropped(self):
+        scheduler = EventScheduler(maxsize=1)
+        scheduler.put_nowait(apply_set(1200))
+        scheduler.put_nowait(('disconnectPS', None))
+        scheduler.put_nowait(('connectPS', ('Serial', '', '', '502')))
+        scheduler.put_nowait(('toggleRS', None))
+        scheduler.put_nowait(('appQuit', None))
+        self.assertEqual(scheduler.stats['dropped'], 1)
+        self.assertEqual(self.drain(scheduler), [
+            apply_set(1200), ('disconnectPS', None),
+            ('connectPS', ('Serial', '', '', '502')), ('appQuit', None)
+        ])
+
+    def test_bound_frees_as_commands_are_taken(self):
+        scheduler = EventScheduler(maxsize=1)
+        scheduler.put_nowait(apply_set(1200))
+        self.drain(scheduler)
+        scheduler.put_nowait(('toggleRS', None))
+        self.assertEqual(scheduler.stats['dropped'], 0)
+        self.assertEqual(self.drain(scheduler), [('toggleRS', None)])
+
+    def test_full_queue_still_coalesces(self):
+        scheduler = EventScheduler(maxsize=1)
+        scheduler.put_nowait(apply_set(1200))
+        scheduler.put_nowait(apply_set(900))
+        self.assertEqual(scheduler.stats['dropped'], 0)
+        self.assertEqual(self.drain(scheduler), [apply_set(900)])
+
+    def test_get_waits_for_put(self):
+        scheduler = EventScheduler()
+
+        async def scenario():
+            getter = asyncio.create_task(scheduler.get())
+            await asyncio.sleep(0)
+            self.assertFalse(getter.done())
+            scheduler.put_nowait(('appQuit', None))
+            return await asyncio.wait_for(getter, 1)
+
+        self.assertEqual(asyncio.run(scenario()), ('appQuit', None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+"""Step file compilation and SequenceRunner against a simulated supply"""
+
+import asyncio
+import unittest
+
+from PS3010EC_Clock import VirtualClock
+from PS3010EC_Modbus import PSU
+from PS3010EC_Sequence import (SequenceError, SequenceRunner, compile_steps,
+                               format_report)
+from PS3010EC_Simulator import SimulatedPSU, simulated_psu
+
+R = PSU.Registers
+
+
+def snapshot(set_u=0, set_i=0, u=0, i=0, run_stop=0, reg_mode=1):
+    return PSU.Snapshot(set_u, set_i, u, i, run_stop, reg_mode, 0.0)
+
+
+class TestCompileSteps(unittest.TestCase):
+
+    def test_steps(self):
+        steps = compile_steps('''
+            set u=12.00 i=1.5   # comment
+            output on
+            hold 2.5
+            measure warm
+            output OFF
+        ''')
+        self.assertEqual([(step.line, step.op, step.args) for step in steps],
+                         [(2, 'write', [(R.U_WRITE, 1200), (R.I_WRITE, 150)]),
+                          (3, 'write', [(R.RUNSTOP_WRITE, 1)]),
+                          (4, 'hold', 2.5), (5, 'measure', 'warm'),
+                          (6, 'write', [(R.RUNSTOP_WRITE, 0)])])
+        self.assertEqual(steps[0].text, 'set u=12.00 i=1.5')
+
+    def test_nested_repeats(self):
+        steps = compile_steps('''
+            repeat 2
+              hold 1
+              repeat 3
+                measure
+              end
+            end
+        ''')
+        self.assertEqual([step.op for step in steps],
+                         ['hold', 'measure', 'measure', 'measure'] * 2)
+
+    def test_wait_conditions(self):
+        (step, ) = compile_steps('wait u>=11.9 i<0.5 mode=CV timeout=3')
+        predicate, timeout = step.args
+        self.assertEqual(timeout, 3.0)
+        self.assertTrue(predicate(snapshot(u=1190, i=49)))
+        self.assertFalse(predicate(snapshot(u=1189, i=49)))
+        self.assertFalse(predicate(snapshot(u=1190, i=50)))
+        self.assertFalse(predicate(snapshot(u=1190, i=49, reg_mode=0)))
+
+        (step, ) = compile_steps('wait output=on mode=OCP')
+        predicate, timeout = step.args
+        self.assertIsNone(timeout)
+        self.assertTrue(predicate(snapshot(run_stop=1, reg_mode=2)))
+        self.assertFalse(predicate(snapshot(run_stop=0, reg_mode=2)))
+
+    def test_errors_name_the_line(self):
+        cases = {
+            'hold 1\nbogus': (2, 'unknown step'),
+            'set u=31': (1, 'outside'),
+            'set v=1': (1, 'set takes'),
+            'set': (1, 'set needs'),
+            'wait': (1, 'wait needs'),
+            'wait u~1': (1, 'unknown condition'),
+            'wait mode=XX': (1, 'expected mode'),
+            'hold -1': (1, 'negative'),
+            'output maybe': (1, 'on or off'),
+            'end': (1, 'end without repeat'),
+            'measure\nrepeat 2\nhold 1': (2, 'repeat without end'),
+        }
+        for text, (line, message) in cases.items():
+            with self.subTest(text=text):
+                with self.assertRaises(SequenceError) as raised:
+                    compile_steps(text)
+                self.assertEqual(raised.exception.line, line)
+                self.assertIn(message, str(raised.exception))
+
+
+class TestSequenceRunner(unittest.TestCase):
+
+    def run_steps(self, text, load_ohms=10.0, refuse_writes=False):
+        """Returns the StepReports, those passed to on_step and the
+        simulated supply"""
+
+        async def run():
+            clock = VirtualClock()
+            simulator, ps = await simulated_psu(clock, load_ohms=load_ohms)
+            if refuse_writes:
+                simulator.supply(1).write = (
+                    lambda address, values: SimulatedPSU.ILLEGAL_VALUE)
+            completed = []
+            try:
+                reports = await SequenceRunner(
+                    ps, on_step=completed.append,
+                    clock=clock).run(compile_steps(text))
+            finally:
+                ps.close()
+            return reports, completed, simulator.supply(1)
+
+        return asyncio.run(run())
+
+    def test_holds_keep_to_schedule(self):
+        reports, completed, supply = self.run_steps('''
+            set u=12.00 i=1.50
+            output on
+            wait u>11.9 mode=CV timeout=5
+            repeat 3
+              hold 10
+              measure
+            end
+        ''')
+        self.assertEqual(completed, reports)
+        self.assertEqual([r.result for r in reports], ['ok'] * 9)
+        self.assertEqual((supply.set_u, supply.set_i, supply.run_stop),
+                         (1200, 150, 1))
+
+        wait = reports[2]
+        self.assertEqual(wait.values[2:5], (1200, 120, 1))
+        # Holds are timed from the end of the wait, not from when each
+        # starts, so the measurements do not push them later
+        holds = [r for r in reports if r.text == 'hold 10']
+        ends = [r.started + r.duration for r in holds]
+        for n, end in enumerate(ends, 1):
+            self.assertAlmostEqual(end, wait.started + wait.duration + 10 * n)
+
+    def test_wait_timeout_ends_the_sequence(self):
+        reports, _, _ = self.run_steps('''
+            set u=12.00 i=1.50
+            wait output=on timeout=2
+            hold 5
+        ''')
+        self.assertEqual([r.result for r in reports], ['ok', 'timeout'])
+        self.assertAlmostEqual(reports[1].duration, 2.0, places=1)
+
+    def test_refused_write_ends_the_sequence(self):
+        reports, _, supply = self.run_steps('output on\nhold 5',
+                                            refuse_writes=True)
+        self.assertEqual([r.result for r in reports], ['failed'])
+        self.assertEqual(supply.run_stop, 0)
+
+    def test_current_limit_reached(self):
+        # 12 V across 10 ohm would be 1.2 A, so a 0.5 A limit holds CC
+        reports, _, _ = self.run_steps('''
+            set u=12.00 i=0.50
+            output on
+            wait mode=CC i>=0.49 timeout=5
+        ''')
+        self.assertEqual(reports[-1].result, 'ok')
+        self.assertIn('wait mode=CC', format_report(reports))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+"""Batches sent to the simulator, and its bus behaviour"""
+
+import asyncio
+import struct
+import unittest
+
+from PS3010EC_Clock import VirtualClock
+from PS3010EC_Modbus import PSU
+from PS3010EC_Simulator import Simulator, SimulatedPSU, simulated_psu
+
+R = PSU.Registers
+
+
+class TestSimulatedBatch(unittest.TestCase):
+    """A batch sends the planned frames in order"""
+
+    def run_scenario(self, scenario):
+        """Run scenario(ps) against a simulated supply.  Returns the
+        Simulator, the writes it accepted as (address, values) and what
+        scenario returned"""
+
+        async def run():
+            simulator, ps = await simulated_psu(VirtualClock())
+            writes = []
+            simulator.on_write.append(
+                lambda unit, address, values, time: writes.append(
+                    (address, values)))
+            try:
+                result = await scenario(ps)
+            finally:
+                ps.close()
+            return simulator, writes, result
+
+        return asyncio.run(run())
+
+    def test_apply_with_output_off_and_on(self):
+        simulator, writes, _ = self.run_scenario(
+            lambda ps: ps.apply_set_points((1200, 150, True, True)))
+        self.assertEqual(simulator.frames, 3)
+        self.assertEqual(writes, [(0x1006, [0]), (0x1000, [1200, 150]),
+                                  (0x1006, [1])])
+        supply = simulator.supply(1)
+        self.assertEqual((supply.set_u, supply.set_i, supply.run_stop),
+                         (1200, 150, 1))
+
+    def test_apply_set_points_only(self):
+        simulator, writes, _ = self.run_scenario(
+            lambda ps: ps.apply_set_points((900, 50, False, False)))
+        self.assertEqual(simulator.frames, 1)
+        self.assertEqual(writes, [(0x1000, [900, 50])])
+
+    def test_batch_stops_at_failed_write(self):
+
+        async def scenario(ps):
+            async with ps.batch() as transaction:
+                await ps.set_output(False)
+                await ps.write(R.U_WRITE, 1200)
+                await ps.write(R.RUNSTOP_READ, 1)  # Read only
+                await ps.set_output(True)
+            return transaction
+
+        simulator, writes, transaction = self.run_scenario(scenario)
+        self.assertEqual(writes, [(0x1006, [0]), (0x1000, [1200])])
+        self.assertEqual([start for start, _ in transaction.errors],
+                         [0x1004])
+        self.assertEqual(simulator.supply(1).run_stop, 0)
+
+
+class RefusingPSU(SimulatedPSU):
+    """A supply that answers every write with an exception"""
+
+    def write(self, address, values):
+        return SimulatedPSU.ILLEGAL_VALUE
+
+
+class TestHandlePdu(unittest.TestCase):
+
+    def test_read(self):
+        simulator = Simulator([SimulatedPSU(1)], latency=False)
+        response = simulator.handle_pdu(1, struct.pack('>BHH', 3, 0x1000, 2))
+        self.assertEqual(response, struct.pack('>BBHH', 3, 4, 500, 100))
+
+    def test_broadcast_read_gets_no_response(self):
+        simulator = Simulator([SimulatedPSU(1), SimulatedPSU(2)],
+                              latency=False)
+        self.assertIsNone(
+            simulator.handle_pdu(0, struct.pack('>BHH', 3, 0x1000, 6)))
+
+    def test_broadcast_write_reaches_every_supply(self):
+        simulator = Simulator([SimulatedPSU(1), SimulatedPSU(2)],
+                              latency=False)
+        self.assertIsNone(
+            simulator.handle_pdu(0, struct.pack('>BHH', 6, 0x1000, 1200)))
+        self.assertEqual([supply.set_u for supply in simulator.supplies],
+                         [1200, 1200])
+
+    def test_write_fails_if_any_supply_refuses(self):
+        # Two supplies left on the same address
+        simulator = Simulator([RefusingPSU(1), SimulatedPSU(1)],
+                              latency=False)
+        writes = []
+        simulator.on_write.append(lambda *write: writes.append(write))
+        response = simulator.handle_pdu(1, struct.pack('>BHH', 6, 0x1000,
+                                                       1200))
+        self.assertEqual(response,
+                         struct.pack('>BB', 6 | 0x80,
+                                     SimulatedPSU.ILLEGAL_VALUE))
+        self.assertEqual(writes, [])
+
+    def test_no_response_for_other_units(self):
+        simulator = Simulator([SimulatedPSU(1)], latency=False)
+        self.assertIsNone(
+            simulator.handle_pdu(2, struct.pack('>BHH', 3, 0x1000, 6)))
+        self.assertEqual(simulator.frames, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+"""Curve fitting of SweepResult and sweeps of a simulated load"""
+
+import asyncio
+import unittest
+
+import numpy as np
+
+from PS3010EC_Clock import VirtualClock
+from PS3010EC_Modbus import PSU
+from PS3010EC_Simulator import simulated_psu
+from PS3010EC_Sweep import Sweep, SweepResult, raw_set_points
+
+CV = PSU.RegulationMode.VOLTAGE
+CC = PSU.RegulationMode.CURRENT
+
+
+def result(set_points, u, i, mode, sweep='voltage', settled=None):
+    count = len(set_points)
+    return SweepResult(sweep, np.asarray(set_points, dtype=float),
+                       np.asarray(u, dtype=float), np.asarray(i, dtype=float),
+                       np.asarray(mode),
+                       np.ones(count, dtype=bool) if settled is None else
+                       np.asarray(settled), np.zeros(count))
+
+
+class TestSweepResult(unittest.TestCase):
+
+    def test_resistance_of_a_resistor(self):
+        volts = np.arange(1.0, 6.0)
+        r = result(volts, volts, volts / 4.7 + 0.001, [CV] * 5)
+        resistance, offset = r.resistance()
+        self.assertAlmostEqual(resistance, 4.7, places=3)
+        self.assertAlmostEqual(offset, -0.0047, places=3)
+
+    def test_resistance_leaves_out_unsettled_and_limited_points(self):
+        # The last two points are current limited, the first never settled
+        r = result([1, 2, 3, 4, 5],
+                   u=[1, 2, 3, 3.2, 3.2],
+                   i=[9, 0.2, 0.3, 0.3, 0.3],
+                   mode=[CV, CV, CV, CC, CC],
+                   settled=[False, True, True, True, True])
+        resistance, offset = r.resistance()
+        self.assertAlmostEqual(resistance, 10.0)
+        self.assertAlmostEqual(offset, 0.0)
+
+    def test_resistance_needs_two_currents(self):
+        r = result([0, 1], [0, 1], [0, 0], [CV, CV])
+        self.assertTrue(all(np.isnan(r.resistance())))
+
+    def test_knee_where_current_limiting_starts(self):
+        # 10 ohm load with a 0.5 A limit: CV up to 5 V, then CC
+        volts = np.arange(0.0, 12.01, 1.0)
+        amps = np.minimum(volts / 10, 0.5)
+        r = result(volts, np.minimum(volts, 5.0), amps,
+                   np.where(volts / 10 > 0.5, CC, CV))
+        self.assertEqual(r.knee(), 5)
+
+    def test_knee_of_a_diode(self):
+        volts = np.linspace(0, 1, 11)
+        amps = np.where(volts > 0.6, (volts - 0.6) * 5, 0.0)
+        r = result(volts, volts, amps, [CV] * 11)
+        self.assertEqual(r.knee(), 6)
+
+    def test_knee_needs_three_points(self):
+        self.assertIsNone(result([0, 1], [0, 1], [0, 1], [CV, CV]).knee())
+
+
+class TestSetPoints(unittest.TestCase):
+
+    def test_raw(self):
+        np.testing.assert_array_equal(raw_set_points([0, 0.5, 1.234], 3000),
+                                      [0, 50, 123])
+        np.testing.assert_array_equal(raw_set_points([3, 2, 1], 3000),
+                                      [300, 200, 100])
+
+    def test_rejected(self):
+        for set_points, message in (([], 'no set points'),
+                                    ([1, 3, 2], 'in order'),
+                                    ([0, 31], 'within 0-30'),
+                                    ([-1, 0], 'within')):
+            with self.subTest(set_points=set_points):
+                with self.assertRaisesRegex(ValueError, message):
+                    raw_set_points(set_points, PSU.RawLimits.VOLTAGE)
+
+
+class TestSimulatedSweep(unittest.TestCase):
+
+    def sweep(self, set_points, **kwargs):
+
+        async def run():
+            clock = VirtualClock()
+            simulator, ps = await simulated_psu(clock, load_ohms=10.0)
+            try:
+                await ps.set_current(0.5)
+                await ps.set_output(True)
+                return await Sweep(ps, clock=clock,
+                                   **kwargs).run(set_points)
+            finally:
+                ps.close()
+
+        return asyncio.run(run())
+
+    def test_voltage_sweep_of_a_resistor(self):
+        r = self.sweep(np.arange(0, 12.01, 0.5))
+        self.assertTrue(r.settled.all())
+        resistance, offset = r.resistance()
+        self.assertAlmostEqual(resistance, 10.0, places=1)
+        self.assertAlmostEqual(offset, 0.0, places=1)
+        self.assertAlmostEqual(r.set_points[r.knee()], 5.0)
+        self.assertTrue(np.all(r.mode[r.set_points > 5.0] == CC))
+
+    def test_empty_sweep_is_rejected(self):
+        with self.assertRaisesRegex(ValueError, 'no set points'):
+            self.sweep([])
+
+
+if __name__ == '__main__':
+    unittest.main()
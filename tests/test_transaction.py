@@ -0,0 +1,84 @@
+"""Frame planning of Transaction"""
+
+import unittest
+
+from PS3010EC_Modbus import PSU, Transaction
+
+R = PSU.Registers
+
+
+class TestFrames(unittest.TestCase):
+
+    def test_adjacent_writes_merge(self):
+        transaction = Transaction()
+        transaction.write(R.U_WRITE, 1200)
+        transaction.write(R.I_WRITE, 150)
+        self.assertEqual(transaction.frames(), [('write', 0x1000, [1200, 150])])
+
+    def test_write_to_register_before_prepends(self):
+        transaction = Transaction()
+        transaction.write(R.I_WRITE, 150)
+        transaction.write(R.U_WRITE, 1200)
+        self.assertEqual(transaction.frames(), [('write', 0x1000, [1200, 150])])
+
+    def test_same_register_twice_last_value_wins(self):
+        transaction = Transaction()
+        transaction.write(R.U_WRITE, 1200)
+        transaction.write(R.I_WRITE, 150)
+        transaction.write(R.U_WRITE, 900)
+        self.assertEqual(transaction.frames(), [('write', 0x1000, [900, 150])])
+
+    def test_output_off_and_on_keep_their_order(self):
+        transaction = Transaction()
+        transaction.write(R.RUNSTOP_WRITE, 0)
+        transaction.write(R.U_WRITE, 1200)
+        transaction.write(R.I_WRITE, 150)
+        transaction.write(R.RUNSTOP_WRITE, 1)
+        self.assertEqual(transaction.frames(), [
+            ('write', 0x1006, [0]),
+            ('write', 0x1000, [1200, 150]),
+            ('write', 0x1006, [1]),
+        ])
+
+    def test_write_between_reads_is_not_merged_across(self):
+        transaction = Transaction()
+        transaction.write(R.U_WRITE, 1200)
+        transaction.read(R.U_READ)
+        transaction.write(R.I_WRITE, 150)
+        self.assertEqual([frame[:2] for frame in transaction.frames()],
+                         [('write', 0x1000), ('read', 0x1002),
+                          ('write', 0x1001)])
+
+    def test_writes_split_at_frame_limit(self):
+        transaction = Transaction()
+        for offset in range(Transaction.MAX_WRITE + 1):
+            transaction.operations.append(('write', offset, offset))
+        frames = transaction.frames()
+        self.assertEqual([(start, len(values)) for _, start, values in frames],
+                         [(0, Transaction.MAX_WRITE),
+                          (Transaction.MAX_WRITE, 1)])
+
+    def test_neighbouring_reads_merge_and_distribute(self):
+        transaction = Transaction()
+        u_i = transaction.read(R.U_READ, 2)
+        run_stop = transaction.read(R.RUNSTOP_READ)
+        set_i = transaction.read(R.I_WRITE)
+        frames = transaction.frames()
+        self.assertEqual([frame[:3] for frame in frames],
+                         [('read', 0x1001, 4)])
+
+        Transaction.distribute(frames[0], [150, 1199, 148, 1])
+        self.assertEqual(u_i.value, [1199, 148])
+        self.assertEqual(run_stop.value, 1)
+        self.assertEqual(set_i.value, 150)
+
+    def test_reads_with_gap_are_not_merged(self):
+        transaction = Transaction()
+        transaction.read(R.U_READ, 2)
+        transaction.read(R.U_WRITE)
+        self.assertEqual([frame[:3] for frame in transaction.frames()],
+                         [('read', 0x1002, 2), ('read', 0x1000, 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+"""Late responses on the non-blocking transport of AsyncPSU
+
+A scripted unit on a pseudo-terminal answers each request, so stale
+frames can be put on the line where a real one would leave them.
+"""
+
+import asyncio
+import os
+import struct
+import tty
+import unittest
+
+from pymodbus.register_write_message import WriteSingleRegisterRequest
+from pymodbus.utilities import computeCRC
+
+from PS3010EC_Modbus import PSU, AsyncPSU
+
+R = PSU.Registers
+
+
+def rtu(unit, pdu):
+    frame = bytes([unit]) + pdu
+    return frame + struct.pack('>H', computeCRC(frame))
+
+
+def read_response(*registers):
+    return struct.pack(f'>BB{len(registers)}H', 3, 2 * len(registers),
+                       *registers)
+
+
+def write_response(address, value):
+    return struct.pack('>BHH', 6, address, value)
+
+
+class ScriptedUnit():
+    """Answers each 8 byte request (FC3 or FC6) with the next of responses"""
+
+    REQUEST_BYTES = 8
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.device = os.ttyname(self.slave)
+        self._buffer = b''
+        asyncio.get_running_loop().add_reader(self.master, self._received)
+
+    def _received(self):
+        self._buffer += os.read(self.master, 256)
+        while len(self._buffer) >= self.REQUEST_BYTES:
+            self.requests.append(self._buffer[:self.REQUEST_BYTES])
+            self._buffer = self._buffer[self.REQUEST_BYTES:]
+            self.send(self.responses.pop(0))
+
+    def send(self, data):
+        os.write(self.master, data)
+
+    def close(self):
+        asyncio.get_running_loop().remove_reader(self.master)
+        os.close(self.master)
+        os.close(self.slave)
+
+
+class TestLateResponses(unittest.TestCase):
+
+    def run_unit(self, responses, scenario):
+        """Run scenario(ps, unit) against a ScriptedUnit"""
+
+        async def run():
+            unit = ScriptedUnit(responses)
+            ps = AsyncPSU(unit.device)
+            await ps.connect()
+            try:
+                return await scenario(ps, unit)
+            finally:
+                ps.close()
+                unit.close()
+
+        return asyncio.run(run())
+
+    def test_stale_response_read_before_the_request_is_dropped(self):
+
+        async def scenario(ps, unit):
+            # The answer to a request that timed out arrives late and is
+            # taken into the stream's buffer before the next request
+            unit.send(rtu(1, read_response(999)))
+            await asyncio.sleep(0.1)
+            return await ps.read(R.U_READ)
+
+        value = self.run_unit([rtu(1, read_response(1234))], scenario)
+        self.assertEqual(value, 1234)
+
+    def test_response_to_another_function_is_ignored(self):
+
+        async def scenario(ps, unit):
+            rc = await ps.execute(WriteSingleRegisterRequest(0x1000, 1200))
+            value = await ps.read(R.U_READ)
+            return rc, value
+
+        # A late read response comes in ahead of the write's own
+        rc, value = self.run_unit([
+            rtu(1, read_response(999)) + rtu(1, write_response(0x1000, 1200)),
+            rtu(1, read_response(1234))
+        ], scenario)
+        self.assertFalse(rc.isError())
+        self.assertEqual((rc.function_code, rc.address, rc.value),
+                         (6, 0x1000, 1200))
+        self.assertEqual(value, 1234)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+"""Decimation of samples to pixel columns in TrendChartModule"""
+
+import unittest
+
+import numpy as np
+
+from TrendChartModule import TrendChartModule
+
+decimate = TrendChartModule.decimate
+
+
+class TestDecimate(unittest.TestCase):
+
+    def test_min_and_max_of_each_column(self):
+        timestamps = np.array([0.0, 0.2, 0.4, 1.0, 1.5, 2.2])
+        values = np.array([5, 9, 1, 7, 3, 4])
+        points = decimate(timestamps, values, 0.0, width=10, span=10.0)
+        # (x, max, x, min) for pixel columns 0, 1 and 2
+        np.testing.assert_array_equal(
+            points, [[0, 9, 0, 1], [1, 7, 1, 3], [2, 4, 2, 4]])
+
+    def test_never_more_than_two_points_per_column(self):
+        timestamps = np.linspace(0, 60, 100001)
+        values = np.sin(timestamps) * 1000
+        points = decimate(timestamps, values, 0.0, width=300, span=60.0)
+        self.assertEqual(len(points), 300)
+        self.assertTrue(np.all(np.diff(points[:, 0]) > 0))
+        self.assertAlmostEqual(points[:, 1].max(), values.max())
+        self.assertAlmostEqual(points[:, 3].min(), values.min())
+
+    def test_samples_outside_the_chart_go_to_the_edges(self):
+        timestamps = np.array([-5.0, 0.5, 20.0])
+        values = np.array([1, 2, 3])
+        points = decimate(timestamps, values, 0.0, width=10, span=10.0)
+        np.testing.assert_array_equal(points[:, 0], [0, 9])
+
+    def test_gaps_leave_columns_empty(self):
+        timestamps = np.array([0.0, 9.5])
+        values = np.array([1, 2])
+        points = decimate(timestamps, values, 0.0, width=10, span=10.0)
+        np.testing.assert_array_equal(points,
+                                      [[0, 1, 0, 1], [9, 2, 9, 2]])
+
+
+if __name__ == '__main__':
+    unittest.main()